@@ -0,0 +1,56 @@
+#!/usr/bin/python3
+
+import argparse
+import os
+import signal
+import sys
+
+# this add to path eBCSgen home dir, so it can be called from anywhere
+sys.path.append(os.path.split(os.path.split(os.path.split(sys.path[0])[0])[0])[0])
+
+from eBCSgen.Errors.ModelParsingError import ModelParsingError
+from eBCSgen.Parsing.ParseBCSL import Parser
+
+
+def interrupt(signum, frame):
+    # job preemption is treated as an interruption, the latest progress is saved to the checkpoint
+    raise KeyboardInterrupt()
+
+
+args_parser = argparse.ArgumentParser(description='Transition system generating with checkpoints')
+
+args_parser._action_groups.pop()
+required = args_parser.add_argument_group('required arguments')
+optional = args_parser.add_argument_group('optional arguments')
+
+required.add_argument('--model', type=str, required=True)
+required.add_argument('--output', type=str, required=True)
+required.add_argument('--checkpoint', type=str, required=True)
+
+optional.add_argument('--max_time', type=float, default=float("inf"))
+optional.add_argument('--max_size', type=float, default=float("inf"))
+optional.add_argument('--interval', type=float, default=600)
+optional.add_argument('--working_dir', type=str)
+optional.add_argument('--bound', type=int, default=None)
+
+args = args_parser.parse_args()
+
+signal.signal(signal.SIGTERM, interrupt)
+
+model_parser = Parser("model")
+model_str = open(args.model, "r").read()
+model = model_parser.parse(model_str)
+
+if not model.success:
+    raise ModelParsingError(model.data, model_str)
+
+vector_model = model.data.to_vector_model(args.bound)
+
+kwargs = dict(max_time=args.max_time, max_size=args.max_size, checkpoint_interval=args.interval,
+              working_dir=args.working_dir)
+if os.path.exists(args.checkpoint):
+    ts = vector_model.resume_transition_system(args.checkpoint, **kwargs)
+else:
+    ts = vector_model.generate_transition_system(checkpoint=args.checkpoint, **kwargs)
+
+ts.save_to_json(args.output, model.data.params)
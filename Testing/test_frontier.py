@@ -0,0 +1,65 @@
+import unittest
+import numpy as np
+
+from eBCSgen.Parsing.ParseBCSL import Parser
+from eBCSgen.TS.Frontier import Frontier
+from eBCSgen.TS.State import State, Vector, Memory
+
+
+class TestFrontier(unittest.TestCase):
+    def setUp(self):
+        self.s1 = State(Vector(np.array((1, 2, 3))), Memory(0))
+        self.s2 = State(Vector(np.array((1, 2, 4))), Memory(0))
+        self.s3 = State(Vector(np.array((0, 0, 1))), Memory(0))
+
+        self.model_parser = Parser("model")
+        self.model = \
+            """#! rules
+            => K(S{u},T{i})::cyt @ omega
+            K(S{u})::cyt => K(S{p})::cyt @ alpha*[K(S{u})::cyt]
+            K(S{p})::cyt + B{a}::cyt => K(S{p}).B{a}::cyt @ beta*[K(S{p})::cyt]*[B{a}::cyt]
+            B{_}::cyt => @ gamma*[B{_}::cyt]
+            K(S{u},T{i}).B{a}::cyt => @ 5
+
+            #! inits
+            6 B{a}::cyt
+
+            #! definitions
+            alpha = 10
+            beta = 5
+            gamma = 2
+            omega = 3
+            """
+
+    def test_strategies(self):
+        frontier = Frontier([self.s1, self.s2, self.s3, self.s1])
+        self.assertEqual(len(frontier), 3)
+        self.assertEqual([frontier.pop() for _ in range(3)], [self.s1, self.s2, self.s3])
+        self.assertRaises(KeyError, frontier.pop)
+
+        frontier = Frontier([self.s1, self.s2, self.s3], strategy="dfs")
+        self.assertEqual([frontier.pop() for _ in range(3)], [self.s3, self.s2, self.s1])
+
+        frontier = Frontier([self.s1, self.s2, self.s3], strategy="priority",
+                            key=lambda state: -sum(state.content.value))
+        self.assertIn(self.s3, frontier)
+        self.assertEqual(list(frontier), [self.s2, self.s1, self.s3])
+        self.assertEqual([frontier.pop() for _ in range(3)], [self.s2, self.s1, self.s3])
+
+        self.assertRaises(ValueError, Frontier, [], "priority")
+        self.assertRaises(ValueError, Frontier, [], "random")
+
+    def test_size_limited_generation(self):
+        model = self.model_parser.parse(self.model).data
+        vector_model = model.to_vector_model()
+
+        ts = vector_model.generate_transition_system(max_size=20)
+        self.assertEqual(len(ts.states), 20)
+
+        ts_bfs = vector_model.generate_transition_system(max_size=20, workers=1)
+        ts_bfs_again = vector_model.generate_transition_system(max_size=20, workers=1)
+        self.assertEqual(ts_bfs.states, ts_bfs_again.states)
+
+        ts_dfs = vector_model.generate_transition_system(max_size=20, workers=1, strategy="dfs")
+        self.assertEqual(len(ts_dfs.states), 20)
+        self.assertNotEqual(ts_bfs.states, ts_dfs.states)
@@ -0,0 +1,66 @@
+import unittest
+import numpy as np
+from scipy.stats import poisson
+
+from eBCSgen.Analysis.FSP import FSP
+from eBCSgen.Parsing.ParseBCSL import Parser
+from eBCSgen.TS.Stoichiometry import Stoichiometry
+
+
+class TestFSP(unittest.TestCase):
+    def setUp(self):
+        self.model_parser = Parser("model")
+
+        # birth-death process, X(t) is Poisson distributed with mean 5 (1 - exp(-t))
+        self.model = \
+            """#! rules
+            => X()::rep @ 5
+            X()::rep => @ [X()::rep]
+
+            #! inits
+            0 X()::rep
+            """
+        self.times = np.array([0, 0.5, 1, 3])
+
+    def test_generator(self):
+        vector_model = self.model_parser.parse(self.model).data.to_vector_model(4)
+        vector_model.compile_rates()
+        fsp = FSP(Stoichiometry(vector_model.vector_reactions), np.arange(5).reshape(-1, 1))
+        generator = fsp.generator.toarray()
+
+        np.testing.assert_allclose(generator.sum(axis=1), 0, atol=1e-12)
+        self.assertEqual(generator[0, 1], 5)
+        self.assertEqual(generator[3, 2], 3)
+        # production in the last state leaves the projection
+        self.assertEqual(generator[4, fsp.sink], 5)
+        np.testing.assert_array_equal(generator[fsp.sink], 0)
+
+    def test_transient(self):
+        vector_model = self.model_parser.parse(self.model).data.to_vector_model(30)
+        for method in ("krylov", "uniformization"):
+            distribution = vector_model.transient_analysis(self.times, method)
+            marginal = distribution.marginal(0)
+            for point, time in enumerate(self.times):
+                expected = poisson.pmf(np.arange(marginal.shape[1]), 5 * (1 - np.exp(-time)))
+                np.testing.assert_allclose(marginal[point], expected, atol=1e-8)
+            self.assertTrue((distribution.error < 1e-8).all())
+
+            df = distribution.to_dataframe(["X()::rep"])
+            np.testing.assert_allclose(df["X()::rep"], 5 * (1 - np.exp(-self.times)), atol=1e-6)
+            self.assertEqual(list(df.columns), ["times", "X()::rep", "error"])
+
+    def test_truncation_error(self):
+        vector_model = self.model_parser.parse(self.model).data.to_vector_model(6)
+        for method in ("krylov", "uniformization"):
+            distribution = vector_model.transient_analysis(self.times, method)
+            self.assertEqual(distribution.error[0], 0)
+            self.assertTrue((np.diff(distribution.error) > 0).all())
+
+            marginal = distribution.marginal(0)
+            for point, time in enumerate(self.times):
+                expected = poisson.pmf(np.arange(marginal.shape[1]), 5 * (1 - np.exp(-time)))
+                self.assertTrue((marginal[point] <= expected + 1e-10).all())
+                self.assertTrue((expected <= marginal[point] + distribution.error[point] + 1e-10).all())
+
+        self.assertRaises(ValueError, vector_model.transient_analysis, self.times, "expm")
+        self.assertRaises(ValueError, vector_model.transient_analysis, [1, 0])
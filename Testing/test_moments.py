@@ -0,0 +1,62 @@
+import unittest
+import numpy as np
+
+from eBCSgen.Parsing.ParseBCSL import Parser
+
+
+class TestMoments(unittest.TestCase):
+    def setUp(self):
+        self.model_parser = Parser("model")
+
+        self.model = \
+            """#! rules
+            X()::rep + Y()::rep => Z()::rep @ k1*[X()::rep]*[Y()::rep]
+            Z()::rep => X()::rep + Y()::rep @ k2*[Z()::rep]
+
+            #! inits
+            20 X()::rep
+            10 Y()::rep
+
+            #! definitions
+            k1 = 0.05
+            k2 = 0.3
+            """
+
+    def test_linear(self):
+        model = \
+            """#! rules
+            => X()::rep @ 5
+            X()::rep => @ [X()::rep]
+
+            #! inits
+            0 X()::rep
+            """
+        vector_model = self.model_parser.parse(model).data.to_vector_model(30)
+        expected = 5 * (1 - np.exp(-np.linspace(0, 3, 31)))
+        for closure in ("lna", "second_order"):
+            df = vector_model.moment_simulation(3, closure, step=0.1)
+            self.assertEqual(list(df.columns), ["times", "X()::rep", "X()::rep-std", "X()::rep+std"])
+            # Poisson distribution
+            np.testing.assert_allclose(df["X()::rep"], expected, atol=1e-5)
+            np.testing.assert_allclose(df.attrs["covariance"][:, 0, 0], expected, atol=1e-5)
+            np.testing.assert_allclose(df["X()::rep+std"] - df["X()::rep"], np.sqrt(expected), atol=1e-4)
+
+    def test_closure(self):
+        vector_model = self.model_parser.parse(self.model).data.to_vector_model()
+        distribution = vector_model.transient_analysis([0, 1, 5])
+        mean = distribution.mean()
+        variance = distribution.probabilities @ distribution.states ** 2 - mean ** 2
+
+        errors = dict()
+        for closure in ("lna", "second_order"):
+            df = vector_model.moment_simulation(5, closure, step=1)
+            moments = df.iloc[[0, 1, 5]]
+            covariance = df.attrs["covariance"][[0, 1, 5]]
+            errors[closure] = np.abs(moments[["X()::rep", "Y()::rep", "Z()::rep"]].values - mean).max()
+            np.testing.assert_allclose(np.diagonal(covariance, axis1=1, axis2=2), variance, atol=0.1)
+            # Z() is negatively correlated with X() and Y()
+            self.assertTrue((covariance[1:, 0, 2] < 0).all())
+
+        self.assertLess(errors["second_order"], 0.01)
+        self.assertLess(errors["second_order"], errors["lna"])
+        self.assertRaises(ValueError, vector_model.moment_simulation, 5, "third_order")
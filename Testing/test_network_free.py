@@ -0,0 +1,84 @@
+import collections
+import random
+import unittest
+import numpy as np
+
+from eBCSgen.Parsing.ParseBCSL import Parser
+from eBCSgen.Simulation.NetworkFree import NetworkFreeSimulator
+from eBCSgen.TS.State import Memory
+
+
+class TestNetworkFree(unittest.TestCase):
+    def setUp(self):
+        self.model_parser = Parser("model")
+
+        self.model = \
+            """#! rules
+            A(S{i})::cell => A(S{a})::cell @ k1*[A(S{i})::cell]
+            A(S{a})::cell => A(S{i})::cell @ k2*[A(S{a})::cell]
+            A()::cell + B()::cell => A().B()::cell @ k3*[A()::cell]*[B()::cell]
+            A().B()::cell => A()::cell + B()::cell @ k2*[A().B()::cell]
+
+            #! inits
+            30 A(S{i})::cell
+            20 B()::cell
+
+            #! definitions
+            k1 = 0.3
+            k2 = 0.5
+            k3 = 0.01
+            """
+        self.model = self.model_parser.parse(self.model).data
+
+    def test_incremental_update(self):
+        simulator = NetworkFreeSimulator(self.model.rules, self.model.definitions)
+        state = collections.Counter({simulator.encode(complex): count for complex, count in self.model.init.items()})
+        amounts = np.zeros(len(simulator.agents))
+        for code, count in state.items():
+            amounts[simulator.compatible_agents[code]] += count
+        rates = np.array([simulator.evaluate_rate(i, amounts) for i in range(len(simulator.rules))])
+        matches = [simulator.count_matches(i, state) for i in range(len(simulator.rules))]
+
+        rng = random.Random(1)
+        for _ in range(30):
+            rule = simulator.rules[rng.choice([i for i in range(len(matches)) if matches[i]])]
+            match = rule.sample_match(simulator.decode(state, Memory(0)), rng)
+            delta = collections.Counter()
+            for complex, count in rule.replace(match).value.items():
+                delta[simulator.encode(complex)] += count
+            for complex, count in rule.reconstruct_complexes_from_match(match).value.items():
+                delta[simulator.encode(complex)] -= count
+            simulator.update(state, delta, amounts, rates, matches)
+
+            current = simulator.decode(state, Memory(0))
+            for i, rule in enumerate(simulator.rules):
+                self.assertAlmostEqual(rates[i], float(rule.evaluate_rate(current, self.model.definitions)))
+                self.assertEqual(matches[i], len(rule.match(current, all=True) or []))
+
+    def test_simulate(self):
+        random.seed(3)
+        df = self.model.network_free_simulation(3)
+        self.assertEqual(df.columns[0], "times")
+        self.assertEqual(list(df.iloc[0][1:3]), [30, 20])
+        self.assertTrue((np.diff(df["times"]) > 0).all())
+
+        # A() and B() are conserved
+        a_total = sum(df[column] for column in df.columns if column.startswith("A("))
+        b_total = sum(df[column] for column in df.columns if "B()" in column)
+        self.assertTrue((a_total == 30).all())
+        self.assertTrue((b_total == 20).all())
+
+    def test_bound(self):
+        # the bound is estimated from the rules and the initial state by default
+        simulator = NetworkFreeSimulator(self.model.rules, self.model.definitions)
+        df = simulator.simulate(self.model.init, 3, rng=random.Random(3))
+        self.assertTrue((df.drop(columns="times").sum(axis=1) > 0).all())
+
+        # exceeding given bound leads to the "hell" state
+        simulator = NetworkFreeSimulator(self.model.rules, self.model.definitions, bound=25)
+        df = simulator.simulate(self.model.init, 3, rng=random.Random(3))
+        self.assertTrue((df.drop(columns="times").iloc[-1] == 0).all())
+
+    def test_parametric(self):
+        self.model.definitions.pop("k3")
+        self.assertRaises(ValueError, NetworkFreeSimulator, self.model.rules, self.model.definitions)
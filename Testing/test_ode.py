@@ -0,0 +1,84 @@
+import unittest
+import numpy as np
+
+from eBCSgen.Parsing.ParseBCSL import Parser
+from eBCSgen.Simulation.ODE import ODESystem
+from eBCSgen.TS.Stoichiometry import Stoichiometry
+
+
+class TestODE(unittest.TestCase):
+    def setUp(self):
+        self.model_parser = Parser("model")
+
+        self.model = \
+            """#! rules
+            X()::rep + Y()::rep => Z()::rep @ k1*[X()::rep]*[Y()::rep]
+            Z()::rep => X()::rep + Y()::rep @ k2*[Z()::rep]
+            => Y()::rep @ 1/(1+([X()::rep])**4)
+
+            #! inits
+            20 X()::rep
+            10 Y()::rep
+
+            #! definitions
+            k1 = 0.05
+            k2 = 0.3
+            """
+        self.vector_model = self.model_parser.parse(self.model).data.to_vector_model()
+        self.vector_model.compile_rates()
+
+    def test_rhs(self):
+        stoichiometry = Stoichiometry(self.vector_model.vector_reactions)
+        system = ODESystem(stoichiometry)
+
+        y = np.array([1.5, 0.5, 2.0])
+        expected = np.zeros(3)
+        for reaction in stoichiometry.reactions:
+            expected += reaction.compiled_rate(y) * (reaction.target.content.value - reaction.source.content.value)
+        np.testing.assert_allclose(system.rhs(y), expected)
+
+    def test_jacobian(self):
+        system = ODESystem(Stoichiometry(self.vector_model.vector_reactions))
+
+        y = np.array([1.5, 0.5, 2.0])
+        epsilon = 1e-6
+        numeric = np.array([(system.rhs(y + epsilon * e) - system.rhs(y - epsilon * e)) / (2 * epsilon)
+                            for e in np.eye(3)]).T
+        np.testing.assert_allclose(system.jacobian(y), numeric, rtol=1e-6, atol=1e-8)
+
+    def test_solvers(self):
+        system = ODESystem(Stoichiometry(self.vector_model.vector_reactions))
+        y_0 = self.vector_model.init.content.value.astype(float)
+        times = np.linspace(0, 5, 51)
+
+        expected, statistics = system.solve(y_0, times)
+        self.assertTrue(statistics["success"])
+        self.assertGreater(statistics["steps"], 0)
+        for solver in ("LSODA", "BDF", "Radau", "RK45", "auto"):
+            y, statistics = system.solve(y_0, times, solver)
+            np.testing.assert_allclose(y, expected, rtol=1e-2, atol=1e-2)
+            self.assertGreater(statistics["steps"], 0)
+            self.assertGreater(statistics["rhs_evaluations"], 0)
+        self.assertRaises(ValueError, system.solve, y_0, times, "Euler")
+
+    def test_stiffness(self):
+        model = self.model.replace("k1 = 0.05", "k1 = 5000").replace("k2 = 0.3", "k2 = 3000")
+        vector_model = self.model_parser.parse(model).data.to_vector_model()
+        vector_model.compile_rates()
+        system = ODESystem(Stoichiometry(vector_model.vector_reactions))
+        y_0 = vector_model.init.content.value.astype(float)
+        self.assertTrue(system.is_stiff(y_0, 5))
+        self.assertFalse(ODESystem(Stoichiometry(self.vector_model.vector_reactions)).is_stiff(y_0, 5))
+
+        _, statistics = system.solve(y_0, np.linspace(0, 5, 51), "auto")
+        self.assertEqual(statistics["solver"], "BDF")
+
+        df = vector_model.deterministic_simulation(5, 1 / (6.022 * 10 ** 23), solver="Radau")
+        self.assertEqual(df.attrs["solver"]["solver"], "Radau")
+        self.assertEqual(list(df.columns), ["times"] + list(map(str, vector_model.ordering)))
+
+    def test_symbolic_rates(self):
+        model = self.model.replace("k2 = 0.3", "")
+        vector_model = self.model_parser.parse(model).data.to_vector_model()
+        vector_model.compile_rates()
+        self.assertRaises(ValueError, ODESystem, Stoichiometry(vector_model.vector_reactions))
@@ -0,0 +1,118 @@
+import unittest
+
+from eBCSgen.Analysis.OnTheFly import ReachabilityMonitor
+from eBCSgen.Parsing.ParseBCSL import Parser
+from eBCSgen.Parsing.ParseCTLformula import CTLparser
+from eBCSgen.Parsing.ParsePCTLformula import PCTLparser
+
+
+class TestOnTheFly(unittest.TestCase):
+    def setUp(self):
+        self.model_parser = Parser("model")
+        self.ctl_parser = CTLparser()
+        self.pctl_parser = PCTLparser()
+
+        self.model = \
+            """#! rules
+            X()::rep => Y()::rep @ k1*[X()::rep]
+            Y()::rep => Z()::rep @ k2*[Y()::rep]
+
+            #! inits
+            3 X()::rep
+
+            #! definitions
+            k1 = 0.5
+            k2 = 0.3
+            """
+        self.vector_model = self.model_parser.parse(self.model).data.to_vector_model()
+
+    def check_witness(self, witness, ts):
+        codes = {state: code for code, state in ts.states_encoding.items()}
+        edges = {(edge.source, edge.target) for edge in ts.edges}
+        self.assertEqual(codes[witness[0]], ts.init)
+        for source, target in zip(witness, witness[1:]):
+            self.assertIn((codes[source], codes[target]), edges)
+
+    def test_reachability(self):
+        formula = self.ctl_parser.parse("E(F([Z()::rep >= 2]))")
+        result, witness, ts = self.vector_model.check_on_the_fly(formula, workers=1)
+        self.assertTrue(result)
+        self.assertEqual(len(witness), 5)
+        self.assertEqual(str(witness[-1].content), "(1, 0, 2)")
+        self.check_witness(witness, ts)
+        self.assertTrue(len(ts.unprocessed) > 0)
+
+        formula = self.pctl_parser.parse("P > 0 [F Z()::rep >= 2]")
+        result, witness, ts = self.vector_model.check_on_the_fly(formula, workers=1, compact=True)
+        self.assertTrue(result)
+        self.assertEqual(len(witness), 5)
+        self.check_witness(witness, ts)
+
+        formula = self.ctl_parser.parse("E(true U [Z()::rep >= 4])")
+        result, witness, ts = self.vector_model.check_on_the_fly(formula)
+        self.assertFalse(result)
+        self.assertEqual(witness, [])
+        self.assertEqual(ts, self.vector_model.generate_transition_system())
+
+    def test_invariant(self):
+        formula = self.ctl_parser.parse("A(G([X()::rep > 0] | [Z()::rep > 0]))")
+        result, witness, ts = self.vector_model.check_on_the_fly(formula, workers=2)
+        self.assertFalse(result)
+        self.assertEqual(str(witness[-1].content), "(0, 3, 0)")
+        self.check_witness(witness, ts)
+
+        formula = self.pctl_parser.parse("P >= 1 [G Z()::rep <= 3]")
+        result, witness, ts = self.vector_model.check_on_the_fly(formula)
+        self.assertTrue(result)
+        self.assertEqual(witness, [])
+
+    def test_bounded_reachability(self):
+        formula = self.ctl_parser.parse("E(F([Z()::rep >= 3]))")
+        result, witness, ts = self.vector_model.check_on_the_fly(formula, max_depth=5, workers=1)
+        self.assertFalse(result)
+        self.assertEqual(len(ts.unprocessed), 0)
+
+        result, witness, ts = self.vector_model.check_on_the_fly(formula, max_depth=6, workers=1)
+        self.assertTrue(result)
+        self.assertEqual(len(witness), 7)
+
+    def test_bounded_reachability_concurrent(self):
+        formula = self.ctl_parser.parse("E(F([Z()::rep >= 3]))")
+        # the target is exactly at max_depth, states of the last level must not stop the exploration
+        for compact in (False, True):
+            for _ in range(5):
+                result, witness, ts = self.vector_model.check_on_the_fly(formula, max_depth=6, workers=4,
+                                                                         compact=compact)
+                self.assertTrue(result)
+                self.assertEqual(len(witness), 7)
+                self.check_witness(witness, ts)
+
+            result, witness, ts = self.vector_model.check_on_the_fly(formula, max_depth=5, workers=4,
+                                                                     compact=compact)
+            self.assertFalse(result)
+
+        # states are not discovered by shortest paths first, the limited ones are reopened
+        for max_depth, expected in ((5, False), (6, True)):
+            monitor = ReachabilityMonitor(formula, self.vector_model.ordering, max_depth)
+            ts = self.vector_model.generate_transition_system(workers=1, strategy="dfs", monitor=monitor)
+            self.assertEqual(monitor.result(ts), expected)
+
+    def test_reopen_limited(self):
+        formula = self.ctl_parser.parse("E(F([Z()::rep >= 3]))")
+        monitor = ReachabilityMonitor(formula, self.vector_model.ordering, max_depth=2)
+        state = self.vector_model.init
+        monitor.start("a", state)
+        for source, key in (("a", "b"), ("b", "c"), ("c", "d"), ("d", "e")):
+            monitor.discover(source, key, state)
+        monitor.limit("c")
+        self.assertFalse(monitor.expandable("c"))
+
+        # shorter path to c is propagated to its successors and c is reopened
+        monitor.discover("a", "c", state)
+        self.assertEqual(monitor.reopened, ["c"])
+        self.assertEqual(monitor.depths["e"], 3)
+        self.assertEqual(monitor.path("e"), ["a", "c", "d", "e"])
+
+    def test_unsupported(self):
+        formula = self.pctl_parser.parse("P=? [F Z()::rep >= 2]")
+        self.assertRaises(ValueError, self.vector_model.check_on_the_fly, formula)
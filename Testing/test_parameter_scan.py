@@ -0,0 +1,81 @@
+import unittest
+import numpy as np
+import pandas as pd
+
+from eBCSgen.Parsing.ParseBCSL import Parser
+from eBCSgen.Simulation.ParameterScan import parameter_grid
+
+
+class TestParameterScan(unittest.TestCase):
+    def setUp(self):
+        self.model_parser = Parser("model")
+
+        self.model = \
+            """#! rules
+            X()::rep + Y()::rep => Z()::rep @ k1*[X()::rep]*[Y()::rep]
+            Z()::rep => X()::rep + Y()::rep @ k2*[Z()::rep]
+
+            #! inits
+            20 X()::rep
+            10 Y()::rep
+
+            #! definitions
+            k1 = 0.05
+            k2 = 0.3
+            """
+        self.volume = 1 / (6.022 * 10 ** 23)
+
+    def test_parameter_grid(self):
+        params, sets = parameter_grid({"k1": [0.1, 0.2], "k2": 3, "k3": (1, 2, 3)})
+        self.assertEqual(params, ["k1", "k2", "k3"])
+        self.assertEqual(sets.shape, (6, 3))
+        np.testing.assert_array_equal(sets[-1], [0.2, 3, 3])
+
+    def test_deterministic(self):
+        model = self.model_parser.parse(self.model).data
+        values = {"k1": [0.01, 0.05], "k2": [0.3, 1.0]}
+        df = model.parameter_scan(values, 3, volume=self.volume, step=0.5, solver="odeint", batch_size=3)
+        self.assertEqual(list(df.columns), ["k1", "k2", "times", "agent", "value"])
+        self.assertEqual(len(df), 4 * 7 * 3)
+
+        for k1 in values["k1"]:
+            for k2 in values["k2"]:
+                model.definitions.update({"k1": k1, "k2": k2})
+                expected = model.to_vector_model().deterministic_simulation(3, self.volume, step=0.5)
+                expected = expected.melt(id_vars="times", var_name="agent")
+                result = df[(df.k1 == k1) & (df.k2 == k2)][["times", "agent", "value"]]
+                result = result.sort_values(["agent", "times"]).reset_index(drop=True)
+                np.testing.assert_allclose(result["value"], expected["value"], rtol=1e-4, atol=1e-6)
+                self.assertEqual(list(result["agent"]), list(expected["agent"]))
+
+        parallel = model.parameter_scan(values, 3, volume=self.volume, step=0.5, batch_size=1, workers=2)
+        np.testing.assert_allclose(parallel["value"], df["value"], rtol=1e-2, atol=1e-2)
+
+    def test_batch_accuracy(self):
+        model = self.model_parser.parse(self.model).data
+        values = {"k1": np.geomspace(0.001, 0.5, 8), "k2": [0.1, 1.0]}
+        options = dict(volume=self.volume, step=0.5)
+        expected = model.parameter_scan(values, 5, solver="odeint", batch_size=1, **options)["value"]
+
+        # error of a set is not diluted by other sets of the batch
+        for solver in ("RK45", "BDF"):
+            single = model.parameter_scan(values, 5, solver=solver, batch_size=1, **options)["value"]
+            batched = model.parameter_scan(values, 5, solver=solver, batch_size=16, **options)["value"]
+            np.testing.assert_allclose(batched, single, rtol=1e-2, atol=1e-6)
+            self.assertLessEqual(np.abs(batched - expected).max(), np.abs(single - expected).max())
+
+    def test_stochastic(self):
+        model = self.model_parser.parse(self.model).data
+        values = {"k1": [0.01, 0.1]}
+        df = model.parameter_scan(values, 2, simulation="stochastic", step=0.5, runs=20, seed=3)
+        parallel = model.parameter_scan(values, 2, simulation="stochastic", step=0.5, runs=20, seed=3, workers=2)
+        pd.testing.assert_frame_equal(df, parallel)
+
+        final = df[(df.times == 2) & (df.agent == "Z()::rep")].set_index("k1")["value"]
+        self.assertLess(final[0.01], final[0.1])
+
+    def test_errors(self):
+        model = self.model_parser.parse(self.model).data
+        self.assertRaises(ValueError, model.parameter_scan, {"k4": [1, 2]}, 1, volume=self.volume)
+        self.assertRaises(ValueError, model.parameter_scan, {"k1": [1, 2]}, 1)
+        self.assertRaises(ValueError, model.parameter_scan, {"k1": [1, 2]}, 1, simulation="hybrid")
@@ -83,6 +83,29 @@ class TestRate(unittest.TestCase):
         self.rate_2.vectorize(ordering, dict())
         self.assertEqual(self.rate_2.evaluate(self.state_2), sympy.sympify("3*4.0 + 2"))
 
+    def test_compile(self):
+        ordering = (self.c2, self.c3)
+        self.rate_1.vectorize(ordering, {"v_1": 5})
+        compiled = self.rate_1.compile()
+        self.assertFalse(compiled.is_symbolic)
+        self.assertEqual(compiled.dependencies, {0, 1})
+        self.assertAlmostEqual(compiled(self.state_1.content.value), float(self.rate_1.evaluate(self.state_1)))
+        np.testing.assert_allclose(compiled.evaluate_batch(np.array([[2, 3], [0, 1]])), [37.5, 7.5])
+
+        ordering = (self.c2, self.c3, self.c4, self.c5, self.c6, self.c7)
+        self.rate_2.vectorize(ordering, dict())
+        compiled = self.rate_2.compile()
+        self.assertEqual(compiled(self.state_2.content.value), 14.0)
+        self.assertEqual(str(compiled), "y[0] + y[1] + 3.0*y[2] + 3.0*y[3]")
+
+        # undefined params fall back to symbolic evaluation
+        ordering = (self.c2, self.c3)
+        self.rate_3.vectorize(ordering, dict())
+        compiled = self.rate_3.compile()
+        self.assertTrue(compiled.is_symbolic)
+        self.assertEqual(compiled.params, {"v_1"})
+        self.assertEqual(compiled(self.state_1.content.value), self.rate_3.evaluate(self.state_1))
+
     def test_to_symbolic(self):
         ordering = (self.c2, self.c3)
         self.rate_1.vectorize(ordering, dict())
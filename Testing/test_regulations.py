@@ -1,4 +1,5 @@
 import unittest
+from unittest import mock
 
 from eBCSgen.Parsing.ParseBCSL import Parser
 
@@ -136,3 +137,76 @@ class TestRegulations(unittest.TestCase):
 
         result = model.network_free_simulation(5)
         result.to_csv('Testing/regulated_sim.csv', index=None, header=True)
+
+    def test_stochastic_simulation_regulated(self):
+        regulations = ["type programmed\nr1_S: {r1_T, r2}\nr1_T: {r1_S}",
+                       "type ordered\n(r1_S, r2), (r1_T, r2)",
+                       "type conditional\nr2: {A(S{a},T{i})::cell}",
+                       "type concurrent-free\n(r1_S, r2), (r1_T, r2)",
+                       "type regular\n(r1_Sr1_Tr2|r1_Tr1_Sr2)*"]
+        model_with_labels = self.model_with_labels.replace("1 A(S{i},T{i})::cell",
+                                                           "1 A(S{i},T{i})::cell\n1 A(S{a},T{i})::cell")
+
+        for regulation in regulations:
+            model = self.model_parser.parse(model_with_labels + "\n#! regulation\n" + regulation).data
+            vm = model.to_vector_model(2)
+            ts = vm.generate_transition_system()
+            engine = vm.create_engine("direct")
+            masks = engine.regulation
+            labels = {reaction.label: index for index, reaction in enumerate(engine.stoichiometry.reactions)}
+
+            # reactions allowed by the masks lead exactly to the successors in the TS
+            # (concurrent-free regulation removes an arbitrary reaction of the lower priority label)
+            for code, state in ts.states_encoding.items():
+                memory = masks.initial
+                for label in state.memory.history:
+                    memory = masks.update(memory, labels[label])
+                values = state.content.value
+                propensities, enabled = engine.propensities(values)
+                allowed = masks.allowed(values, memory, enabled & (propensities > 0))
+                successors = {tuple(values + change) for change in engine.stoichiometry.change[allowed]}
+                targets = {tuple(ts.states_encoding[edge.target].content.value)
+                           for edge in ts.edges if edge.source == code}
+                if regulation.startswith("type concurrent-free"):
+                    possible = {tuple(values + change) for change in engine.stoichiometry.change[enabled]}
+                    self.assertTrue(targets <= (possible or {tuple(values)}), regulation)
+                    self.assertEqual(len(successors or {tuple(values)}), len(targets), regulation)
+                else:
+                    self.assertEqual(successors or {tuple(values)}, targets, regulation)
+
+            df = vm.stochastic_simulation(5, 10, seed=1)
+            self.assertAlmostEqual(df.drop(columns="times").sum(axis=1).iloc[-1], 2)
+
+            with self.assertRaises(ValueError):
+                vm.stochastic_simulation(5, 1, method="next_reaction")
+
+    def test_stochastic_simulation_zero_rate(self):
+        # r1_S has zero rate, hence it is not a candidate and does not block r2
+        model = self.model_with_labels.replace("k1 = 0.3", "k1 = 0").replace("k2 = 0.5", "k2 = 0")
+        model = self.model_parser.parse(model + "\n#! regulation\ntype concurrent-free\n(r1_S, r2)").data
+        vm = model.to_vector_model()
+
+        ts = vm.generate_transition_system()
+        self.assertEqual(len(ts.states_encoding), 2)
+
+        df = vm.stochastic_simulation(100, 5, seed=1)
+        self.assertEqual(df["A(S{i},T{i})::cell"].iloc[-1], 0)
+
+    def test_regular_mask_cache(self):
+        model = self.model_parser.parse(self.model_with_labels + "\n#! regulation\ntype regular\n(r1_Sr1_T)*r2").data
+        vm = model.to_vector_model()
+        vm.compile_rates()
+        engine = vm.create_engine("direct")
+        masks = engine.regulation
+        labels = {reaction.label: index for index, reaction in enumerate(engine.stoichiometry.reactions)}
+        allowed = lambda memory: {engine.stoichiometry.reactions[index].label
+                                  for index, value in enumerate(masks.memory_mask(memory)) if value}
+
+        with mock.patch("eBCSgen.Regulations.Masks.MASK_CACHE_SIZE", 3):
+            memory = masks.initial
+            for step in range(10):
+                self.assertEqual(allowed(memory), {"r1_T"} if step % 2 else {"r1_S", "r2"})
+                memory = masks.update(memory, labels["r1_T" if step % 2 else "r1_S"])
+                self.assertLessEqual(len(masks.masks), 3)
+            memory = masks.update(memory, labels["r2"])
+            self.assertEqual(allowed(memory), set())
@@ -1,3 +1,5 @@
+import collections
+import random
 import unittest
 
 from eBCSgen.Core.Rate import Rate
@@ -8,6 +10,7 @@ from eBCSgen.Core.Rule import Rule
 from eBCSgen.Core.Side import Side
 from eBCSgen.Core.Reaction import Reaction
 from eBCSgen.Parsing.ParseBCSL import Parser
+from eBCSgen.TS.State import State, Multiset, Memory
 
 
 class TestRule(unittest.TestCase):
@@ -279,3 +282,32 @@ class TestRule(unittest.TestCase):
         rule = self.parser.parse(rule_expr).data[1]
 
         self.assertTrue(rule.exists_compatible_agent(complex))
+
+    def test_count_and_sample_matches(self):
+        complex_parser = Parser("rate_complex")
+        parse_complex = lambda expression: complex_parser.parse(expression).data.children[0]
+
+        rule = self.parser.parse("K()::cyt + K(S{u})::cyt => K().K()::cyt @ 1").data[1]
+        rule.lhs, rule.rhs = rule.create_complexes()
+
+        # the first candidate must not be consumed when the second one is tried
+        state = State(Multiset(collections.Counter({parse_complex("K(S{u})::cyt"): 1,
+                                                    parse_complex("K(S{p})::cyt"): 1})), Memory(0))
+        self.assertEqual(rule.count_matches(state), 1)
+        self.assertEqual(rule.match(state, all=True), [rule.sample_match(state)])
+
+        state = State(Multiset(collections.Counter({parse_complex("K(S{u})::cyt"): 2,
+                                                    parse_complex("K(S{p},T{a})::cyt"): 3,
+                                                    parse_complex("K(S{p},T{i})::cyt"): 1})), Memory(0))
+        matches = rule.match(state, all=True)
+        self.assertEqual(rule.count_matches(state), len(matches))
+
+        rng = random.Random(7)
+        samples = collections.Counter(str(rule.sample_match(state, rng)) for _ in range(3000))
+        self.assertEqual(set(samples), set(map(str, matches)))
+        for count in samples.values():
+            self.assertAlmostEqual(count / 3000, 1 / len(matches), delta=0.05)
+
+        state = State(Multiset(collections.Counter({parse_complex("K(S{p})::cyt"): 4})), Memory(0))
+        self.assertEqual(rule.count_matches(state), 0)
+        self.assertIsNone(rule.match(state))
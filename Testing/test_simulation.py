@@ -0,0 +1,233 @@
+import random
+import unittest
+import numpy as np
+import pandas as pd
+
+from eBCSgen.Parsing.ParseBCSL import Parser
+from eBCSgen.Simulation.Ensemble import simulate_ensemble
+from eBCSgen.Simulation.PriorityQueue import IndexedPriorityQueue
+from eBCSgen.Simulation.SSA import DirectMethod, NextReactionMethod, TauLeaping, HybridSimulation
+from eBCSgen.Simulation.Statistics import EnsembleStatistics, P2Quantile
+from eBCSgen.Simulation.Trajectory import Trajectory
+from eBCSgen.TS.Stoichiometry import Stoichiometry
+
+
+class TestSimulation(unittest.TestCase):
+    def setUp(self):
+        self.model_parser = Parser("model")
+
+        self.model = \
+            """#! rules
+            X()::rep + Y()::rep => Z()::rep @ k1*[X()::rep]*[Y()::rep]
+            Z()::rep => X()::rep + Y()::rep @ k2*[Z()::rep]
+
+            #! inits
+            20 X()::rep
+            10 Y()::rep
+
+            #! definitions
+            k1 = 0.05
+            k2 = 0.3
+            """
+        self.vector_model = self.model_parser.parse(self.model).data.to_vector_model()
+        self.vector_model.compile_rates()
+
+    def test_trajectory(self):
+        trajectory = Trajectory(2, capacity=1)
+        for i in range(10):
+            trajectory.append(i / 2, np.array([i, -i]))
+        self.assertEqual(len(trajectory), 10)
+        trajectory.append(4.5, np.array([0, 0]))
+
+        df = trajectory.to_dataframe(["a", "b"])
+        self.assertEqual(len(df), 10)
+        self.assertEqual(list(df.loc[4.0]), [8, -8])
+        self.assertEqual(list(df.loc[4.5]), [0, 0])
+
+    def test_direct_method(self):
+        engine = DirectMethod(Stoichiometry(self.vector_model.vector_reactions))
+        trajectory = engine.simulate(self.vector_model.init.content.value, 10, random.Random(42))
+
+        self.assertTrue(len(trajectory) > 1)
+        self.assertTrue(np.all(np.diff(trajectory.times[:len(trajectory)]) > 0))
+        self.assertTrue(trajectory.times[len(trajectory) - 1] < 10)
+
+        # X() + Z() and Y() + Z() are conserved (ordering is X(), Y(), Z())
+        values = trajectory.values[:len(trajectory)]
+        x, y, z = range(3)
+        np.testing.assert_array_equal(values[:, x] + values[:, z], 20)
+        np.testing.assert_array_equal(values[:, y] + values[:, z], 10)
+        self.assertTrue((values >= 0).all())
+
+    def test_priority_queue(self):
+        keys = [5.0, 1.0, np.inf, 3.0, 2.0]
+        queue = IndexedPriorityQueue(keys)
+        self.assertEqual(queue.top(), (1, 1.0))
+
+        queue.update(1, 4.0)
+        self.assertEqual(queue.top(), (4, 2.0))
+        queue.update(2, 0.5)
+        self.assertEqual(queue.top(), (2, 0.5))
+        queue.update(2, np.inf)
+        queue.update(4, np.inf)
+
+        items = []
+        for _ in range(3):
+            item, key = queue.top()
+            items.append(item)
+            queue.update(item, np.inf)
+        self.assertEqual(items, [3, 1, 0])
+
+    def test_next_reaction_method(self):
+        stoichiometry = Stoichiometry(self.vector_model.vector_reactions)
+        engine = NextReactionMethod(stoichiometry)
+        rng = random.Random(42)
+        trajectory = engine.simulate(self.vector_model.init.content.value, 10, rng)
+
+        values = trajectory.values[:len(trajectory)]
+        np.testing.assert_array_equal(values[:, 0] + values[:, 2], 20)
+        np.testing.assert_array_equal(values[:, 1] + values[:, 2], 10)
+        self.assertTrue((values >= 0).all())
+
+        # both methods sample the same process
+        direct = DirectMethod(stoichiometry)
+        means = []
+        for method in (direct, engine):
+            trajectories = [method.simulate(self.vector_model.init.content.value, 2, rng) for _ in range(300)]
+            means.append(np.mean([trajectory.values[len(trajectory) - 1, 2] for trajectory in trajectories]))
+        self.assertAlmostEqual(means[0], means[1], delta=0.5)
+
+        data = self.vector_model.stochastic_simulation(2, 3, method="next_reaction")
+        self.assertEqual(list(data.columns), ["times", "X()::rep", "Y()::rep", "Z()::rep"])
+        self.assertRaises(ValueError, self.vector_model.stochastic_simulation, 2, 3, method="tau")
+
+    def test_tau_leaping(self):
+        model = self.model.replace("20 X()", "2000 X()").replace("10 Y()", "1000 Y()").replace("0.05", "0.0005")
+        vector_model = self.model_parser.parse(model).data.to_vector_model()
+        vector_model.compile_rates()
+        stoichiometry = Stoichiometry(vector_model.vector_reactions)
+        rng = random.Random(42)
+
+        engine = TauLeaping(stoichiometry)
+        trajectories = [engine.simulate(vector_model.init.content.value, 5, rng) for _ in range(20)]
+        exact = [DirectMethod(stoichiometry).simulate(vector_model.init.content.value, 5, rng) for _ in range(20)]
+
+        # far fewer steps than firings
+        self.assertTrue(np.mean([len(t) for t in trajectories]) < np.mean([len(t) for t in exact]) / 2)
+        leaped = np.mean([t.values[len(t) - 1, 2] for t in trajectories])
+        simulated = np.mean([t.values[len(t) - 1, 2] for t in exact])
+        self.assertAlmostEqual(leaped, simulated, delta=15)
+
+        for trajectory in trajectories:
+            values = trajectory.values[:len(trajectory)]
+            np.testing.assert_array_equal(values[:, 0] + values[:, 2], 2000)
+            self.assertTrue((values >= 0).all())
+
+        # low amounts are simulated by exact steps
+        trajectory = TauLeaping(Stoichiometry(self.vector_model.vector_reactions)) \
+            .simulate(self.vector_model.init.content.value, 10, rng)
+        values = trajectory.values[:len(trajectory)]
+        self.assertTrue((np.abs(np.diff(values, axis=0)).sum(axis=1) == 3).all())
+
+    def test_hybrid(self):
+        model = \
+            """#! rules
+            G(s{off})::rep => G(s{on})::rep @ 0.1*[G(s{off})::rep]
+            G(s{on})::rep => G(s{off})::rep @ 0.5*[G(s{on})::rep]
+            M()::rep => N()::rep @ 2*[M()::rep]*(1+[G(s{on})::rep])
+            N()::rep => M()::rep @ [N()::rep]
+
+            #! inits
+            1 G(s{off})::rep
+            1000 M()::rep
+            """
+        vector_model = self.model_parser.parse(model).data.to_vector_model()
+        vector_model.compile_rates()
+        stoichiometry = Stoichiometry(vector_model.vector_reactions)
+        init = vector_model.init.content.value
+        switching = [index for index, reaction in enumerate(stoichiometry.reactions)
+                     if reaction.source.content.value[:2].any()]
+        rng = random.Random(42)
+
+        engine = HybridSimulation(stoichiometry)
+        trajectories = [engine.simulate(init, 3, rng) for _ in range(20)]
+        exact = [DirectMethod(stoichiometry).simulate(init, 3, rng) for _ in range(20)]
+
+        # M() <-> N() is integrated once N() is abundant, the gene always switches exactly
+        for trajectory in trajectories:
+            self.assertEqual(len(trajectory.partitions[0][1]), 0)
+            self.assertEqual(len(trajectory.partitions[-1][1]), 2)
+            self.assertFalse(set(trajectory.partitions[-1][1]) & set(switching))
+            values = trajectory.values[:len(trajectory)]
+            np.testing.assert_array_equal(values[:, 0] + values[:, 1], 1)
+            np.testing.assert_allclose(values[:, 2] + values[:, 3], 1000, rtol=1e-3)
+            self.assertEqual(trajectory.times[len(trajectory) - 1], 3)
+        self.assertTrue(np.mean([len(t) for t in trajectories]) < np.mean([len(t) for t in exact]) / 2)
+
+        grid = np.array([3.0])
+        # means of N() agree within 4 standard errors of their difference
+        hybrid = np.array([t.sample(grid)[0][2] for t in trajectories])
+        simulated = np.array([t.sample(grid)[0][2] for t in exact])
+        error = np.sqrt(hybrid.var(ddof=1) / len(hybrid) + simulated.var(ddof=1) / len(simulated))
+        self.assertAlmostEqual(hybrid.mean(), simulated.mean(), delta=4 * error)
+
+        data = vector_model.stochastic_simulation(3, 2, method="hybrid", seed=1, grid=np.linspace(0, 3, 4))
+        partitions = data.attrs["partitions"]
+        self.assertEqual(list(partitions.columns), ["run", "times", "deterministic"])
+        self.assertEqual(set(partitions["run"]), {0, 1})
+
+    def test_ensemble(self):
+        engine = NextReactionMethod(Stoichiometry(self.vector_model.vector_reactions))
+        init = self.vector_model.init.content.value
+
+        sequential = list(simulate_ensemble(engine, init, 5, 10, seed=7))
+        parallel = list(simulate_ensemble(engine, init, 5, 10, seed=7, workers=3))
+        self.assertEqual(len(parallel), 10)
+        for first, second in zip(sequential, parallel):
+            np.testing.assert_array_equal(first.times[:len(first)], second.times[:len(second)])
+            np.testing.assert_array_equal(first.values[:len(first)], second.values[:len(second)])
+
+        # runs are independent
+        self.assertFalse(np.array_equal(sequential[0].times[:len(sequential[0])],
+                                        sequential[1].times[:len(sequential[1])]))
+
+        data = self.vector_model.stochastic_simulation(5, 6, seed=3, workers=2)
+        pd.testing.assert_frame_equal(data, self.vector_model.stochastic_simulation(5, 6, seed=3))
+
+    def test_statistics(self):
+        trajectory = Trajectory(1)
+        for time, value in [(0, 5), (1, 4), (2.5, 3)]:
+            trajectory.append(time, np.array([value]))
+        np.testing.assert_array_equal(trajectory.sample(np.array([0, 0.5, 1, 2, 3, 10])),
+                                      [[5], [5], [4], [4], [3], [3]])
+
+        rng = np.random.default_rng(1)
+        samples = rng.poisson(10, size=(500, 4, 2)).astype(float)
+        statistics = EnsembleStatistics(np.arange(4), 2, quantiles=(0.5, 0.9))
+        for sample in samples:
+            statistics.add(sample)
+        np.testing.assert_allclose(statistics.mean, samples.mean(axis=0))
+        np.testing.assert_allclose(statistics.variance, samples.var(axis=0, ddof=1))
+        np.testing.assert_allclose(statistics.quantiles[0].value, np.quantile(samples, 0.5, axis=0), atol=1)
+        np.testing.assert_allclose(statistics.quantiles[1].value, np.quantile(samples, 0.9, axis=0), atol=1)
+
+        quantile = P2Quantile(0.5, (1,))
+        for value in [3, 1, 2]:
+            quantile.add(np.array([value]))
+        self.assertEqual(quantile.value, [2])
+        self.assertRaises(ValueError, P2Quantile, 1.5, (1,))
+
+        grid = np.linspace(0, 5, 11)
+        data = self.vector_model.stochastic_simulation(5, 20, seed=3, grid=grid, quantiles=(0.1, 0.9))
+        self.assertEqual(len(data), 11)
+        np.testing.assert_array_equal(data["times"], grid)
+        self.assertEqual(list(data.iloc[0][["X()::rep", "Y()::rep", "Z()::rep"]]), [20, 10, 0])
+        self.assertEqual(data.iloc[0]["X()::rep_var"], 0)
+        self.assertTrue((data["Z()::rep_q0.1"] <= data["Z()::rep_q0.9"]).all())
+        self.assertRaises(ValueError, self.vector_model.stochastic_simulation, 5, 20, quantiles=(0.5,))
+
+    def test_parametric(self):
+        model = self.model.replace("k2 = 0.3", "")
+        vector_model = self.model_parser.parse(model).data.to_vector_model()
+        vector_model.compile_rates()
+        self.assertRaises(ValueError, DirectMethod, Stoichiometry(vector_model.vector_reactions))
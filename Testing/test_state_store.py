@@ -0,0 +1,54 @@
+import unittest
+import numpy as np
+
+from eBCSgen.TS.State import State, Vector, Memory
+from eBCSgen.TS.StateStore import StateStore, StoreEncoding, packing_dtype
+
+
+class TestStateStore(unittest.TestCase):
+    def setUp(self):
+        self.s1 = State(Vector(np.array((1, 2, 3))), Memory(0))
+        self.s2 = State(Vector(np.array((1, 2, 4))), Memory(0))
+        self.s3 = State(Vector(np.array((1, 2, 3))), Memory(1))
+        self.s3.memory.update_memory("r1")
+        self.hell = State(Vector(np.array((np.inf, np.inf, np.inf))), Memory(0), True)
+
+    def test_packing_dtype(self):
+        self.assertEqual(packing_dtype(5), np.uint8)
+        self.assertEqual(packing_dtype(255), np.uint16)
+        self.assertEqual(packing_dtype(70000), np.uint32)
+
+    def test_insert_lookup(self):
+        store = StateStore(3, 5)
+        self.assertEqual(store.insert(self.s1), (1, True))
+        self.assertEqual(store.insert(self.s2), (2, True))
+        self.assertEqual(store.insert(self.s3), (3, True))
+        self.assertEqual(store.insert(self.hell), (4, True))
+        self.assertEqual(store.insert(State(Vector(np.array((1, 2, 4))), Memory(0))), (2, False))
+
+        self.assertEqual(store.lookup(self.s3), 3)
+        self.assertIsNone(store.lookup(State(Vector(np.array((0, 0, 0))), Memory(0))))
+        self.assertEqual(store[1], self.s1)
+        self.assertEqual(store[3], self.s3)
+        self.assertEqual(store[4], self.hell)
+        self.assertEqual(len(store), 4)
+        self.assertRaises(KeyError, store.__getitem__, 5)
+        self.assertRaises(ValueError, store.insert, State(Vector(np.array((1, 2, 300))), Memory(0)))
+
+    def test_growing(self):
+        store = StateStore(2, 100, capacity=4)
+        states = [State(Vector(np.array((i, j))), Memory(0)) for i in range(50) for j in range(50)]
+        codes = [store.insert(state)[0] for state in states]
+        self.assertEqual(codes, list(range(1, len(states) + 1)))
+        self.assertTrue(all(store.lookup(state) == code for state, code in zip(states, codes)))
+
+    def test_encoding_view(self):
+        store = StateStore(3, 5)
+        store.insert(self.s1)
+        store.insert(self.hell)
+        encoding = StoreEncoding(store)
+        self.assertEqual(dict(encoding), {1: self.s1, 2: self.hell})
+
+        del encoding[2]
+        encoding[2] = self.s2
+        self.assertEqual(dict(encoding), {1: self.s1, 2: self.s2})
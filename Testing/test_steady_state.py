@@ -0,0 +1,83 @@
+import unittest
+import numpy as np
+
+from eBCSgen.Parsing.ParseBCSL import Parser
+from eBCSgen.Simulation.ODE import ODESystem
+from eBCSgen.Simulation.SteadyState import SteadyStateSolver, conservation_laws
+from eBCSgen.TS.Stoichiometry import Stoichiometry
+from eBCSgen.TS.VectorModel import AVOGADRO
+
+
+class TestSteadyState(unittest.TestCase):
+    def setUp(self):
+        self.model_parser = Parser("model")
+
+        self.model = \
+            """#! rules
+            A()::rep + A()::rep => B()::rep @ k1*[A()::rep]*[A()::rep]
+            B()::rep => A()::rep + A()::rep @ k2*[B()::rep]
+            B()::rep => C()::rep @ k3*[B()::rep]
+            C()::rep => B()::rep @ k4*[C()::rep]
+
+            #! inits
+            20 A()::rep
+            10 B()::rep
+
+            #! definitions
+            k1 = 0.05
+            k2 = 0.3
+            k3 = 0.2
+            k4 = 0.1
+            """
+        self.volume = 1 / AVOGADRO
+        self.vector_model = self.model_parser.parse(self.model).data.to_vector_model()
+        self.vector_model.compile_rates()
+
+    def test_conservation_laws(self):
+        change = Stoichiometry(self.vector_model.vector_reactions).change
+        laws = conservation_laws(change)
+        # A + 2B + 2C is the only conserved quantity
+        self.assertEqual(laws.shape, (1, 3))
+        np.testing.assert_allclose(change @ laws.T, 0, atol=1e-12)
+        np.testing.assert_allclose(laws[0] / laws[0, 0], [1, 2, 2])
+
+    def test_steady_state(self):
+        df = self.vector_model.steady_state(self.volume)
+        self.assertEqual(df.attrs["solver"]["method"], "newton")
+        self.assertTrue(df.attrs["solver"]["stable"])
+
+        simulated = self.vector_model.deterministic_simulation(200, self.volume)
+        np.testing.assert_allclose(df.iloc[0].values, simulated.iloc[-1].values[1:], rtol=1e-6)
+
+        y = df.iloc[0].values
+        self.assertAlmostEqual(y[0] + 2 * y[1] + 2 * y[2], 40)
+        self.assertAlmostEqual(0.05 * y[0] ** 2, 0.3 * y[1])
+        self.assertAlmostEqual(0.2 * y[1], 0.1 * y[2])
+
+    def test_time_stepping(self):
+        solver = SteadyStateSolver(ODESystem(Stoichiometry(self.vector_model.vector_reactions)))
+        y_0 = self.vector_model.init.content.value
+
+        # Newton method converges to the negative root from this guess
+        y, statistics = solver.find(y_0, guess=np.array([-50.0, 0.0, 0.0]))
+        self.assertEqual(statistics["method"], "time_stepping")
+
+        expected, _ = solver.find(y_0)
+        np.testing.assert_allclose(y, expected)
+
+    def test_continuation(self):
+        model = self.model_parser.parse(self.model).data
+        values = np.linspace(0.01, 1, 12)
+        df = model.parameter_continuation("k1", values, self.volume)
+
+        self.assertEqual(list(df.columns), ["k1", "A()::rep", "B()::rep", "C()::rep", "stable"])
+        self.assertTrue(df["stable"].all())
+        np.testing.assert_allclose(df["k1"], values)
+
+        for value, row in zip(values, df.itertuples(index=False)):
+            model.definitions["k1"] = value
+            expected = model.to_vector_model().steady_state(self.volume).iloc[0].values
+            np.testing.assert_allclose(row[1:4], expected, rtol=1e-8)
+
+        with self.assertRaises(ValueError):
+            model.parameter_continuation("k5", values, self.volume)
@@ -0,0 +1,108 @@
+import unittest
+import numpy as np
+
+from eBCSgen.Parsing.ParseBCSL import Parser
+from eBCSgen.TS.DependencyGraph import DependencyGraph
+from eBCSgen.TS.State import State, Vector, Memory
+from eBCSgen.TS.Stoichiometry import Stoichiometry
+from eBCSgen.TS.TSworker import explore_state, explore_batch, explore_incrementally
+from eBCSgen.TS.VectorReaction import VectorReaction
+
+
+class TestStoichiometry(unittest.TestCase):
+    def setUp(self):
+        self.r1 = VectorReaction(State(Vector(np.array([1, 0, 0])), Memory(0)),
+                                 State(Vector(np.array([0, 1, 0])), Memory(0)), None)
+        self.r2 = VectorReaction(State(Vector(np.array([0, 1, 1])), Memory(0)),
+                                 State(Vector(np.array([0, 0, 2])), Memory(0)), None)
+        self.r3 = VectorReaction(State(Vector(np.array([0, 0, 0])), Memory(0)),
+                                 State(Vector(np.array([1, 0, 0])), Memory(0)), None)
+
+        self.model_parser = Parser("model")
+        self.model = \
+            """#! rules
+            X()::rep => @ k1*[X()::rep]
+            Z()::rep => X()::rep @ k2
+            => Y()::rep @ 1/(1+([X()::rep])**4)
+            r_a ~ X()::rep + Y()::rep => Z()::rep @ k1*[X()::rep]*[Y()::rep]
+
+            #! inits
+            2 X()::rep
+            Y()::rep
+
+            #! definitions
+            k1 = 0.05
+            k2 = 0.12
+
+            #! regulation
+            type programmed
+            r_a: {r_a}
+            """
+
+    def test_matrices(self):
+        stoichiometry = Stoichiometry([self.r1, self.r2, self.r3])
+        np.testing.assert_array_equal(stoichiometry.change, [[-1, 1, 0], [0, -1, 1], [1, 0, 0]])
+        np.testing.assert_array_equal(stoichiometry.support, [0, 1, 2])
+
+        rows = np.array([[0, 0, 0], [1, 1, 0], [2, 1, 1]])
+        enabled = stoichiometry.enabled(rows)
+        np.testing.assert_array_equal(enabled, [[False, False, True], [True, False, True], [True, True, True]])
+
+        sources, reactions, successors = stoichiometry.successors(rows, enabled)
+        np.testing.assert_array_equal(sources, [0, 1, 1, 2, 2, 2])
+        np.testing.assert_array_equal(reactions, [2, 0, 2, 0, 1, 2])
+        np.testing.assert_array_equal(successors[-1], [3, 1, 1])
+        np.testing.assert_array_equal(stoichiometry.exceeds(successors, 2), [False] * 5 + [True])
+
+    def test_explore_batch(self):
+        model = self.model_parser.parse(self.model).data
+        vector_model = model.to_vector_model(3)
+        ts = vector_model.generate_transition_system(workers=1)
+        states = list(ts.states_encoding.values())
+
+        stoichiometry = Stoichiometry(vector_model.vector_reactions)
+        results = explore_batch(states, stoichiometry, None, vector_model.regulation, ts.bound)
+        for state, edges in zip(states, results):
+            expected = explore_state(state, vector_model.vector_reactions, None, vector_model.regulation, ts.bound)
+            self.assertEqual(edges, expected)
+
+    def test_dependency_graph(self):
+        model = self.model_parser.parse(self.model).data
+        vector_model = model.to_vector_model(3)
+        vector_model.compile_rates()
+        stoichiometry = Stoichiometry(vector_model.vector_reactions)
+        graph = DependencyGraph(stoichiometry)
+
+        for index, reaction in enumerate(stoichiometry.reactions):
+            written = set(np.flatnonzero(stoichiometry.change[index]))
+            for other in graph.affected_by(index):
+                read = set(np.flatnonzero(stoichiometry.reactions[other].source.content.value)) \
+                       | stoichiometry.reactions[other].compiled_rate.dependencies
+                self.assertTrue(written & read)
+
+        # production of Y() does not affect degradation of X()
+        rates = [str(reaction.rate) for reaction in stoichiometry.reactions]
+        production = rates.index("1.0/(1.0+((1.0, 0.0, 0.0))**4.0)")
+        degradation = rates.index("0.05*(1.0, 0.0, 0.0)")
+        self.assertFalse(graph.affected[production, degradation])
+        self.assertTrue(graph.affected[degradation, production])
+
+    def test_explore_incrementally(self):
+        model = self.model_parser.parse(self.model).data
+        vector_model = model.to_vector_model(3)
+        vector_model.compile_rates()
+        stoichiometry = Stoichiometry(vector_model.vector_reactions)
+        graph = DependencyGraph(stoichiometry)
+        init = State(vector_model.init.content, Memory(vector_model.regulation.memory))
+
+        # explore several levels reusing hints of parents
+        states, hints = [init], [None]
+        for _ in range(4):
+            results, successor_hints = explore_incrementally(states, hints, stoichiometry, graph,
+                                                             None, vector_model.regulation, 3)
+            for state, edges in zip(states, results):
+                expected = explore_state(state, vector_model.vector_reactions, None, vector_model.regulation, 3)
+                self.assertEqual(edges, expected)
+            states = [successor for hint in successor_hints for successor in hint]
+            hints = [hint[successor] for hint in successor_hints for successor in hint]
+            self.assertTrue(states)
@@ -0,0 +1,116 @@
+import tempfile
+import unittest
+import numpy as np
+
+from eBCSgen.Parsing.ParseBCSL import Parser, load_TS_from_json
+from eBCSgen.Parsing.ParseCTLformula import CTLparser
+from eBCSgen.TS.State import State, Vector, Memory
+from eBCSgen.TS.Symmetry import Symmetry
+
+
+class TestSymmetry(unittest.TestCase):
+    def setUp(self):
+        self.model_parser = Parser("model")
+        self.ctl_parser = CTLparser()
+
+        self.model = \
+            """#! rules
+            => A()::rep @ k1
+            => B()::rep @ k1
+            A()::rep => @ k2*[A()::rep]
+            B()::rep => @ k2*[B()::rep]
+            A()::rep + B()::rep => C()::rep @ k3*[A()::rep]*[B()::rep]
+
+            #! inits
+            C()::rep
+
+            #! definitions
+            k1 = 0.5
+            k2 = 0.3
+            k3 = 0.1
+            """
+        self.vector_model = self.model_parser.parse(self.model).data.to_vector_model(3)
+
+    def test_find(self):
+        symmetry = self.vector_model.find_symmetry()
+        self.assertEqual(symmetry, Symmetry([[0, 1]]))
+
+        # AP distinguishing A() from B() breaks the symmetry
+        formula = self.ctl_parser.parse("E(F([A()::rep >= 2]))")
+        self.assertFalse(self.vector_model.find_symmetry([formula]))
+        formula = self.ctl_parser.parse("E(F([C()::rep >= 2]))")
+        self.assertEqual(self.vector_model.find_symmetry([formula]), symmetry)
+
+        # different rate of B() degradation
+        model = self.model.replace("k2*[B()::rep]", "k1*[B()::rep]")
+        vector_model = self.model_parser.parse(model).data.to_vector_model(3)
+        self.assertFalse(vector_model.find_symmetry())
+
+    def test_reduce(self):
+        symmetry = Symmetry([[0, 1]])
+        state = State(Vector(np.array([1, 3, 2])), Memory(0))
+        self.assertEqual(symmetry.reduce(state), State(Vector(np.array([3, 1, 2])), Memory(0)))
+        self.assertEqual(symmetry.reduce(symmetry.reduce(state)), symmetry.reduce(state))
+
+    def test_reduced_ts(self):
+        ts = self.vector_model.generate_transition_system(workers=1)
+        reduced = self.vector_model.generate_transition_system(workers=1, reduction="symmetry")
+        self.assertTrue(len(reduced.states_encoding) < len(ts.states_encoding))
+
+        # states of the reduced TS are exactly the canonical forms of the original ones
+        symmetry = Symmetry([[0, 1]])
+        self.assertEqual(set(reduced.states_encoding.values()),
+                         {symmetry.reduce(state) for state in ts.states_encoding.values()})
+
+        # lumped probabilities
+        for code, state in reduced.states_encoding.items():
+            out = [edge.probability for edge in reduced.edges if edge.source == code]
+            self.assertAlmostEqual(sum(out), 1)
+
+        self.assertEqual(self.vector_model.generate_transition_system(workers=1, reduction=symmetry), reduced)
+        self.assertEqual(self.vector_model.generate_transition_system(workers=2, backend="process",
+                                                                      reduction="symmetry"), reduced)
+
+    def test_reduction_in_json(self):
+        reduced = self.vector_model.generate_transition_system(workers=1, reduction="symmetry")
+        self.assertEqual(reduced.reduction, {'type': 'symmetry', 'classes': [['A()::rep', 'B()::rep']]})
+
+        reduced.save_to_json("Testing/testing_ts.json")
+        loaded = load_TS_from_json("Testing/testing_ts.json")
+        self.assertEqual(loaded.reduction, reduced.reduction)
+
+    def test_reduction_in_outputs(self):
+        reduced = self.vector_model.generate_transition_system(workers=1, reduction="symmetry")
+
+        with tempfile.TemporaryDirectory() as working_dir:
+            state_labels, AP_labels = reduced.create_AP_labels([])
+            reduced.save_to_STORM_explicit(working_dir + "/ts.tra", working_dir + "/ts.lab", state_labels, AP_labels)
+            with open(working_dir + "/ts.lab") as labels:
+                self.assertIn("reduced_by_symmetry", labels.readlines()[1].split())
+
+            reduced.save_to_prism(working_dir + "/ts.pm", set(), [])
+            with open(working_dir + "/ts.pm") as prism:
+                self.assertIn("// reduced by symmetry: [['A()::rep', 'B()::rep']]", prism.read())
+
+    def test_resume_reduced(self):
+        reduced = self.vector_model.generate_transition_system(workers=1, reduction="symmetry")
+
+        with tempfile.TemporaryDirectory() as working_dir:
+            checkpoint = working_dir + "/ts.npz"
+            interrupted = self.vector_model.generate_transition_system(workers=1, max_size=5, checkpoint=checkpoint,
+                                                                       reduction="symmetry")
+            self.assertTrue(len(interrupted.states_encoding) < len(reduced.states_encoding))
+
+            # the reduction is restored from the checkpoint
+            resumed = self.vector_model.resume_transition_system(checkpoint, workers=1)
+            self.assertEqual(resumed.reduction, reduced.reduction)
+            self.assertEqual(set(resumed.states_encoding.values()), set(reduced.states_encoding.values()))
+
+    def test_regulation(self):
+        model = self.model.replace("A()::rep + B()::rep =>", "r_c ~ A()::rep + B()::rep =>") + """
+            #! regulation
+            type programmed
+            r_c: {r_c}
+            """
+        self.assertRaises(ValueError, self.model_parser.parse(model).data.to_vector_model(3)
+                          .generate_transition_system, workers=1, reduction="symmetry")
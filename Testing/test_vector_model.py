@@ -1,12 +1,15 @@
+import tempfile
 import unittest
 import numpy as np
 import pandas as pd
+import sympy
 
 from eBCSgen.Core.Atomic import AtomicAgent
 from eBCSgen.Core.Rate import Rate
 from eBCSgen.Core.Structure import StructureAgent
 from eBCSgen.Core.Complex import Complex
 from eBCSgen.Parsing.ParseBCSL import Parser, load_TS_from_json
+from eBCSgen.TS.Checkpoint import load_checkpoint, save_checkpoint
 from eBCSgen.TS.Edge import Edge
 from eBCSgen.TS.State import State, Vector, Memory
 from eBCSgen.TS.TransitionSystem import TransitionSystem
@@ -285,6 +288,100 @@ class TestVectorModel(unittest.TestCase):
         loaded_ts = load_TS_from_json("Testing/testing_bigger_ts.json")
         self.assertEqual(generated_ts, loaded_ts)
 
+    def test_generate_transition_system_processes(self):
+        model = self.model_parser.parse(self.model_TS).data
+        vector_model = model.to_vector_model()
+        generated_ts = vector_model.generate_transition_system(backend="process", workers=2)
+        self.assertEqual(self.test_ts, generated_ts)
+
+        # bigger TS
+
+        model = self.model_parser.parse(self.model_bigger_TS).data
+        vector_model = model.to_vector_model()
+        generated_ts = vector_model.generate_transition_system(backend="process")
+        loaded_ts = load_TS_from_json("Testing/testing_bigger_ts.json")
+        self.assertEqual(generated_ts, loaded_ts)
+
+    def test_generate_transition_system_compact(self):
+        model = self.model_parser.parse(self.model_TS).data
+        vector_model = model.to_vector_model()
+        generated_ts = vector_model.generate_transition_system(compact=True)
+        self.assertEqual(self.test_ts, generated_ts)
+
+        model = self.model_parser.parse(self.model_even_bigger_TS).data
+        vector_model = model.to_vector_model()
+
+        generated_ts = vector_model.generate_transition_system(max_size=1000, compact=True)
+        self.assertEqual(len(generated_ts.states_encoding) - len(generated_ts.unprocessed), 1000)
+        generated_ts = vector_model.generate_transition_system(generated_ts, backend="process", workers=2)
+        loaded_ts = load_TS_from_json("Testing/interrupt_even_bigger_ts.json")
+        self.assertEqual(generated_ts, loaded_ts)
+
+    def test_generate_transition_system_out_of_core(self):
+        model = self.model_parser.parse(self.model_bigger_TS).data
+        vector_model = model.to_vector_model()
+        in_memory_ts = vector_model.generate_transition_system()
+
+        with tempfile.TemporaryDirectory() as working_dir:
+            generated_ts = vector_model.generate_transition_system(working_dir=working_dir, cache_size=10)
+            self.assertEqual(len(generated_ts.edges), len(in_memory_ts.edges))
+
+            generated_ts.save_to_json(working_dir + "/ts.json")
+            self.assertEqual(load_TS_from_json(working_dir + "/ts.json"), in_memory_ts)
+
+            state_labels, AP_labels = generated_ts.create_AP_labels([])
+            generated_ts.save_to_STORM_explicit(working_dir + "/ts.tra", working_dir + "/ts.lab",
+                                                state_labels, AP_labels)
+            in_memory_ts.save_to_STORM_explicit(working_dir + "/expected.tra", working_dir + "/expected.lab",
+                                                state_labels, AP_labels)
+            with open(working_dir + "/ts.tra") as generated, open(working_dir + "/expected.tra") as expected:
+                self.assertEqual(len(generated.readlines()), len(expected.readlines()))
+
+            generated_ts.save_to_prism(working_dir + "/ts.pm", set(), [])
+
+    def test_resume_transition_system(self):
+        model = self.model_parser.parse(self.model_even_bigger_TS).data
+        vector_model = model.to_vector_model()
+
+        with tempfile.TemporaryDirectory() as working_dir:
+            checkpoint = working_dir + "/ts.npz"
+            vector_model.generate_transition_system(max_size=1000, checkpoint=checkpoint)
+            generated_ts = vector_model.resume_transition_system(checkpoint, workers=2)
+            loaded_ts = load_TS_from_json("Testing/interrupt_even_bigger_ts.json")
+            self.assertEqual(generated_ts, loaded_ts)
+
+            # the final checkpoint contains the whole TS
+            generated_ts = vector_model.resume_transition_system(checkpoint, working_dir=working_dir)
+            self.assertEqual(len(generated_ts.unprocessed), 0)
+            self.assertEqual(len(generated_ts.edges), len(loaded_ts.edges))
+
+    def test_resume_parametric(self):
+        model = self.model_parser.parse(self.model_parametrised).data
+        vector_model = model.to_vector_model()
+        fresh_ts = vector_model.generate_transition_system(compact=True)
+        fresh = {(edge.source, edge.target): type(edge.probability) for edge in fresh_ts.edges}
+
+        with tempfile.TemporaryDirectory() as working_dir:
+            checkpoint = working_dir + "/ts.npz"
+            vector_model.generate_transition_system(max_size=3, checkpoint=checkpoint)
+            loaded = load_checkpoint(checkpoint, vector_model.ordering)
+            # parametric probabilities keep the type they have in a freshly generated TS
+            self.assertTrue(any(not isinstance(edge.probability, (int, float)) for edge in loaded.edges))
+            for edge in loaded.edges:
+                self.assertIs(type(edge.probability), fresh[(edge.source, edge.target)])
+
+            generated_ts = vector_model.resume_transition_system(checkpoint, workers=1)
+            self.assertEqual(generated_ts, load_TS_from_json("Testing/ts_pMC.json"))
+
+            # sympy expressions are restored as expressions
+            gamma = sympy.Symbol("gamma")
+            edge = next(iter(loaded.edges))
+            edge.probability = gamma / (gamma + 13)
+            save_checkpoint(loaded, checkpoint, [])
+            restored = {(edge.source, edge.target): edge.probability
+                        for edge in load_checkpoint(checkpoint, vector_model.ordering).edges}
+            self.assertEqual(restored[(edge.source, edge.target)], gamma / (gamma + 13))
+
     def test_save_to_json(self):
         model = self.model_parser.parse(self.model_TS).data
         vector_model = model.to_vector_model()
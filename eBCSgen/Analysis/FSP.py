@@ -0,0 +1,163 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.sparse.linalg import expm_multiply
+from scipy.stats import poisson
+
+FSP_METHODS = ("krylov", "uniformization")
+UNIFORMIZATION_TOLERANCE = 1e-10  # neglected tail of the Poisson distribution of jumps
+
+
+class FSP:
+    """
+    Finite State Projection of the chemical master equation of vector reactions.
+
+    The CTMC is restricted to given (e.g. enumerated by Transition system generating) states, its generator matrix
+    is assembled from rates of reactions (not normalised probabilities) evaluated for all states at once
+    (see CompiledRate.evaluate_batch). Transitions leaving the projection lead to an absorbing sink, the probability
+    of the sink bounds the error of the projected distribution in 1-norm (the true probability of every state
+    is between the projected one and the projected one plus the error).
+    """
+    def __init__(self, stoichiometry, states: np.array):
+        self.stoichiometry = stoichiometry
+        for reaction in stoichiometry.reactions:
+            if reaction.compiled_rate is None or reaction.compiled_rate.is_symbolic:
+                raise ValueError("Finite State Projection requires numeric rates, reaction {} has rate {}."
+                                 .format(reaction, reaction.rate))
+
+        self.states = np.asarray(states).reshape(len(states), stoichiometry.change.shape[1])
+        self.index = {tuple(state): code for code, state in enumerate(self.states)}
+        self.sink = len(self.states)
+        self.generator = self.assemble()
+
+    def assemble(self) -> sparse.csr_matrix:
+        """
+        Assembles the generator matrix Q (Q[i, j] is the rate from state i to state j, the last state is the sink).
+
+        :return: sparse generator matrix
+        """
+        enabled = self.stoichiometry.enabled(self.states)
+        sources, reactions, successors = self.stoichiometry.successors(self.states, enabled)
+
+        rates = np.zeros(len(sources))
+        for index, reaction in enumerate(self.stoichiometry.reactions):
+            selected = reactions == index
+            if selected.any():
+                rates[selected] = reaction.compiled_rate.evaluate_batch(self.states[sources[selected]])
+        targets = np.array([self.index.get(tuple(successor), self.sink) for successor in successors], dtype=int)
+
+        # undefined rates and self-loops do not contribute
+        valid = (rates > 0) & (targets != sources)
+        sources, targets, rates = sources[valid], targets[valid], rates[valid]
+
+        size = self.sink + 1
+        exits = np.bincount(sources, weights=rates, minlength=size)
+        rows = np.concatenate([sources, np.arange(size)])
+        columns = np.concatenate([targets, np.arange(size)])
+        return sparse.csr_matrix((np.concatenate([rates, -exits]), (rows, columns)), shape=(size, size))
+
+    def initial(self, init: np.array) -> np.array:
+        """
+        :param init: initial state vector
+        :return: initial distribution (Dirac distribution of the state)
+        """
+        key = tuple(np.asarray(init))
+        if key not in self.index:
+            raise ValueError("Initial state {} is not in the projection.".format(key))
+        distribution = np.zeros(self.sink + 1)
+        distribution[self.index[key]] = 1.0
+        return distribution
+
+    def transient(self, init: np.array, times, method: str = "krylov",
+                  tolerance: float = UNIFORMIZATION_TOLERANCE) -> 'TransientDistribution':
+        """
+        Computes transient distributions p(t) = p(0) exp(Qt) in given time points.
+
+        The "krylov" method uses scipy.sparse.linalg.expm_multiply, the "uniformization" method computes
+        p(0) sum_k Poisson(k; qt) P^k with P = I + Q/q, q being the largest exit rate, and neglects
+        the Poisson tail of given probability (added to the reported error).
+
+        :param init: initial state vector
+        :param times: sorted non-negative time points
+        :param method: "krylov" or "uniformization"
+        :param tolerance: neglected Poisson tail (uniformization only)
+        :return: TransientDistribution
+        """
+        if method not in FSP_METHODS:
+            raise ValueError("Unknown method '{}', use one of {}.".format(method, ", ".join(FSP_METHODS)))
+        times = np.asarray(times, dtype=float)
+        if len(times) and (times[0] < 0 or (np.diff(times) < 0).any()):
+            raise ValueError("Time points have to be sorted and non-negative.")
+
+        distribution = self.initial(init)
+        if method == "krylov":
+            transposed = self.generator.T.tocsr()
+            probabilities = np.array([expm_multiply(transposed * time, distribution) for time in times])
+            neglected = np.zeros(len(times))
+        else:
+            probabilities, neglected = self.uniformization(distribution, times, tolerance)
+
+        probabilities = np.maximum(probabilities.reshape(len(times), self.sink + 1), 0)
+        error = np.minimum(probabilities[:, self.sink] + neglected, 1)
+        return TransientDistribution(self.states, times, probabilities[:, :self.sink], error)
+
+    def uniformization(self, distribution: np.array, times: np.array, tolerance: float):
+        """
+        :param distribution: initial distribution
+        :param times: sorted time points
+        :param tolerance: neglected Poisson tail
+        :return: 2D array of distributions (times x states) and neglected probability for each time point
+        """
+        rate = max(-self.generator.diagonal().min(), 0)
+        if rate == 0:
+            return np.tile(distribution, (len(times), 1)), np.zeros(len(times))
+        transposed = (sparse.identity(self.sink + 1, format="csr") + self.generator / rate).T.tocsr()
+
+        jumps = int(poisson.isf(tolerance, rate * times[-1])) + 1 if len(times) else 0
+        probabilities = np.zeros((len(times), self.sink + 1))
+        weights = [poisson.pmf(np.arange(jumps + 1), rate * time) for time in times]
+        vector = distribution
+        for k in range(jumps + 1):
+            for point, weight in enumerate(weights):
+                probabilities[point] += weight[k] * vector
+            vector = transposed @ vector
+        neglected = np.array([1 - weight.sum() for weight in weights])
+        return probabilities, np.maximum(neglected, 0)
+
+
+class TransientDistribution:
+    """
+    Transient distributions over projected states in several time points together with the error bounds.
+    """
+    def __init__(self, states: np.array, times: np.array, probabilities: np.array, error: np.array):
+        self.states = states
+        self.times = times
+        self.probabilities = probabilities  # times x states
+        self.error = error
+
+    def mean(self) -> np.array:
+        """
+        :return: expected amounts of agents in the time points (times x agents), lower bounds of the true ones
+        """
+        return self.probabilities @ self.states
+
+    def marginal(self, agent: int) -> np.array:
+        """
+        :param agent: index of an agent
+        :return: 2D array P(agent = n) (times x amounts)
+        """
+        amounts = self.states[:, agent].astype(int)
+        marginal = np.zeros((len(self.times), amounts.max() + 1 if len(amounts) else 0))
+        for amount in np.unique(amounts):
+            marginal[:, amount] = self.probabilities[:, amounts == amount].sum(axis=1)
+        return marginal
+
+    def to_dataframe(self, header: list) -> pd.DataFrame:
+        """
+        :param header: names of the agents
+        :return: DataFrame with column times, expected amounts of agents and error bound
+        """
+        df = pd.DataFrame(self.mean(), columns=header)
+        df.insert(0, "times", self.times)
+        df["error"] = self.error
+        return df
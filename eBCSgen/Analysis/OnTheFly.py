@@ -0,0 +1,234 @@
+from lark import Tree
+
+from eBCSgen.Core.Formula import Formula
+
+TRUE = ("true", "True")
+FALSE = ("false",)
+NEGATION = ("~", "!")
+BRACKETS = ("(", ")")
+
+
+def evaluate_state_formula(tree, state, ordering) -> bool:
+    """
+    Evaluates propositional part of a CTL/PCTL Formula (APs combined by boolean connectives) in given State.
+
+    :param tree: lark tree of the formula
+    :param state: given State
+    :param ordering: ordering of the TS
+    :return: True if the State satisfies the formula
+    """
+    if isinstance(tree, Tree) and tree.data == "ap":
+        return state.check_AP(tree.children[0], ordering)
+    if not isinstance(tree, Tree):
+        token = str(tree).strip()
+        if token in TRUE:
+            return True
+        if token in FALSE:
+            return False
+        raise ValueError("Unexpected token '{}' in state formula.".format(token))
+
+    children = [child for child in tree.children if str(child).strip() not in BRACKETS or isinstance(child, Tree)]
+    if len(children) == 1:
+        return evaluate_state_formula(children[0], state, ordering)
+    if len(children) == 2 and str(children[0]).strip() in NEGATION:
+        return not evaluate_state_formula(children[1], state, ordering)
+    if len(children) == 3 and not isinstance(children[1], Tree):
+        operator = str(children[1]).strip()
+        left = evaluate_state_formula(children[0], state, ordering)
+        if operator in ("and", "&"):
+            return left and evaluate_state_formula(children[2], state, ordering)
+        if operator in ("or", "|"):
+            return left or evaluate_state_formula(children[2], state, ordering)
+        if operator == "-->":
+            return not left or evaluate_state_formula(children[2], state, ordering)
+        if operator == "<->":
+            return left == evaluate_state_formula(children[2], state, ordering)
+    raise ValueError("Formula '{}' is not a state formula.".format("".join(map(str, tree.children))))
+
+
+def reachability_goal(formula: Formula):
+    """
+    Reduces Formula to reachability of states satisfying a state formula.
+
+    Supported are state formulas (is a state satisfying the formula reachable?), CTL formulas E(F(phi)),
+    E(true U phi) and A(G(phi)) and PCTL formulas P>0 [F phi], P>0 [True U phi], P<=0 [F phi] and P>=1 [G phi].
+
+    :param formula: given Formula
+    :return: target state formula and flag whether the result has to be negated
+    """
+    tree = formula.data
+    children = [child for child in tree.children if str(child).strip() not in BRACKETS or isinstance(child, Tree)]
+
+    # CTL
+    if tree.data == "formula" and len(children) == 2 and str(children[0]) in ("E", "A"):
+        quantifier, path = str(children[0]), children[1]
+        path = [child for child in path.children if str(child).strip() not in BRACKETS or isinstance(child, Tree)]
+        if quantifier == "E" and is_future(path):
+            return path[-1], False
+        if quantifier == "A" and len(path) == 2 and str(path[0]) == "G":
+            return Tree("formula", ["~", path[1]]), True
+
+    # PCTL
+    if tree.data == "state_formula" and len(children) == 1 and isinstance(children[0], Tree) \
+            and children[0].data == "prob":
+        bound, _, path, _ = children[0].children
+        if bound.data == "pneq":
+            _, sign, number = bound.children
+            sign, number = sign.strip(), float(number)
+            path = path.children
+            if sign == ">" and number == 0 and is_future(path):
+                return path[-1], False
+            if sign == "<=" and number == 0 and is_future(path):
+                return path[-1], True
+            if sign == ">=" and number == 1 and str(path[0]).strip() == "G":
+                return Tree("state_formula", ["!", path[1]]), True
+        raise ValueError("Only qualitative PCTL formulas can be checked on the fly.")
+
+    # CTL uses state_formula for path formulas only
+    temporal = {"path_formula", "prob"} | ({"state_formula"} if tree.data == "formula" else set())
+    if any(node.data in temporal for node in tree.iter_subtrees()):
+        raise ValueError("Formula {} cannot be checked on the fly.".format(formula))
+    return tree, False
+
+
+def is_future(path: list) -> bool:
+    """
+    :param path: children of a path formula
+    :return: True if the path formula is F(phi) or true U phi
+    """
+    if len(path) == 2:
+        return str(path[0]).strip() == "F"
+    if len(path) == 3 and str(path[1]).strip() == "U":
+        first = path[0]
+        while isinstance(first, Tree) and len(first.children) == 1:
+            first = first.children[0]
+        return str(first).strip() in TRUE
+    return False
+
+
+class ReachabilityMonitor:
+    """
+    Observes States discovered during Transition system generating (see Scheduler.observe) and detects
+    the first one satisfying the target state formula of given Formula (see reachability_goal).
+
+    For each discovered State its parent and depth (distance from the initial State) is kept,
+    which allows to reconstruct a witness path. The "hell" state never satisfies the target.
+
+    With a depth bound, States at the bound are not expanded (see Scheduler.limit_depth). States are not
+    necessarily discovered by their shortest paths first (several workers or other strategies than BFS),
+    hence a shorter path found later is propagated to already discovered successors and States which
+    got within the bound are reopened for processing.
+    """
+    def __init__(self, formula: Formula, ordering, max_depth: int = None):
+        self.target, self.negated = reachability_goal(formula)
+        self.ordering = ordering
+        self.max_depth = max_depth
+
+        self.parents = dict()  # key -> key of parent (None for the initial State)
+        self.depths = dict()
+        self.children = dict()  # key -> keys of discovered successors
+        self.found = None  # key of the witness State
+        self.depth_limited = False
+        self.limited = set()  # keys of States which were not expanded because of the depth bound
+        self.reopened = []  # keys of limited States which got within the bound (see Scheduler.observe)
+
+    def satisfies(self, state) -> bool:
+        return not state.is_hell and evaluate_state_formula(self.target, state, self.ordering)
+
+    def start(self, key, state) -> bool:
+        """
+        Registers the initial State.
+
+        :param key: key of the State (State or its code)
+        :param state: the State
+        :return: True if the initial State is a witness
+        """
+        self.parents[key] = None
+        self.depths[key] = 0
+        if self.satisfies(state):
+            self.found = key
+        return self.found is not None
+
+    def discover(self, source, key, state) -> bool:
+        """
+        Registers discovered State (it can be discovered multiple times, the shortest path is kept).
+
+        :param source: key of the parent State
+        :param key: key of the State
+        :param state: the State
+        :return: True if the State is a witness
+        """
+        depth = self.depths[source] + 1
+        self.children.setdefault(source, set()).add(key)
+        if key in self.depths:
+            # shorter path found later (States are processed concurrently)
+            if depth < self.depths[key]:
+                self.parents[key], self.depths[key] = source, depth
+                self.relax(key)
+            return self.found is not None
+
+        self.parents[key] = source
+        self.depths[key] = depth
+        if self.found is None and self.satisfies(state):
+            self.found = key
+        return self.found is not None
+
+    def relax(self, key):
+        """
+        Propagates decreased depth of a State to its discovered successors,
+        limited States which got within the bound are reopened.
+
+        :param key: key of the State
+        """
+        stack = [key]
+        while stack:
+            key = stack.pop()
+            if key in self.limited and self.expandable(key):
+                self.limited.remove(key)
+                self.reopened.append(key)
+            for child in self.children.get(key, ()):
+                if self.depths[key] + 1 < self.depths[child]:
+                    self.parents[child], self.depths[child] = key, self.depths[key] + 1
+                    stack.append(child)
+
+    def expandable(self, key) -> bool:
+        """
+        :param key: key of a State
+        :return: True if successors of the State are within the depth bound
+        """
+        return self.max_depth is None or self.depths[key] < self.max_depth
+
+    def limit(self, key):
+        """
+        Records State which is not expanded because of the depth bound.
+
+        :param key: key of the State
+        """
+        self.limited.add(key)
+        self.depth_limited = True
+
+    def path(self, key) -> list:
+        """
+        :param key: key of a State
+        :return: keys of States on the path from the initial State to the given one
+        """
+        path = []
+        while key is not None:
+            path.append(key)
+            key = self.parents[key]
+        return path[::-1]
+
+    def result(self, ts):
+        """
+        Decides the property after the generating is over.
+
+        :param ts: generated (partial) TransitionSystem
+        :return: True/False if the property was decided, None otherwise (limits were reached)
+        """
+        if self.found is not None:
+            reached = True
+        elif not ts.unprocessed:
+            reached = False
+        else:
+            return None
+        return reached != self.negated
@@ -1,6 +1,5 @@
 import collections
 import itertools
-from copy import deepcopy
 
 from eBCSgen.Core.Atomic import AtomicAgent
 
@@ -173,7 +172,7 @@ def align_agents(ordered, to_align):
         return [choices]
     for agent in list(to_align):
         if ordered[0].compatible(agent):
-            new_to_align = deepcopy(to_align)
+            new_to_align = collections.Counter(to_align)
             new_to_align[agent] -= 1
             for branch in align_agents(ordered[1:], +new_to_align):
                 choices.append([agent] + branch)
@@ -1,10 +1,7 @@
 import collections
 import multiprocessing
-import random
-import time
 import numpy as np
 from lark import Tree
-import pandas as pd
 import copy
 from sortedcontainers import SortedList
 import libsbml
@@ -16,9 +13,11 @@ from eBCSgen.Core.Rate import Rate
 from eBCSgen.Core.Side import Side
 from eBCSgen.TS.TransitionSystem import TransitionSystem
 from eBCSgen.TS.State import State, Memory, Multiset
-from eBCSgen.TS.TSworker import TSworker
-from eBCSgen.TS.VectorModel import VectorModel, handle_number_of_threads
+from eBCSgen.TS.Frontier import Frontier
+from eBCSgen.TS.Scheduler import Scheduler
+from eBCSgen.TS.VectorModel import VectorModel
 from eBCSgen.Export.ModelSBML import ModelSBML
+from eBCSgen.Simulation.NetworkFree import NetworkFreeSimulator
 
 
 class Model:
@@ -95,7 +94,7 @@ class Model:
         unique_complexes |= set(self.init)
         return SortedList(unique_complexes)
 
-    def to_vector_model(self, bound: int = None) -> VectorModel:
+    def to_vector_model(self, bound: int = None, symbolic=()) -> VectorModel:
         """
         Creates vector representation of the model.
 
@@ -103,21 +102,23 @@ class Model:
         initial state are transformed to vector representation.
 
         :param bound: given bound
+        :param symbolic: params which are kept symbolic in rates even if they are defined
         :return: VectorModel representation of the model
         """
+        definitions = {param: value for param, value in self.definitions.items() if param not in symbolic}
         ordering = self.create_ordering()
         reactions = set()
 
         for rule in self.rules:
             rule_copy = copy.deepcopy(rule)
-            rule_copy.rate_to_vector(ordering, self.definitions)
+            rule_copy.rate_to_vector(ordering, definitions)
             reactions |= rule_copy.create_reactions(self.atomic_signature, self.structure_signature)
 
         init = Side(self.init.elements()).to_vector(ordering)
         vector_reactions = set()
 
         for reaction in reactions:
-            vector_reactions.add(reaction.to_vector(ordering, self.definitions))
+            vector_reactions.add(reaction.to_vector(ordering, definitions))
 
         if type(self.regulation) == Conditional:
             regulation = {k: Side(v).to_vector(ordering) for k, v in self.regulation.regulation.items()}
@@ -173,72 +174,55 @@ class Model:
         """
         Direct simulation method using Network-free Gillespie method.
 
+        Matches and rates of rules are maintained incrementally (see NetworkFreeSimulator),
+        only rules affected by complexes changed in the last step are re-evaluated.
+        The bound of amounts of complexes is estimated from the rules and the initial state.
+
         :param max_time: maximal simulation time
         :return: generated dataframe containing simulated time series
         """
         memory = 0 if not self.regulation else self.regulation.memory
-        state = State(Multiset(self.init), Memory(memory))
-        
-        for rule in self.rules:
-            # precompute complexes for each rule
-            rule.lhs, rule.rhs = rule.create_complexes()
-            rule.rate_agents, _ = rule.rate.get_params_and_agents()
+        simulator = NetworkFreeSimulator(self.rules, self.definitions, self.regulation)
+        return simulator.simulate(self.init, max_time, memory)
+
+    def parameter_scan(self, values: dict, max_time: float, bound: int = None, **options):
+        """
+        Simulates the model for all combinations of given values of params.
+
+        The model is vectorized only once, the scanned params are kept symbolic in the rates
+        (see VectorModel.parameter_scan).
+
+        :param values: dict param -> value or iterable of values
+        :param max_time: end time of simulation
+        :param bound: given bound
+        :param options: options of VectorModel.parameter_scan (e.g. simulation, volume, runs, workers)
+        :return: DataFrame with columns params, times, agent and value
+        """
+        unknown = set(values) - self.params - set(self.definitions)
+        if unknown:
+            raise ValueError("Params {} are not used in the model.".format(", ".join(sorted(unknown))))
 
-        time_series = dict()
-        collected_agents = set(state.content.value)
-        time = 0.0
-        time_series[time] = state
-        bound = self.compute_bound()
-        while time < max_time:
-            candidate_rules = pd.DataFrame(data=[(rule,
-                                                  rule.evaluate_rate(state, self.definitions),
-                                                  rule.match(state)) for rule in self.rules],
-                                           columns=["rule", "rate", "match"])
-
-            # drop rules which cannot be actually used (do not pass stoichiometry check)
-            candidate_rules = candidate_rules.dropna()
-
-            if self.regulation:
-                rules = {item: None for item in candidate_rules['rule']}
-                applicable_rules = self.regulation.filter(state, rules)
-                candidate_rules = candidate_rules[candidate_rules['rule'].isin(applicable_rules)]
-
-            if not candidate_rules.empty:
-                rates_sum = candidate_rules['rate'].sum()
-                sorted_candidates = candidate_rules.sort_values(by=["rate"])
-                sorted_candidates["cumsum"] = sorted_candidates["rate"].cumsum()
-
-                # pick random rule based on rates
-                rand_number = rates_sum * random.random()
-                sorted_candidates.drop(sorted_candidates[sorted_candidates["cumsum"] < rand_number].index, inplace=True)
-
-                # apply chosen rule to matched agents
-                match = sorted_candidates.iloc[0]["match"]
-                rule = sorted_candidates.iloc[0]["rule"]
-                produced_agents = rule.replace(match)
-
-                # update state based on match & replace operation
-                match = rule.reconstruct_complexes_from_match(match)
-                state = state.update_state(match, produced_agents, rule.label, bound)
-            else:
-                rates_sum = random.uniform(0.5, 0.9)
-
-            # update time
-            time += random.expovariate(rates_sum)
-            collected_agents = collected_agents.union(set(state.content.value))
-            time_series[time] = state
-
-        # create pandas DataFrame
-        ordered_agents = list(collected_agents)
-        header = list(map(str, ordered_agents))
-        df = pd.DataFrame(columns=header)
-        for time in time_series:
-            vector = [time_series[time].content.value[agent] for agent in ordered_agents]
-            df.loc[time] = vector
-
-        df.index.name = 'times'
-        df.reset_index(inplace=True)
-        return df
+        vector_model = self.to_vector_model(bound, symbolic=values)
+        return vector_model.parameter_scan(values, max_time, **options)
+
+    def parameter_continuation(self, param: str, values, volume: float, bound: int = None):
+        """
+        Follows the steady state of the ODE semantics for a sequence of values of a defined param.
+
+        The model is vectorized only once, the param is kept symbolic in the rates
+        (see VectorModel.parameter_continuation).
+
+        :param param: name of a param from definitions
+        :param values: sequence of values of the param
+        :param volume: volume of the system
+        :param bound: given bound
+        :return: DataFrame with columns param, steady concentrations of agents and stable
+        """
+        if param not in self.definitions:
+            raise ValueError("Param {} is not defined in the model.".format(param))
+
+        vector_model = self.to_vector_model(bound, symbolic=(param,))
+        return vector_model.parameter_continuation(param, values, volume)
 
     def compute_bound(self):
         """
@@ -251,13 +235,16 @@ class Model:
             bound = max(bound, max(rule.lhs.most_frequent(), rule.rhs.most_frequent()))
         return max(bound, Side(self.init).most_frequent())
     
-    def generate_direct_transition_system(self, max_time: float = np.inf, max_size: float = np.inf, bound=None):
+    def generate_direct_transition_system(self, max_time: float = np.inf, max_size: float = np.inf, bound=None,
+                                          strategy: str = "bfs", key=None):
         """
         Generates transition system using direct rule firing.
 
         :param max_time: max time for TS generating before interrupting
         :param max_size: max allowed size of TS before interrupting
         :param bound: bound for individual elements
+        :param strategy: frontier strategy - "bfs", "dfs" or "priority" (see Frontier)
+        :param key: function State -> comparable value used by "priority" strategy (lowest first)
         :return: generated transitions system
         """
 
@@ -272,31 +259,11 @@ class Model:
         ts = TransitionSystem(bound=bound)
         memory = 0 if not self.regulation else self.regulation.memory
         ts.init = State(Multiset(self.init), Memory(memory))
-        ts.unprocessed = {ts.init}
+        ts.unprocessed = Frontier([ts.init], strategy, key)
         ts.unique_complexes.update(set(ts.init.content.value))
 
-        workers = [TSworker(ts, self.rules, self.definitions, self.regulation)
-                   for _ in range(multiprocessing.cpu_count())]
-        for worker in workers:
-            worker.start()
-
-        workers[0].work.set()
-        start_time = time.time()
-
-        try:
-            while any([worker.work.is_set() for worker in workers]) \
-                    and time.time() - start_time < max_time \
-                    and len(ts.states) < max_size:
-                handle_number_of_threads(len(ts.unprocessed), workers)
-                time.sleep(1)
-        except (KeyboardInterrupt, EOFError) as e:
-            pass
-
-        for worker in workers:
-            worker.join()
-
-        while any([worker.is_alive() for worker in workers]):
-            time.sleep(1)
+        scheduler = Scheduler(ts, max_time, max_size)
+        scheduler.run(self.rules, self.definitions, self.regulation, multiprocessing.cpu_count())
 
         return ts
     
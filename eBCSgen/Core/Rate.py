@@ -3,7 +3,7 @@ import sympy
 from lark import Transformer, Tree, Token
 from sortedcontainers import SortedList
 
-from eBCSgen.TS.State import Vector
+from eBCSgen.TS.State import Vector, State, Memory
 
 STATIC_MATH = """<kineticLaw><math xmlns="http://www.w3.org/1998/Math/MathML"><apply>{}</apply></math></kineticLaw>"""
 
@@ -63,6 +63,34 @@ class Rate:
         except TypeError:
             return None
 
+    def compile(self) -> 'CompiledRate':
+        """
+        Compiles vectorized rate to a function of the state vector (see CompiledRate).
+
+        Occurrences of agents are replaced by sums of corresponding components y[i] of the state vector.
+
+        :return: CompiledRate
+        """
+        transformer = IndexedAgents()
+        expression = transformer.transform(self.expression)
+        expression = sympy.sympify("".join(tree_to_string(expression)), locals=transformer.locals)
+        return CompiledRate(self, expression)
+
+    def compile_direct(self, agents: list, params: dict) -> 'CompiledRate':
+        """
+        Compiles rate of a rule to a function of amounts of given agents (used in rates of the direct approach).
+
+        Occurrences of the i-th agent are replaced by component y[i] and params by their values.
+
+        :param agents: list of agents (Complex objects) used in rates
+        :param params: mapping of params to its value
+        :return: CompiledRate
+        """
+        transformer = DirectEvaluater({agent: "y[{}]".format(i) for i, agent in enumerate(agents)}, params)
+        expression = transformer.transform(self.expression)
+        expression = sympy.sympify("".join(tree_to_string(expression)), locals={str(STATE_VECTOR): STATE_VECTOR})
+        return CompiledRate(self, expression)
+
     def to_symbolic(self):
         """
         Translates rate from vector representation to symbolic one
@@ -133,6 +161,82 @@ class Rate:
 
 
 
+class CompiledRate:
+    """
+    Rate compiled once to a numeric callable over the state vector.
+
+    The rate is kept as a sympy expression over components y[i] of the state vector. If there are no undefined
+    params, the expression is lambdified to a numpy function, otherwise the symbolic evaluation of the original
+    Rate is used as a fallback.
+    """
+    def __init__(self, rate: Rate, expression):
+        self.rate = rate
+        self.expression = expression
+        self.params = {str(symbol) for symbol in expression.atoms(sympy.Symbol)} - {str(STATE_VECTOR)}
+        self.function = None
+        self._lambdify()
+
+    def __getstate__(self):
+        # lambdified functions cannot be pickled (e.g. for worker processes)
+        state = self.__dict__.copy()
+        state['function'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lambdify()
+
+    def __str__(self):
+        return str(self.expression)
+
+    def __repr__(self):
+        return str(self)
+
+    def _lambdify(self):
+        if not self.params:
+            self.function = sympy.lambdify([STATE_VECTOR], self.expression, "numpy")
+
+    @property
+    def is_symbolic(self) -> bool:
+        return self.function is None
+
+    @property
+    def dependencies(self) -> set:
+        """
+        :return: indices of state vector components the rate depends on
+        """
+        return {int(indexed.indices[0]) for indexed in self.expression.atoms(sympy.Indexed)}
+
+    def __call__(self, values: np.array):
+        """
+        Evaluates the rate in given state vector.
+
+        If the result is nan, None is returned instead.
+
+        :param values: state vector
+        :return: float value (Sympy object for parametric rates)
+        """
+        if self.is_symbolic:
+            return self.rate.evaluate(State(Vector(values), Memory(0)))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            value = float(self.function(values))
+        return None if np.isnan(value) else value
+
+    def evaluate_batch(self, rows: np.array) -> np.array:
+        """
+        Evaluates numeric rate in a batch of state vectors at once (nan stands for undefined value).
+
+        :param rows: 2D array of state vectors
+        :return: array of values
+        """
+        with np.errstate(divide="ignore", invalid="ignore"):
+            values = self.function(rows.T)
+        return np.broadcast_to(np.asarray(values, dtype=float), (len(rows),))
+
+
+STATE_VECTOR = sympy.IndexedBase("y")
+
+
 # Transformers for Tree
 class ContextReducer(Transformer):
     def agent(self, matches):
@@ -145,6 +249,23 @@ class SymbolicAgents(Transformer):
         return Tree("agent", [vector])
 
 
+class IndexedAgents(Transformer):
+    def __init__(self):
+        super(IndexedAgents, self).__init__()
+        self.locals = {str(STATE_VECTOR): STATE_VECTOR}
+
+    def agent(self, vector):
+        values = vector[0].value
+        terms = ["y[{}]".format(i) if values[i] == 1 else "{}*y[{}]".format(values[i], i)
+                 for i in range(len(values)) if values[i] != 0]
+        return Tree("agent", ["(" + (" + ".join(terms) if terms else "0") + ")"])
+
+    def param(self, matches):
+        name = str(matches[0])
+        self.locals[name] = sympy.Symbol(name)
+        return name
+
+
 class Vectorizer(Transformer):
     def __init__(self, ordering, definitions):
         super(Vectorizer, self).__init__()
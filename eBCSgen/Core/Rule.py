@@ -1,4 +1,5 @@
 import collections
+import functools
 import itertools
 import random
 from copy import copy, deepcopy
@@ -9,6 +10,8 @@ from eBCSgen.Core.Side import Side
 from eBCSgen.Core.Reaction import Reaction
 from eBCSgen.TS.State import Multiset
 
+ALIGNMENT_CACHE_SIZE = 2 ** 16
+
 
 def column(lst, index):
     return tuple(map(lambda x: x[index], lst))
@@ -252,20 +255,41 @@ class Rule:
         """
         Find all possible matches of the rule to given state.
 
+        A single random match is drawn without enumerating all of them (see sample_match).
+
         :param state: given state
         :param all: bool to indicate if choose one matching randomly or return all of them
         :return: random match/all matches
         """
-        state = deepcopy(state.content.value)
-        matches = find_all_matches(self.lhs.agents, state)
+        if not all:
+            return self.sample_match(state)
+
+        matches = find_all_matches(self.lhs.agents, +state.content.value)
         matches = [sum(match, []) for match in matches]
 
         if len(matches) == 0:
             return None
-        if not all:
-            return random.choice(matches)
         return matches
 
+    def count_matches(self, state) -> int:
+        """
+        Counts matches of the rule to given state (without enumerating them).
+
+        :param state: given state
+        :return: number of matches (as given by match with all=True)
+        """
+        return count_matches(self.lhs.agents, +state.content.value)
+
+    def sample_match(self, state, rng=random):
+        """
+        Draws a match of the rule to given state uniformly at random (without enumerating all of them).
+
+        :param state: given state
+        :param rng: source of randomness providing randrange and choice
+        :return: random match (None if there is no match)
+        """
+        return sample_match(self.lhs.agents, +state.content.value, rng)
+
     def replace(self, aligned_match):
         """
         Apply rule to chosen match.
@@ -378,10 +402,92 @@ def find_all_matches(lhs_agents, state):
 
     lhs_complex = lhs_agents[0]
     for candidate in list(state):
-        if lhs_complex.compatible(candidate):
-            state[candidate] -= 1
-            aligns = candidate.align_match(lhs_complex)
-            for branch in find_all_matches(lhs_agents[1:], deepcopy(+state)):
+        aligns = alignments(candidate, lhs_complex)
+        if aligns:
+            remaining = collections.Counter(state)
+            remaining[candidate] -= 1
+            for branch in find_all_matches(lhs_agents[1:], +remaining):
                 for align in aligns:
-                    choices.append([align] + branch)
+                    choices.append([list(align)] + branch)
     return choices
+
+
+@functools.lru_cache(maxsize=ALIGNMENT_CACHE_SIZE)
+def alignments(candidate, lhs_complex) -> tuple:
+    """
+    Cached alignments of a state complex to a LHS complex (see Complex.align_match).
+
+    :param candidate: Complex from the state
+    :param lhs_complex: Complex from LHS of a rule
+    :return: tuple of alignments (empty if the complexes are not compatible)
+    """
+    if not lhs_complex.compatible(candidate):
+        return ()
+    return tuple(map(tuple, candidate.align_match(lhs_complex)))
+
+
+def count_matches(lhs_agents, state, start=0, align=alignments) -> int:
+    """
+    Counts matches of LHS complexes to given state, i.e. the number of candidates produced by find_all_matches.
+
+    Each LHS complex is matched to a complex present in the state, the product of the numbers of alignments
+    is summed over all such assignments.
+
+    :param lhs_agents: given LHS of a rule
+    :param state: Counter of complexes (temporarily modified, restored on return)
+    :param start: index of the first LHS complex to be matched
+    :param align: function (state complex, LHS complex) -> alignments (keys of the state can be e.g. codes
+        of complexes if the function resolves them)
+    :return: number of matches
+    """
+    if start == len(lhs_agents):
+        return 1
+
+    lhs_complex = lhs_agents[start]
+    total = 0
+    for candidate in state:
+        if state[candidate] <= 0:
+            continue
+        aligns = align(candidate, lhs_complex)
+        if aligns:
+            state[candidate] -= 1
+            total += len(aligns) * count_matches(lhs_agents, state, start + 1, align)
+            state[candidate] += 1
+    return total
+
+
+def sample_match(lhs_agents, state, rng=random, align=alignments):
+    """
+    Draws one of the matches of LHS complexes to given state uniformly at random.
+
+    The complexes are chosen one by one, each candidate with weight given by the number of matches
+    it is part of (see count_matches), hence no other matches are enumerated.
+
+    :param lhs_agents: given LHS of a rule
+    :param state: Counter of complexes (modified)
+    :param rng: source of randomness providing randrange and choice
+    :param align: function (state complex, LHS complex) -> alignments (see count_matches)
+    :return: match as a list of aligned agents (None if there is no match)
+    """
+    match = []
+    for start, lhs_complex in enumerate(lhs_agents):
+        weights = []
+        for candidate in state:
+            aligns = align(candidate, lhs_complex) if state[candidate] > 0 else ()
+            if aligns:
+                state[candidate] -= 1
+                weights.append((candidate, len(aligns) * count_matches(lhs_agents, state, start + 1, align)))
+                state[candidate] += 1
+
+        total = sum(weight for _, weight in weights)
+        if total == 0:
+            return None
+        threshold = rng.randrange(total)
+        for candidate, weight in weights:
+            if threshold < weight:
+                break
+            threshold -= weight
+
+        state[candidate] -= 1
+        match += list(rng.choice(align(candidate, lhs_complex)))
+    return match
@@ -48,6 +48,7 @@ def load_TS_from_json(json_file: str) -> TransitionSystem:
         ts.init = data['initial']
         if 'parameters' in data:
             ts.params = data['parameters']
+        ts.reduction = data.get('reduction')
 
         ts.unprocessed = {State(Vector(np.array(eval(state))), Memory(0)) for state in data.get('unprocessed', list())}
         ts.states = set(ts.states_encoding.values()) - ts.unprocessed
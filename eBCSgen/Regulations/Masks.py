@@ -0,0 +1,130 @@
+from collections import OrderedDict
+
+import numpy as np
+
+from eBCSgen.Regulations.ConcurrentFree import ConcurrentFree
+from eBCSgen.Regulations.Conditional import VectorConditional
+from eBCSgen.Regulations.Ordered import Ordered
+from eBCSgen.Regulations.Programmed import Programmed
+from eBCSgen.Regulations.Regular import Regular
+from eBCSgen.TS.State import State, Vector, Memory
+
+MASK_CACHE_SIZE = 10000  # masks of regular regulation kept for the most recent histories
+
+
+class RegulationMasks:
+    """
+    Regulation of vector reactions (given in the order of a Stoichiometry) as boolean masks of allowed reactions.
+
+    Programmed and ordered regulations depend only on the last label, their masks are precomputed for each label
+    (a reaction is allowed by a mask and a boolean operation). Masks of regular regulation are computed
+    by partial matching of the history extended by each label (see Regular.filter) and kept in a bounded
+    LRU cache keyed by the history, trajectories of the same model typically share their histories.
+
+    Conditional regulation is evaluated on the state vector at once using a matrix of forbidden contexts,
+    concurrent-free regulation removes a single reaction of a lower priority label if reactions of both labels
+    are candidates (as ConcurrentFree.filter does). Other regulations are evaluated by their filter
+    in every step. The memory of a trajectory is kept as a tuple of labels.
+    """
+    def __init__(self, regulation, reactions: list):
+        self.regulation = regulation
+        self.memory = regulation.memory
+        self.reactions = reactions
+
+        labels = list(dict.fromkeys(reaction.label for reaction in reactions))
+        self.labels = {label: code for code, label in enumerate(labels)}
+        self.codes = np.array([self.labels[reaction.label] for reaction in reactions], dtype=int)
+        # label code -> boolean array of reactions with the label
+        self.label_reactions = [self.codes == code for code in range(len(labels))]
+        self.masks = OrderedDict()  # memory -> boolean array of allowed reactions
+
+        if isinstance(regulation, VectorConditional):
+            # reaction x agent -> agent is in the forbidden context of the reaction
+            dimension = len(reactions[0].source.content) if reactions else 0
+            self.contexts = np.zeros((len(reactions), dimension), dtype=bool)
+            for index, reaction in enumerate(reactions):
+                if reaction.label in regulation.regulation:
+                    self.contexts[index] = regulation.regulation[reaction.label].content.value > 0
+        elif isinstance(regulation, ConcurrentFree):
+            self.priorities = [(self.label_reactions[self.labels[p_label]],
+                                self.label_reactions[self.labels[non_p_label]])
+                               for p_label, non_p_label in regulation.regulation
+                               if p_label in self.labels and non_p_label in self.labels]
+        elif isinstance(regulation, (Programmed, Ordered)):
+            self.memory_mask(())
+            for label in labels:
+                self.memory_mask((label,))
+
+    @property
+    def initial(self) -> tuple:
+        """
+        :return: empty memory
+        """
+        return ()
+
+    def update(self, memory: tuple, reaction: int) -> tuple:
+        """
+        Updates memory by a fired reaction (see Memory.update_memory).
+
+        :param memory: memory of the trajectory
+        :param reaction: index of the fired reaction
+        :return: updated memory
+        """
+        label = self.reactions[reaction].label
+        if self.memory == 1:
+            return label,
+        if self.memory == 2:
+            return memory + (label,)
+        return memory
+
+    def memory_mask(self, memory) -> np.array:
+        """
+        Mask of a memory for regulations which do not depend on the state vector.
+
+        :param memory: memory of the trajectory
+        :return: boolean array of reactions allowed by the memory
+        """
+        if memory in self.masks:
+            self.masks.move_to_end(memory)
+            return self.masks[memory]
+        representatives = {self.reactions[np.flatnonzero(reactions)[0]]: None for reactions in self.label_reactions}
+        filtered = self.regulation.filter(self.state(None, memory), representatives)
+        mask = np.array([reaction in filtered for reaction in representatives], dtype=bool)[self.codes]
+        self.masks[memory] = mask
+        if len(self.masks) > MASK_CACHE_SIZE:
+            self.masks.popitem(last=False)
+        return mask
+
+    def state(self, values: np.array, memory: tuple) -> State:
+        """
+        :param values: state vector
+        :param memory: tuple of labels
+        :return: State passed to filter of the regulation
+        """
+        history = Memory(self.memory)
+        history.history = list(memory)
+        return State(Vector(values), history)
+
+    def allowed(self, values: np.array, memory, candidates: np.array) -> np.array:
+        """
+        Filters candidate reactions in given state.
+
+        :param values: state vector
+        :param memory: memory of the trajectory
+        :param candidates: boolean array of reactions which can happen
+        :return: boolean array of candidates allowed by the regulation
+        """
+        if isinstance(self.regulation, VectorConditional):
+            return candidates & ~(self.contexts & (values > 0)).any(axis=1)
+        if isinstance(self.regulation, ConcurrentFree):
+            candidates = candidates.copy()
+            for p_reactions, non_p_reactions in self.priorities:
+                non_p_candidates = np.flatnonzero(candidates & non_p_reactions)
+                if candidates[p_reactions].any() and len(non_p_candidates):
+                    candidates[non_p_candidates[0]] = False
+            return candidates
+        if isinstance(self.regulation, (Programmed, Ordered, Regular)):
+            return candidates & self.memory_mask(memory)
+        filtered = self.regulation.filter(self.state(values, memory),
+                                          {self.reactions[index]: None for index in np.flatnonzero(candidates)})
+        return np.array([reaction in filtered for reaction in self.reactions], dtype=bool) & candidates
@@ -0,0 +1,70 @@
+import multiprocessing
+import random
+
+import numpy as np
+
+ENSEMBLE_CHUNK_SIZE = 8  # number of runs sent to a worker process at once
+
+
+def run_streams(seed, runs: int) -> list:
+    """
+    Derives independent random streams of individual runs from a single seed.
+
+    The streams are spawned from numpy SeedSequence, hence the i-th run always gets the same stream
+    regardless of the number of runs executed in parallel.
+
+    :param seed: user seed (None for fresh entropy)
+    :param runs: number of runs
+    :return: list of random.Random instances
+    """
+    children = np.random.SeedSequence(seed).spawn(runs)
+    return [random.Random(int.from_bytes(child.generate_state(4).tobytes(), "little")) for child in children]
+
+
+def simulate_ensemble(engine, init: np.array, max_time: float, runs: int, seed=None, workers: int = 1):
+    """
+    Simulates independent runs of given SSA engine, possibly in a pool of worker processes.
+
+    Each run uses its own random stream (see run_streams) and the trajectories are yielded in the order
+    of runs, therefore the result is reproducible for a given seed regardless of the number of workers.
+
+    :param engine: SSA engine (see SSA_METHODS)
+    :param init: initial state vector
+    :param max_time: time when simulation ends
+    :param runs: number of runs
+    :param seed: user seed (None for fresh entropy)
+    :param workers: number of worker processes (runs are executed in the calling process if 1)
+    :return: generator of simulated Trajectories
+    """
+    streams = run_streams(seed, runs)
+    if workers <= 1:
+        for rng in streams:
+            yield engine.simulate(init, max_time, rng)
+        return
+
+    with multiprocessing.Pool(workers, initializer=init_ensemble_worker, initargs=(engine, init, max_time)) as pool:
+        for trajectory in pool.imap(simulate_run, streams, chunksize=ENSEMBLE_CHUNK_SIZE):
+            yield trajectory
+
+
+# context of the worker processes, set once by the pool initializer
+_ensemble_context = None
+
+
+def init_ensemble_worker(engine, init, max_time):
+    """
+    Initializer of worker processes (see simulate_ensemble).
+    """
+    global _ensemble_context
+    _ensemble_context = (engine, init, max_time)
+
+
+def simulate_run(rng):
+    """
+    Simulates a single run in a worker process.
+
+    :param rng: random stream of the run
+    :return: simulated Trajectory
+    """
+    engine, init, max_time = _ensemble_context
+    return engine.simulate(init, max_time, rng).trimmed()
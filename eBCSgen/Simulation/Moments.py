@@ -0,0 +1,94 @@
+import numpy as np
+import sympy
+from scipy.integrate import solve_ivp
+
+from eBCSgen.Core.Rate import STATE_VECTOR
+
+CLOSURES = ("lna", "second_order")
+
+
+class MomentSystem:
+    """
+    Equations of means and covariances of amounts of agents of vector reactions given by their Stoichiometry.
+
+    With propensities a_r and change vectors v_r of the reactions, the means m and the covariance matrix C
+    evolve by
+        dm/dt = sum_r v_r a'_r,  dC/dt = J C + C J^T + sum_r v_r v_r^T a'_r,
+    where J is the Jacobian of sum_r v_r a_r(m). The linear noise approximation ("lna") uses a'_r = a_r(m),
+    the second-order moment closure ("second_order") corrects the propensities by the covariance,
+    a'_r = a_r(m) + 1/2 sum_ij d^2 a_r/dy_i dy_j (m) C_ij, which neglects the third central moments.
+    Both are exact for reactions with linear propensities, enabledness of reactions is not considered.
+
+    The gradients and Hessians of the propensities are derived symbolically and lambdified once,
+    means and covariances are integrated as a single ODE system.
+    """
+    def __init__(self, stoichiometry, closure: str = "lna"):
+        if closure not in CLOSURES:
+            raise ValueError("Unknown closure '{}', use one of {}.".format(closure, ", ".join(CLOSURES)))
+        for reaction in stoichiometry.reactions:
+            if reaction.compiled_rate is None or reaction.compiled_rate.is_symbolic:
+                raise ValueError("Moment equations require numeric rates, reaction {} has rate {}."
+                                 .format(reaction, reaction.rate))
+        self.stoichiometry = stoichiometry
+        self.closure = closure
+        self.species = stoichiometry.change.shape[1]
+        self.change = stoichiometry.change.astype(float)
+
+        expressions = [reaction.compiled_rate.expression for reaction in stoichiometry.reactions]
+        gradient, hessian = [], []
+        for row, reaction in enumerate(stoichiometry.reactions):
+            dependencies = sorted(reaction.compiled_rate.dependencies)
+            for i in dependencies:
+                derivative = sympy.diff(expressions[row], STATE_VECTOR[i])
+                gradient.append((row, i, derivative))
+                if closure == "second_order":
+                    for j in dependencies:
+                        hessian.append((row, i, j, sympy.diff(derivative, STATE_VECTOR[j])))
+
+        self.rates = sympy.lambdify([STATE_VECTOR], expressions, "numpy")
+        self.gradient_entries = np.array([entry[:2] for entry in gradient], dtype=int).reshape(-1, 2)
+        self.gradient = sympy.lambdify([STATE_VECTOR], [entry[2] for entry in gradient], "numpy")
+        self.hessian_entries = np.array([entry[:3] for entry in hessian], dtype=int).reshape(-1, 3)
+        self.hessian = sympy.lambdify([STATE_VECTOR], [entry[3] for entry in hessian], "numpy")
+
+    def rhs(self, t: float, z: np.array) -> np.array:
+        """
+        Right-hand side of the moment equations (in the argument order of solve_ivp).
+
+        :param t: time (the system is autonomous)
+        :param z: means followed by the flattened covariance matrix
+        :return: derivatives of the means and of the flattened covariance matrix
+        """
+        mean, covariance = z[:self.species], z[self.species:].reshape(self.species, self.species)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rates = np.array(self.rates(mean), dtype=float).reshape(-1)
+            derivatives = np.zeros((len(rates), self.species))
+            np.add.at(derivatives, tuple(self.gradient_entries.T),
+                      np.array(self.gradient(mean), dtype=float).reshape(-1))
+            if len(self.hessian_entries):
+                rows, i, j = self.hessian_entries.T
+                values = np.array(self.hessian(mean), dtype=float).reshape(-1)
+                np.add.at(rates, rows, values * covariance[i, j] / 2)
+
+        jacobian = self.change.T @ derivatives
+        d_mean = self.change.T @ rates
+        d_covariance = jacobian @ covariance + covariance @ jacobian.T + (self.change.T * rates) @ self.change
+        return np.concatenate([d_mean, d_covariance.ravel()])
+
+    def solve(self, init: np.array, times: np.array, method: str = "LSODA"):
+        """
+        Integrates the moment equations from a deterministic initial state (zero covariance).
+
+        :param init: initial state vector
+        :param times: sorted time points (starting by initial time)
+        :param method: method of scipy.integrate.solve_ivp
+        :return: 2D array of means (times x agents) and 3D array of covariance matrices
+        """
+        z_0 = np.concatenate([np.asarray(init, dtype=float), np.zeros(self.species ** 2)])
+        result = solve_ivp(self.rhs, (times[0], times[-1]), z_0, method=method, t_eval=times,
+                           rtol=1e-6, atol=1e-9)
+        if not result.success:
+            raise RuntimeError("Solver {} failed: {}".format(method, result.message))
+        z = result.y.T
+        covariance = z[:, self.species:].reshape(len(times), self.species, self.species)
+        return z[:, :self.species], (covariance + covariance.transpose(0, 2, 1)) / 2
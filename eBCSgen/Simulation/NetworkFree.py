@@ -0,0 +1,242 @@
+import collections
+import random
+from copy import copy
+
+import numpy as np
+import pandas as pd
+
+from eBCSgen.Core.Rule import alignments, count_matches, sample_match
+from eBCSgen.TS.State import State, Multiset, Memory
+
+
+class NetworkFreeSimulator:
+    """
+    Incremental network-free Gillespie simulation of rules acting directly on a multiset of Complexes.
+
+    Instead of matching all rules and evaluating all rates in every step, the simulator keeps
+      - amounts of agents used in rates (sums over compatible complexes of the state),
+      - rates of rules compiled to functions of these amounts (see Rate.compile_direct),
+      - numbers of matches of rules to the current state (see count_matches).
+    After a rule fires, only complexes it consumed and produced are processed: amounts of rate agents compatible
+    with them are updated and only rates reading these agents and match counts of rules whose LHS is compatible
+    with them are recomputed. The fired match is drawn uniformly without enumerating the others
+    (see sample_match).
+
+    Complexes are coded by integers when they first appear, at the same time their compatibility with rate agents
+    and alignments to LHS complexes of rules are computed. The state is then kept as a Counter of the codes.
+
+    Match counts of affected rules are recomputed by count_matches over the whole state, not updated
+    by the changed complexes only, the cost depends on the number of complexes of the state compatible
+    with the LHS of the rule.
+
+    If no bound of amounts of complexes is given, it is estimated from the complexes of the rules
+    and the initial multiset of each simulation (as Model.compute_bound).
+    """
+    def __init__(self, rules, definitions: dict, regulation=None, bound: int = None):
+        self.rules = list(rules)
+        self.regulation = regulation
+
+        for rule in self.rules:
+            rule.lhs, rule.rhs = rule.create_complexes()
+            rule.rate_agents, _ = rule.rate.get_params_and_agents()
+
+        self.bound = bound
+        self.rules_bound = max((max(rule.lhs.most_frequent(), rule.rhs.most_frequent()) for rule in self.rules),
+                               default=0)
+
+        self.agents = list(dict.fromkeys(agent for rule in self.rules for agent in rule.rate_agents))
+        self.rates = [rule.rate.compile_direct(self.agents, definitions) for rule in self.rules]
+        for rule, rate in zip(self.rules, self.rates):
+            if rate.is_symbolic:
+                raise ValueError("Network-free simulation requires numeric rates, rule {} has undefined params {}."
+                                 .format(rule, ", ".join(sorted(rate.params))))
+
+        # rate agent -> rules whose rate reads it
+        self.readers = [[] for _ in self.agents]
+        for index, rate in enumerate(self.rates):
+            for agent in rate.dependencies:
+                self.readers[agent].append(index)
+
+        # LHS complexes of rules identified by (rule, position)
+        self.lhs = [[(index, position) for position in range(len(rule.lhs.agents))]
+                    for index, rule in enumerate(self.rules)]
+
+        # filled when a complex first appears (see encode)
+        self.codes = dict()  # Complex -> code
+        self.complexes = []  # code -> Complex
+        self.compatible_agents = []  # code -> compatible rate agents
+        self.matching_rules = []  # code -> rules with compatible LHS complex
+        self.alignments = collections.defaultdict(dict)  # (rule, position) -> code -> alignments
+
+    def encode(self, complex) -> int:
+        """
+        Assigns a code to given complex, a newly seen complex is compared with rate agents and LHS complexes.
+
+        :param complex: given Complex
+        :return: code of the complex
+        """
+        code = self.codes.get(complex)
+        if code is None:
+            code = len(self.complexes)
+            self.codes[complex] = code
+            self.complexes.append(complex)
+            self.compatible_agents.append([i for i, agent in enumerate(self.agents) if agent.compatible(complex)])
+            matching = set()
+            for index, rule in enumerate(self.rules):
+                for position, lhs_complex in enumerate(rule.lhs.agents):
+                    aligns = alignments(complex, lhs_complex)
+                    if aligns:
+                        self.alignments[(index, position)][code] = aligns
+                        matching.add(index)
+            self.matching_rules.append(sorted(matching))
+        return code
+
+    def align(self, code: int, lhs: tuple) -> tuple:
+        """
+        :param code: code of a complex
+        :param lhs: LHS complex given as (rule, position)
+        :return: alignments of the complex to the LHS complex
+        """
+        return self.alignments[lhs].get(code, ())
+
+    def count_matches(self, index: int, state: collections.Counter) -> int:
+        """
+        :param index: index of a rule
+        :param state: Counter of codes of complexes
+        :return: number of matches of the rule (see Rule.count_matches)
+        """
+        return count_matches(self.lhs[index], state, align=self.align)
+
+    def evaluate_rate(self, index: int, amounts: np.array) -> float:
+        """
+        :param index: index of a rule
+        :param amounts: amounts of rate agents
+        :return: rate of the rule (nan if undefined)
+        """
+        value = self.rates[index](amounts)
+        return np.nan if value is None else value
+
+    def decode(self, state: collections.Counter, history: Memory) -> State:
+        """
+        :param state: Counter of codes of complexes
+        :param history: memory of the state
+        :return: the State with complexes
+        """
+        return State(Multiset(collections.Counter({self.complexes[code]: count for code, count in state.items()})),
+                     history)
+
+    def simulate(self, init: collections.Counter, max_time: float, memory: int = 0, rng=random) -> pd.DataFrame:
+        """
+        Simulates a single trajectory.
+
+        :param init: initial multiset of Complexes
+        :param max_time: time when simulation ends
+        :param memory: level of memory used by regulation
+        :param rng: source of randomness providing random, randrange, choice, uniform and expovariate
+        :return: DataFrame with column times and amounts of all complexes which appeared during simulation
+        """
+        bound = self.bound if self.bound is not None else max(self.rules_bound, max(init.values(), default=0))
+        state = collections.Counter()
+        history = Memory(memory)
+        changes = []  # (row, code, change)
+
+        amounts = np.zeros(len(self.agents))
+        for complex, count in (+init).items():
+            code = self.encode(complex)
+            state[code] += count
+            amounts[self.compatible_agents[code]] += count
+            changes.append((0, code, count))
+
+        rates = np.array([self.evaluate_rate(index, amounts) for index in range(len(self.rules))])
+        matches = [self.count_matches(index, state) for index in range(len(self.rules))]
+
+        time = 0.0
+        times = [time]
+        while time < max_time:
+            candidates = [index for index in range(len(self.rules)) if matches[index] and not np.isnan(rates[index])]
+            if self.regulation and candidates:
+                applicable = self.regulation.filter(self.decode(state, history),
+                                                    {self.rules[index]: None for index in candidates})
+                candidates = [index for index in candidates if self.rules[index] in applicable]
+
+            rates_sum = rates[candidates].sum() if candidates else 0
+            if rates_sum > 0:
+                # pick random rule based on rates
+                candidates = sorted(candidates, key=lambda index: rates[index])
+                cumsum = np.cumsum(rates[candidates])
+                chosen = candidates[min(np.searchsorted(cumsum, rates_sum * rng.random()), len(candidates) - 1)]
+                rule = self.rules[chosen]
+
+                match = sample_match(self.lhs[chosen], collections.Counter(state), rng, self.align)
+                delta = collections.Counter()
+                for complex, count in rule.replace(match).value.items():
+                    delta[self.encode(complex)] += count
+                for complex, count in rule.reconstruct_complexes_from_match(match).value.items():
+                    delta[self.encode(complex)] -= count
+
+                if any(state[code] + change > bound for code, change in delta.items()):
+                    # "hell" state
+                    delta = collections.Counter({code: -count for code, count in state.items()})
+                    history = Memory(0)
+                else:
+                    history = copy(history)
+                    history.update_memory(rule.label)
+
+                self.update(state, delta, amounts, rates, matches)
+                changes += [(len(times), code, change) for code, change in delta.items() if change]
+            else:
+                rates_sum = rng.uniform(0.5, 0.9)
+
+            time += rng.expovariate(rates_sum)
+            times.append(time)
+
+        return self.to_dataframe(times, changes)
+
+    def update(self, state: collections.Counter, delta: collections.Counter, amounts: np.array, rates: np.array,
+               matches: list):
+        """
+        Applies changes of complexes to the state and updates affected amounts, rates and match counts.
+
+        :param state: Counter of codes of complexes
+        :param delta: changes of amounts of the complexes (given by codes)
+        :param amounts: amounts of rate agents
+        :param rates: rates of rules
+        :param matches: match counts of rules
+        """
+        affected_rates, affected_matches = set(), set()
+        for code, change in delta.items():
+            if change == 0:
+                continue
+            state[code] += change
+            if state[code] <= 0:
+                del state[code]
+
+            agents = self.compatible_agents[code]
+            amounts[agents] += change
+            for agent in agents:
+                affected_rates.update(self.readers[agent])
+            affected_matches.update(self.matching_rules[code])
+
+        for index in affected_rates:
+            rates[index] = self.evaluate_rate(index, amounts)
+        for index in affected_matches:
+            matches[index] = self.count_matches(index, state)
+
+    def to_dataframe(self, times: list, changes: list) -> pd.DataFrame:
+        """
+        Creates DataFrame from recorded changes of complexes.
+
+        :param times: time points of the rows
+        :param changes: list of (row, code, change)
+        :return: DataFrame with column times (the last row is kept for repeated time points)
+        """
+        data = np.zeros((len(times), len(self.complexes)))
+        if changes:
+            rows, codes, values = map(np.array, zip(*changes))
+            np.add.at(data, (rows, codes), values)
+        df = pd.DataFrame(data=np.cumsum(data, axis=0), index=pd.Index(times),
+                          columns=list(map(str, self.complexes)))
+        df = df[~df.index.duplicated(keep='last')]
+        df.index.name = 'times'
+        df.reset_index(inplace=True)
+        return df
@@ -0,0 +1,212 @@
+import copy
+
+import numpy as np
+import sympy
+from scipy import sparse
+from scipy.integrate import odeint, solve_ivp
+
+from eBCSgen.Core.Rate import STATE_VECTOR
+
+SOLVERS = ("odeint", "auto", "LSODA", "BDF", "Radau", "RK45")
+IMPLICIT_SOLVERS = ("BDF", "Radau")
+STIFFNESS_THRESHOLD = 1000  # stiff if the fastest time scale fits this many times in the simulated time
+SPARSE_DIMENSION = 50  # implicit solvers get sparse Jacobian from this number of agents
+RMS_SOLVERS = ("BDF", "Radau", "RK45")  # solvers controlling RMS norm of the error (LSODA uses max norm)
+RTOL, ATOL = 1e-3, 1e-6  # default tolerances of solve_ivp
+
+
+class ODESystem:
+    """
+    Deterministic (mass action like) semantics of vector reactions given by their Stoichiometry.
+
+    The right-hand side is dy/dt = N^T r(y), where N is the change matrix of the reactions and r is a single
+    numpy function evaluating the compiled rates of all reactions at once (see VectorReaction.compile_rate).
+    The Jacobian N^T dr/dy is derived symbolically from the rates and compiled in the same way,
+    only derivatives by components the rates depend on are computed and the Jacobian is assembled
+    from them as a sparse matrix (see sparse_jacobian).
+
+    Rates can use given params as additional arguments. The system can be instantiated for a batch of their
+    values at once (see with_values), the state is then a concatenation of state vectors of the batch and
+    the Jacobian is block diagonal.
+    """
+    def __init__(self, stoichiometry, params=()):
+        self.stoichiometry = stoichiometry
+        self.params = list(params)
+        for reaction in stoichiometry.reactions:
+            if reaction.compiled_rate is None or not reaction.compiled_rate.params <= set(self.params):
+                raise ValueError("Deterministic simulation requires numeric rates, reaction {} has rate {}."
+                                 .format(reaction, reaction.rate))
+
+        self.species = stoichiometry.change.shape[1]
+        self.reaction_change = sparse.csr_matrix(stoichiometry.change.T.astype(float))
+
+        self.expressions = [reaction.compiled_rate.expression for reaction in stoichiometry.reactions]
+        entries, self.derivative_expressions = [], []
+        for row, reaction in enumerate(stoichiometry.reactions):
+            for column in sorted(reaction.compiled_rate.dependencies):
+                entries.append((row, column))
+                self.derivative_expressions.append(sympy.diff(self.expressions[row], STATE_VECTOR[column]))
+        self.rows = np.array([row for row, _ in entries], dtype=int)
+        self.columns = np.array([column for _, column in entries], dtype=int)
+
+        self.rates, self.derivatives = None, None
+        self._lambdify()
+
+        self.values, self.change = None, None
+        self._bind(np.zeros((1, len(self.params))))
+
+    def __getstate__(self):
+        # lambdified functions cannot be pickled (e.g. for worker processes)
+        state = self.__dict__.copy()
+        state['rates'], state['derivatives'] = None, None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lambdify()
+
+    def _lambdify(self):
+        arguments = [STATE_VECTOR] + [sympy.Symbol(param) for param in self.params]
+        self.rates = sympy.lambdify(arguments, self.expressions, "numpy")
+        self.derivatives = sympy.lambdify(arguments, self.derivative_expressions, "numpy")
+
+    def _bind(self, values: np.array):
+        self.values = values
+        self.change = sparse.kron(sparse.identity(self.batch), self.reaction_change, format="csr")
+
+    def with_values(self, values) -> 'ODESystem':
+        """
+        Creates the system for a batch of values of the params (the compiled functions are shared).
+
+        :param values: 2D array of values of the params (batch x params)
+        :return: batched ODESystem with state vectors of the batch concatenated
+        """
+        system = copy.copy(self)
+        system._bind(np.array(values, dtype=float).reshape(-1, len(self.params)))
+        return system
+
+    @property
+    def batch(self) -> int:
+        return len(self.values)
+
+    @property
+    def dimension(self) -> int:
+        return self.batch * self.species
+
+    def _evaluate(self, function, y: np.array, count: int) -> np.array:
+        """
+        :param function: lambdified list of expressions
+        :param y: concatenated state vectors of the batch
+        :param count: number of the expressions
+        :return: 2D array of values (expressions x batch)
+        """
+        with np.errstate(divide="ignore", invalid="ignore"):
+            values = function(y.reshape(self.batch, self.species).T, *self.values.T)
+            return np.array([np.broadcast_to(np.asarray(value, dtype=float), (self.batch,))
+                             for value in values]).reshape(count, self.batch)
+
+    def rhs(self, y: np.array, t: float = 0.0) -> np.array:
+        """
+        Right-hand side of the ODE system (in the argument order of odeint).
+
+        :param y: vector of concentrations
+        :param t: time (the system is autonomous)
+        :return: derivatives of the concentrations
+        """
+        rates = self._evaluate(self.rates, y, len(self.expressions))
+        return (self.reaction_change @ rates).T.ravel()
+
+    def sparse_jacobian(self, y: np.array, t: float = 0.0) -> sparse.csc_matrix:
+        """
+        Jacobian matrix of the right-hand side as a sparse matrix.
+
+        :param y: vector of concentrations
+        :param t: time (the system is autonomous)
+        :return: sparse matrix d(rhs_i)/d(y_j)
+        """
+        values = self._evaluate(self.derivatives, y, len(self.derivative_expressions))
+        shift = np.arange(self.batch)
+        rows = (self.rows[:, np.newaxis] + shift * len(self.expressions)).ravel()
+        columns = (self.columns[:, np.newaxis] + shift * self.species).ravel()
+        derivatives = sparse.csr_matrix((values.ravel(), (rows, columns)),
+                                        shape=(self.change.shape[1], self.dimension))
+        return sparse.csc_matrix(self.change @ derivatives)
+
+    def jacobian(self, y: np.array, t: float = 0.0) -> np.array:
+        """
+        Jacobian matrix of the right-hand side (in the argument order of odeint).
+
+        :param y: vector of concentrations
+        :param t: time (the system is autonomous)
+        :return: 2D array d(rhs_i)/d(y_j)
+        """
+        return self.sparse_jacobian(y).toarray()
+
+    def is_stiff(self, y: np.array, span: float) -> bool:
+        """
+        Detects stiffness from eigenvalues of the Jacobian in given point (blocks of a batch separately).
+
+        The system is considered stiff if the fastest decaying mode is faster than the simulated time
+        by more than STIFFNESS_THRESHOLD, then explicit methods are limited by stability rather than accuracy.
+
+        :param y: vector of concentrations
+        :param span: length of the simulated time
+        :return: True if the system is stiff
+        """
+        if self.dimension == 0:
+            return False
+        jacobian = self.sparse_jacobian(y)
+        for start in range(0, self.dimension, self.species):
+            block = jacobian[start:start + self.species, start:start + self.species].toarray()
+            eigenvalues = np.linalg.eigvals(block)
+            decay = -eigenvalues.real[np.isfinite(eigenvalues.real)]
+            if len(decay) and decay.max() * span > STIFFNESS_THRESHOLD:
+                return True
+        return False
+
+    def solve(self, y_0: np.array, times: np.array, solver: str = "odeint"):
+        """
+        Integrates the system and reports statistics of the solver.
+
+        The "odeint" solver is LSODA of ODEPACK with the analytic Jacobian, the other solvers are methods
+        of scipy.integrate.solve_ivp. The implicit ones (BDF, Radau) get the Jacobian as a sparse matrix
+        for models with at least SPARSE_DIMENSION agents. The solver "auto" chooses BDF for stiff systems
+        (see is_stiff) and RK45 otherwise.
+
+        Solvers controlling the RMS norm of the error over all components would let the error of a single set
+        of a batch grow by the factor sqrt(batch), their tolerances are hence divided by this factor.
+
+        :param y_0: initial concentrations
+        :param times: increasing time points where the solution is reported (starting by initial time)
+        :param solver: one of SOLVERS
+        :return: 2D array of solution (times x agents) and dict of solver statistics
+        """
+        if solver not in SOLVERS:
+            raise ValueError("Unknown solver '{}', use one of {}.".format(solver, ", ".join(SOLVERS)))
+        if solver == "auto":
+            solver = "BDF" if self.is_stiff(y_0, times[-1] - times[0]) else "RK45"
+
+        if solver == "odeint":
+            y, info = odeint(self.rhs, y_0, times, Dfun=self.jacobian, full_output=True)
+            steps = info["nst"][-1] if len(info["nst"]) else 0
+            evaluations = info["nfe"][-1] if len(info["nfe"]) else 0
+            jacobians = info["nje"][-1] if len(info["nje"]) else 0
+            return y, {"solver": solver, "success": info["message"] == "Integration successful.",
+                       "steps": int(steps), "rhs_evaluations": int(evaluations),
+                       "jacobian_evaluations": int(jacobians), "lu_decompositions": None}
+
+        options = dict()
+        if solver in RMS_SOLVERS and self.batch > 1:
+            options["rtol"], options["atol"] = RTOL / np.sqrt(self.batch), ATOL / np.sqrt(self.batch)
+        if solver in IMPLICIT_SOLVERS and self.dimension >= SPARSE_DIMENSION:
+            options["jac"] = lambda t, y: self.sparse_jacobian(y)
+        elif solver != "RK45":
+            options["jac"] = lambda t, y: self.jacobian(y)
+
+        result = solve_ivp(lambda t, y: self.rhs(y), (times[0], times[-1]), y_0, method=solver,
+                           dense_output=True, **options)
+        if not result.success:
+            raise RuntimeError("Solver {} failed: {}".format(solver, result.message))
+        y = result.sol(times).T if len(result.t) > 1 else np.tile(y_0, (len(times), 1))
+        return y, {"solver": solver, "success": True, "steps": len(result.t) - 1, "rhs_evaluations": result.nfev,
+                   "jacobian_evaluations": result.njev, "lu_decompositions": result.nlu}
@@ -0,0 +1,142 @@
+import itertools
+import multiprocessing
+
+import numpy as np
+import pandas as pd
+
+from eBCSgen.Simulation.Ensemble import simulate_ensemble
+from eBCSgen.Simulation.Statistics import EnsembleStatistics
+
+SCAN_BATCH_SIZE = 32  # number of parameter sets integrated as a single ODE system
+
+
+def parameter_grid(values: dict):
+    """
+    Creates all combinations of given values of params.
+
+    :param values: dict param -> value or iterable of values
+    :return: list of params and 2D array of parameter sets (sets x params)
+    """
+    params = list(values)
+    sets = list(itertools.product(*[np.atleast_1d(values[param]) for param in params]))
+    return params, np.array(sets, dtype=float).reshape(len(sets), len(params))
+
+
+def scan_deterministic(system, y_0: np.array, times: np.array, sets: np.array, solver: str = "auto",
+                       batch_size: int = SCAN_BATCH_SIZE, workers: int = 1):
+    """
+    Integrates ODE system for all parameter sets.
+
+    The sets are split into batches, each batch is integrated as a single system with concatenated state vectors
+    (see ODESystem.with_values) and tolerances tightened so that the error of each set stays within
+    the tolerances of a single set (see ODESystem.solve). The batches can be spread over a pool of worker processes.
+
+    :param system: ODESystem with params
+    :param y_0: initial concentrations
+    :param times: time points where the solution is reported
+    :param sets: 2D array of parameter sets (sets x params)
+    :param solver: solver used for the batches (see ODESystem.solve)
+    :param batch_size: maximal number of sets in a batch
+    :param workers: number of worker processes (batches are integrated in the calling process if 1)
+    :return: 3D array of solutions (sets x times x agents) and list of solver statistics of the batches
+    """
+    batches = [sets[start:start + batch_size] for start in range(0, len(sets), batch_size)]
+    if workers <= 1:
+        init_scan_worker(system, y_0, times, solver)
+        results = list(map(solve_batch, batches))
+    else:
+        with multiprocessing.Pool(workers, initializer=init_scan_worker,
+                                  initargs=(system, y_0, times, solver)) as pool:
+            results = pool.map(solve_batch, batches)
+
+    solutions = [y.reshape(len(times), len(batch), system.species).transpose(1, 0, 2)
+                 for batch, (y, _) in zip(batches, results)]
+    data = np.concatenate(solutions) if solutions else np.zeros((0, len(times), system.species))
+    return data, [statistics for _, statistics in results]
+
+
+def scan_stochastic(engine, init: np.array, grid: np.array, sets: np.array, runs: int, seed=None, workers: int = 1):
+    """
+    Simulates ensembles of given SSA engine for all parameter sets and computes their means in the grid points.
+
+    Each set gets its own seed derived from the given one, hence the result does not depend on the number
+    of workers. The sets are spread over a pool of worker processes, runs of a set are executed serially.
+
+    :param engine: SSA engine with params
+    :param init: initial state vector
+    :param grid: sorted time points where the means are computed
+    :param sets: 2D array of parameter sets (sets x params)
+    :param runs: number of runs for each set
+    :param seed: user seed (None for fresh entropy)
+    :param workers: number of worker processes (sets are simulated in the calling process if 1)
+    :return: 3D array of means (sets x grid x agents)
+    """
+    children = np.random.SeedSequence(seed).spawn(len(sets))
+    tasks = [(values, int.from_bytes(child.generate_state(4).tobytes(), "little"))
+             for values, child in zip(sets, children)]
+    if workers <= 1:
+        init_scan_worker(engine, init, grid, runs)
+        means = list(map(simulate_set, tasks))
+    else:
+        with multiprocessing.Pool(workers, initializer=init_scan_worker,
+                                  initargs=(engine, init, grid, runs)) as pool:
+            means = pool.map(simulate_set, tasks)
+    return np.array(means).reshape(len(sets), len(grid), len(init))
+
+
+def to_long_format(params: list, sets: np.array, times: np.array, agents: list, data: np.array) -> pd.DataFrame:
+    """
+    Creates tidy DataFrame with a row for each parameter set, time point and agent.
+
+    :param params: names of the params
+    :param sets: 2D array of parameter sets (sets x params)
+    :param times: time points
+    :param agents: names of the agents
+    :param data: 3D array of values (sets x times x agents)
+    :return: DataFrame with columns params, times, agent and value
+    """
+    repeat = len(times) * len(agents)
+    df = pd.DataFrame({param: np.repeat(sets[:, index], repeat) for index, param in enumerate(params)})
+    df["times"] = np.tile(np.repeat(times, len(agents)), len(sets))
+    df["agent"] = np.tile(np.array(agents, dtype=object), len(sets) * len(times))
+    df["value"] = data.ravel()
+    return df
+
+
+# context of the worker processes, set once by the pool initializer
+_scan_context = None
+
+
+def init_scan_worker(*context):
+    """
+    Initializer of worker processes (see scan_deterministic and scan_stochastic).
+    """
+    global _scan_context
+    _scan_context = context
+
+
+def solve_batch(values: np.array):
+    """
+    Integrates ODE system for a batch of parameter sets.
+
+    :param values: 2D array of parameter sets
+    :return: solution of the batched system and solver statistics
+    """
+    system, y_0, times, solver = _scan_context
+    return system.with_values(values).solve(np.tile(y_0, len(values)), times, solver)
+
+
+def simulate_set(task) -> np.array:
+    """
+    Simulates ensemble for a single parameter set.
+
+    :param task: values of the params and seed of the ensemble
+    :return: 2D array of means in the grid points (grid x agents)
+    """
+    engine, init, grid, runs = _scan_context
+    values, seed = task
+    engine.values = values
+    statistics = EnsembleStatistics(grid, len(init))
+    for trajectory in simulate_ensemble(engine, init, grid[-1], runs, seed):
+        statistics.add(trajectory.sample(statistics.grid))
+    return statistics.mean
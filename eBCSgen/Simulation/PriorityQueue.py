@@ -0,0 +1,66 @@
+class IndexedPriorityQueue:
+    """
+    Binary min-heap of keys of items 0, ..., n-1 with an index of their positions.
+
+    The index allows to change the key of any item in O(log n) and the item with the lowest key
+    is always at the top (used by the Next Reaction Method to keep putative firing times).
+    """
+    def __init__(self, keys):
+        self.keys = list(map(float, keys))
+        # sorted array is a valid heap
+        self.heap = sorted(range(len(self.keys)), key=lambda item: self.keys[item])
+        self.position = [0] * len(self.keys)
+        for position, item in enumerate(self.heap):
+            self.position[item] = position
+
+    def __len__(self):
+        return len(self.keys)
+
+    def top(self) -> tuple:
+        """
+        :return: item with the lowest key and the key
+        """
+        item = self.heap[0]
+        return item, self.keys[item]
+
+    def update(self, item: int, key: float):
+        """
+        Changes key of given item and restores the heap property.
+
+        :param item: given item
+        :param key: new key
+        """
+        old = self.keys[item]
+        self.keys[item] = key
+        if key < old:
+            self._sift_up(self.position[item])
+        elif key > old:
+            self._sift_down(self.position[item])
+
+    def _swap(self, i: int, j: int):
+        heap = self.heap
+        heap[i], heap[j] = heap[j], heap[i]
+        self.position[heap[i]] = i
+        self.position[heap[j]] = j
+
+    def _sift_up(self, position: int):
+        keys, heap = self.keys, self.heap
+        while position > 0:
+            parent = (position - 1) // 2
+            if keys[heap[parent]] <= keys[heap[position]]:
+                break
+            self._swap(position, parent)
+            position = parent
+
+    def _sift_down(self, position: int):
+        keys, heap = self.keys, self.heap
+        size = len(heap)
+        while True:
+            smallest = position
+            for child in (2 * position + 1, 2 * position + 2):
+                if child < size and keys[heap[child]] < keys[heap[smallest]]:
+                    smallest = child
+            if smallest == position:
+                break
+            self._swap(position, smallest)
+            position = smallest
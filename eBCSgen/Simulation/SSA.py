@@ -0,0 +1,468 @@
+import random
+
+import numpy as np
+import sympy
+from scipy.integrate import solve_ivp
+
+from eBCSgen.Core.Rate import STATE_VECTOR
+from eBCSgen.Regulations.Masks import RegulationMasks
+from eBCSgen.Simulation.PriorityQueue import IndexedPriorityQueue
+from eBCSgen.Simulation.Trajectory import Trajectory, HybridTrajectory
+from eBCSgen.TS.DependencyGraph import DependencyGraph
+
+CRITICAL_FIRINGS = 10  # reactions which can fire fewer times are critical
+LEAP_ERROR = 0.03  # bound on relative change of propensities during a leap
+EXACT_FACTOR = 10  # leaps shorter than EXACT_FACTOR expected SSA steps are not worth it
+EXACT_STEPS = 100  # number of exact steps done instead of such a leap
+COPY_THRESHOLD = 100  # reactions changing agents with fewer copies are simulated exactly
+FAST_FIRINGS = 10  # reactions expected to fire fewer times during a repartition interval are simulated exactly
+REPARTITIONS = 100  # default number of repartition intervals of a simulation
+
+
+class SSA:
+    """
+    Base of stochastic simulation engines of vector reactions given by their Stoichiometry.
+
+    All rates have to be compiled to numeric functions of the state vector (see VectorReaction.compile_rate).
+    The propensities of all reactions are evaluated at once by a single function created from the compiled
+    expressions, a disabled reaction or a reaction with undefined rate has zero propensity.
+
+    Rates can use given params as additional arguments (e.g. for parameter scans), their current values
+    are kept in attribute values.
+    """
+    def __init__(self, stoichiometry, params=()):
+        self.stoichiometry = stoichiometry
+        self.params = list(params)
+        for reaction in stoichiometry.reactions:
+            if reaction.compiled_rate is None or not reaction.compiled_rate.params <= set(self.params):
+                raise ValueError("Stochastic simulation requires numeric rates, reaction {} has rate {}."
+                                 .format(reaction, reaction.rate))
+        self.values = np.zeros(len(self.params))
+        self.rates = None
+        self._lambdify()
+
+    def __getstate__(self):
+        # lambdified functions cannot be pickled (e.g. for worker processes)
+        state = self.__dict__.copy()
+        state['rates'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lambdify()
+
+    def _lambdify(self):
+        expressions = [reaction.compiled_rate.expression for reaction in self.stoichiometry.reactions]
+        self.rates = sympy.lambdify(self.arguments, expressions, "numpy")
+
+    @property
+    def arguments(self) -> list:
+        """
+        :return: arguments of lambdified rates (state vector and params)
+        """
+        return [STATE_VECTOR] + [sympy.Symbol(param) for param in self.params]
+
+    def propensities(self, values: np.array) -> np.array:
+        """
+        :param values: state vector
+        :return: array of propensities of all reactions and boolean array of reactions which can happen
+        """
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rates = np.array(self.rates(values, *self.values), dtype=float)
+        enabled = (values >= self.stoichiometry.reactants).all(axis=1) & ~np.isnan(rates)
+        return np.where(enabled, rates, 0.0), enabled
+
+    def simulate(self, init: np.array, max_time: float, rng=random, time_step=None) -> Trajectory:
+        """
+        Simulates a single trajectory.
+
+        :param init: initial state vector
+        :param max_time: time when simulation ends
+        :param rng: source of randomness providing random, uniform and expovariate (random.Random interface)
+        :param time_step: function total propensity -> time to the next reaction (rng.expovariate by default)
+        :return: simulated Trajectory
+        """
+        raise NotImplementedError
+
+
+class DirectMethod(SSA):
+    """
+    Gillespie's direct method.
+
+    Each step the propensities of all reactions are computed, the time to the next reaction is drawn from
+    the exponential distribution given by their sum and the reaction is chosen with probability proportional
+    to its propensity by a binary search in the cumulative sum (in the order of the Stoichiometry,
+    so a step costs O(R) for R reactions). If ordered, the reactions are sorted by their propensities
+    before the search in each step, which reproduces the original implementation (used for testing).
+
+    If a regulation is given, the memory of the trajectory is tracked and the reactions which can happen
+    are filtered by the regulation before choosing (see RegulationMasks).
+
+    If no reaction can happen, the state does not change and the time advances by a random step.
+    """
+    def __init__(self, stoichiometry, params=(), regulation=None, ordered=False):
+        super().__init__(stoichiometry, params)
+        self.regulation = RegulationMasks(regulation, stoichiometry.reactions) if regulation else None
+        self.ordered = ordered
+
+    def simulate(self, init: np.array, max_time: float, rng=random, time_step=None) -> Trajectory:
+        time_step = time_step if time_step else rng.expovariate
+        change = self.stoichiometry.change
+        values = np.array(init, dtype=float)
+        trajectory = Trajectory(len(values))
+        memory = self.regulation.initial if self.regulation else None
+
+        time = 0.0
+        while time < max_time:
+            trajectory.append(time, values)
+            propensities, enabled = self.propensities(values)
+            if self.regulation:
+                # reactions with zero rate are not candidates (as in the Transition system)
+                enabled = self.regulation.allowed(values, memory, enabled & (propensities > 0))
+                propensities = np.where(enabled, propensities, 0.0)
+            if self.ordered:
+                order = np.argsort(propensities, kind="stable")
+                propensities = propensities[order]
+            cumsum = np.cumsum(propensities)
+            total = cumsum[-1] if len(cumsum) else 0.0
+            if total > 0:
+                if self.ordered:
+                    index = order[min(np.searchsorted(cumsum, total * rng.random()), len(order) - 1)]
+                else:
+                    # first reaction with cumulative propensity above the drawn value (it has nonzero propensity),
+                    # the last reaction with nonzero propensity if the value is rounded up to the total
+                    index = min(np.searchsorted(cumsum, total * rng.random(), side="right"),
+                                np.searchsorted(cumsum, total))
+                values = values + change[index]
+                if self.regulation:
+                    memory = self.regulation.update(memory, index)
+            else:
+                total = rng.uniform(0.5, 0.9)
+            time += time_step(total)
+        return trajectory
+
+
+class NextReactionMethod(SSA):
+    """
+    Next Reaction Method of Gibson and Bruck.
+
+    Each reaction has a putative firing time kept in an IndexedPriorityQueue, the reaction with the lowest one
+    fires next. After the firing, only propensities of reactions depending on agents changed by the fired reaction
+    are updated (see DependencyGraph) and their firing times are rescaled by the ratio of the old and the new
+    propensity, a new firing time is drawn only for the fired reaction (or a reaction enabled again).
+    Each step therefore costs O(d log n), where d is the number of affected reactions and n the number of reactions.
+    """
+    def __init__(self, stoichiometry, params=()):
+        super(NextReactionMethod, self).__init__(stoichiometry, params)
+        graph = DependencyGraph(stoichiometry)
+        self.dependents = [sorted(set(graph.affected_by(index)) | {index}) for index in range(len(stoichiometry))]
+
+    def __getstate__(self):
+        state = super(NextReactionMethod, self).__getstate__()
+        state['functions'] = None
+        return state
+
+    def _lambdify(self):
+        super(NextReactionMethod, self)._lambdify()
+        if self.params:
+            self.functions = [sympy.lambdify(self.arguments, reaction.compiled_rate.expression, "numpy")
+                              for reaction in self.stoichiometry.reactions]
+        else:
+            self.functions = [reaction.compiled_rate.function for reaction in self.stoichiometry.reactions]
+
+    def propensity(self, index: int, values: np.array) -> float:
+        """
+        :param index: index of a reaction
+        :param values: state vector
+        :return: propensity of the reaction
+        """
+        if not (values >= self.stoichiometry.reactants[index]).all():
+            return 0.0
+        value = float(self.functions[index](values, *self.values))
+        return 0.0 if np.isnan(value) else value
+
+    def simulate(self, init: np.array, max_time: float, rng=random, time_step=None) -> Trajectory:
+        """
+        Simulates a single trajectory.
+
+        :param init: initial state vector
+        :param max_time: time when simulation ends
+        :param rng: source of randomness providing expovariate (random.Random interface)
+        :param time_step: not used (firing times are drawn for individual reactions)
+        :return: simulated Trajectory
+        """
+        change = self.stoichiometry.change
+        values = np.array(init, dtype=float)
+        trajectory = Trajectory(len(values))
+        trajectory.append(0.0, values)
+        if not len(self.stoichiometry):
+            return trajectory
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            propensities, _ = self.propensities(values)
+            propensities = list(propensities)
+            queue = IndexedPriorityQueue([rng.expovariate(1.0) / value if value > 0 else np.inf
+                                          for value in propensities])
+
+            fired, time = queue.top()
+            while time < max_time:
+                values = values + change[fired]
+                trajectory.append(time, values)
+
+                for index in self.dependents[fired]:
+                    old, new = propensities[index], self.propensity(index, values)
+                    propensities[index] = new
+                    if new <= 0:
+                        firing = np.inf
+                    elif index != fired and old > 0:
+                        firing = time + (old / new) * (queue.keys[index] - time)
+                    else:
+                        firing = time + rng.expovariate(1.0) / new
+                    queue.update(index, firing)
+                fired, time = queue.top()
+        return trajectory
+
+
+class TauLeaping(SSA):
+    """
+    Adaptive tau-leaping with the step size selection of Cao, Gillespie and Petzold.
+
+    Each leap of length tau fires every reaction a Poisson distributed number of times with mean given by its
+    propensity times tau. The tau is chosen so that the expected relative change of every agent the propensities
+    depend on is bounded by epsilon, taking into account the highest order of reactions consuming the agent.
+
+    Reactions which can fire fewer than CRITICAL_FIRINGS times before depleting some of their reactants
+    are critical - at most one critical reaction fires during a leap (chosen as in the direct method).
+    If the leap would be shorter than a few exact steps, EXACT_STEPS steps of the direct method are done instead.
+    Leaps leading to negative amounts are rejected and retried with half tau.
+
+    The simulation stops when no reaction can happen.
+    """
+    def __init__(self, stoichiometry, epsilon: float = LEAP_ERROR, critical: int = CRITICAL_FIRINGS, params=()):
+        super(TauLeaping, self).__init__(stoichiometry, params)
+        self.epsilon = epsilon
+        self.critical = critical
+
+        reactants = stoichiometry.reactants
+        self.consumed = np.maximum(-stoichiometry.change, 0)
+        # agents affecting propensities (reactants and agents used in rates)
+        self.observed = DependencyGraph(stoichiometry).reads.any(axis=0) if len(stoichiometry) \
+            else np.zeros(reactants.shape[1], dtype=bool)
+
+        # highest order of a reaction consuming the agent and the largest amount such reaction needs
+        order = reactants.sum(axis=1)
+        self.highest = np.zeros(reactants.shape[1], dtype=int)
+        self.multiplicity = np.ones(reactants.shape[1], dtype=int)
+        for agent in range(reactants.shape[1]):
+            using = reactants[:, agent] > 0
+            if using.any():
+                self.highest[agent] = order[using].max()
+                self.multiplicity[agent] = reactants[using & (order == self.highest[agent]), agent].max()
+
+    def firings_left(self, values: np.array) -> np.array:
+        """
+        :param values: state vector
+        :return: number of firings of each reaction before some of its reactants is depleted
+        """
+        with np.errstate(divide="ignore", invalid="ignore"):
+            firings = np.where(self.consumed > 0, np.floor(values / self.consumed), np.inf)
+        return firings.min(axis=1)
+
+    def relative_order(self, values: np.array) -> np.array:
+        """
+        :param values: state vector
+        :return: factors g_i bounding relative change of propensities by relative change of the agents
+        """
+        previous, before_previous = np.maximum(values - 1, 1), np.maximum(values - 2, 1)
+        g = np.maximum(self.highest, 1).astype(float)
+        double, triple = self.multiplicity == 2, self.multiplicity >= 3
+        g = np.where((self.highest == 2) & double, 2 + 1 / previous, g)
+        g = np.where((self.highest == 3) & double, 1.5 * (2 + 1 / previous), g)
+        g = np.where((self.highest == 3) & triple, 3 + 1 / previous + 2 / before_previous, g)
+        return g
+
+    def leap_size(self, values: np.array, propensities: np.array, noncritical: np.array) -> float:
+        """
+        :param values: state vector
+        :param propensities: propensities of all reactions
+        :param noncritical: boolean array of noncritical reactions
+        :return: largest tau satisfying the leap condition
+        """
+        change = self.stoichiometry.change[noncritical]
+        mean = change.T @ propensities[noncritical]
+        variance = (change ** 2).T @ propensities[noncritical]
+        allowed = np.maximum(self.epsilon * values / self.relative_order(values), 1)[self.observed]
+        mean, variance = np.abs(mean[self.observed]), variance[self.observed]
+        with np.errstate(divide="ignore"):
+            bounds = np.concatenate([np.where(mean > 0, allowed / mean, np.inf),
+                                     np.where(variance > 0, allowed ** 2 / variance, np.inf)])
+        return bounds.min() if len(bounds) else np.inf
+
+    def simulate(self, init: np.array, max_time: float, rng=random, time_step=None) -> Trajectory:
+        """
+        Simulates a single trajectory.
+
+        Poisson numbers of firings are drawn by a numpy Generator seeded from the given rng.
+
+        :param init: initial state vector
+        :param max_time: time when simulation ends
+        :param rng: source of randomness providing random, expovariate and getrandbits (random.Random interface)
+        :param time_step: not used (the time advances by leaps)
+        :return: simulated Trajectory
+        """
+        generator = np.random.default_rng(rng.getrandbits(64))
+        change = self.stoichiometry.change
+        values = np.array(init, dtype=float)
+        trajectory = Trajectory(len(values))
+
+        time, exact = 0.0, 0
+        while time < max_time:
+            trajectory.append(time, values)
+            propensities, _ = self.propensities(values)
+            total = propensities.sum()
+            if total <= 0:
+                break
+
+            if not exact:
+                critical = (propensities > 0) & (self.firings_left(values) < self.critical)
+                tau = self.leap_size(values, propensities, ~critical)
+                if tau < EXACT_FACTOR / total:
+                    exact = EXACT_STEPS
+
+            if exact:
+                exact -= 1
+                cumsum = np.cumsum(propensities)
+                index = min(np.searchsorted(cumsum, total * rng.random()), len(cumsum) - 1)
+                values = values + change[index]
+                time += rng.expovariate(total)
+                continue
+
+            tau = min(tau, max_time - time)
+            critical_total = propensities[critical].sum()
+            while True:
+                critical_time = rng.expovariate(critical_total) if critical_total > 0 else np.inf
+                step = min(tau, critical_time)
+                firings = generator.poisson(np.where(critical, 0.0, propensities) * step)
+                if critical_time <= tau:
+                    cumsum = np.cumsum(np.where(critical, propensities, 0.0))
+                    firings[min(np.searchsorted(cumsum, critical_total * rng.random()), len(cumsum) - 1)] += 1
+                updated = values + firings @ change
+                if (updated >= 0).all():
+                    break
+                tau /= 2
+            values = updated
+            time += step
+        return trajectory
+
+
+class HybridSimulation(SSA):
+    """
+    Hybrid simulation treating fast reactions of abundant agents deterministically and the others exactly.
+
+    A reaction is deterministic if it is expected to fire at least FAST_FIRINGS times during a repartition
+    interval and all agents it uses or changes have at least COPY_THRESHOLD copies. The deterministic reactions
+    are integrated as an ODE (with propensities as rates) together with the integrated total propensity
+    of the exact reactions. When the integral reaches an exponentially distributed threshold, one of the exact
+    reactions fires (chosen proportionally to its propensity). The partition is recomputed after every
+    exact firing and at the end of every interval, agents which are no longer changed by deterministic
+    reactions are rounded to whole copies. If no reaction is deterministic, steps of the direct method are done.
+
+    The history of partitions is kept in the resulting HybridTrajectory. The simulation stops
+    when no reaction can happen.
+    """
+    def __init__(self, stoichiometry, threshold: int = COPY_THRESHOLD, firings: int = FAST_FIRINGS,
+                 interval: float = None, params=()):
+        super(HybridSimulation, self).__init__(stoichiometry, params)
+        self.threshold = threshold
+        self.firings = firings
+        self.interval = interval
+        # agents used or changed by reactions
+        self.involved = (stoichiometry.reactants > 0) | (stoichiometry.change != 0)
+
+    def partition(self, values: np.array, propensities: np.array, interval: float) -> np.array:
+        """
+        :param values: state vector
+        :param propensities: propensities of all reactions
+        :param interval: repartition interval
+        :return: boolean array of deterministic reactions
+        """
+        abundant = np.where(self.involved, values >= self.threshold, True).all(axis=1)
+        return abundant & (propensities * interval >= self.firings)
+
+    def simulate(self, init: np.array, max_time: float, rng=random, time_step=None) -> HybridTrajectory:
+        """
+        Simulates a single trajectory.
+
+        :param init: initial state vector
+        :param max_time: time when simulation ends
+        :param rng: source of randomness providing random and expovariate (random.Random interface)
+        :param time_step: not used (the time advances by integration)
+        :return: simulated HybridTrajectory
+        """
+        interval = self.interval if self.interval else max_time / REPARTITIONS
+        change = self.stoichiometry.change
+        values = np.array(init, dtype=float)
+        trajectory = HybridTrajectory(len(values))
+
+        time, previous = 0.0, None
+        while time < max_time:
+            trajectory.append(time, values)
+            propensities, _ = self.propensities(values)
+            fast = self.partition(values, propensities, interval)
+            if previous is None or (fast != previous).any():
+                trajectory.partitions.append((time, np.flatnonzero(fast)))
+                previous = fast
+            values = np.where(self.involved[fast].any(axis=0), values, np.round(values))
+
+            if not fast.any():
+                total = propensities.sum()
+                if total <= 0:
+                    break
+                index = self.choose(propensities, total, rng)
+                values = values + change[index]
+                time += rng.expovariate(total)
+                continue
+
+            slow = ~fast
+            target = rng.expovariate(1.0)
+
+            def rhs(t, z):
+                rates, _ = self.propensities(np.maximum(z[:-1], 0))
+                return np.append(rates[fast] @ change[fast], rates[slow].sum())
+
+            def fires(t, z):
+                return z[-1] - target
+            fires.terminal, fires.direction = True, 1
+
+            result = solve_ivp(rhs, (time, min(time + interval, max_time)), np.append(values, 0.0),
+                               method="LSODA", events=fires)
+            for point, z in zip(result.t[1:-1], result.y.T[1:-1]):
+                trajectory.append(point, np.maximum(z[:-1], 0))
+            time, values = result.t[-1], np.maximum(result.y[:-1, -1], 0)
+
+            if result.status == 1:
+                propensities, _ = self.propensities(values)
+                propensities = np.where(slow, propensities, 0.0)
+                total = propensities.sum()
+                if total > 0:
+                    values = values + change[self.choose(propensities, total, rng)]
+
+        if time == max_time:
+            # the last integration ended exactly at the end
+            trajectory.append(time, values)
+        return trajectory
+
+    @staticmethod
+    def choose(propensities: np.array, total: float, rng) -> int:
+        """
+        :param propensities: propensities of reactions
+        :param total: sum of the propensities
+        :param rng: source of randomness providing random
+        :return: index of a reaction chosen proportionally to its propensity
+        """
+        cumsum = np.cumsum(propensities)
+        return min(np.searchsorted(cumsum, total * rng.random()), len(cumsum) - 1)
+
+
+SSA_METHODS = {"direct": DirectMethod, "next_reaction": NextReactionMethod, "tau_leaping": TauLeaping,
+               "hybrid": HybridSimulation}
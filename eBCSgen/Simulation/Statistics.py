@@ -0,0 +1,120 @@
+import numpy as np
+import pandas as pd
+
+
+class EnsembleStatistics:
+    """
+    Online statistics of an ensemble of trajectories sampled on a fixed time grid.
+
+    The mean and variance of every agent in every grid point are accumulated by Welford's algorithm,
+    quantiles are estimated by the P-square algorithm (see P2Quantile). The memory is therefore
+    O(grid x agents) regardless of the number of runs and the number of events in them.
+    """
+    def __init__(self, grid, dimension: int, quantiles=()):
+        self.grid = np.asarray(grid, dtype=float)
+        self.count = 0
+        self.mean = np.zeros((len(self.grid), dimension))
+        self.m2 = np.zeros((len(self.grid), dimension))
+        self.quantiles = [P2Quantile(p, self.mean.shape) for p in quantiles]
+
+    def add(self, samples: np.array):
+        """
+        Adds a trajectory sampled on the grid (see Trajectory.sample).
+
+        :param samples: 2D array (grid points x agents)
+        """
+        self.count += 1
+        delta = samples - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (samples - self.mean)
+        for quantile in self.quantiles:
+            quantile.add(samples)
+
+    @property
+    def variance(self) -> np.array:
+        """
+        :return: sample variance in the grid points (zero for a single run)
+        """
+        if self.count < 2:
+            return np.zeros_like(self.m2)
+        return self.m2 / (self.count - 1)
+
+    def to_dataframe(self, header: list) -> pd.DataFrame:
+        """
+        Creates DataFrame with the means (columns named by agents), variances (suffix _var)
+        and quantiles (suffix _q<p>) in the grid points.
+
+        :param header: names of the agents
+        :return: DataFrame with column times
+        """
+        columns = [("times", self.grid)]
+        columns += [(agent, self.mean[:, i]) for i, agent in enumerate(header)]
+        columns += [(agent + "_var", self.variance[:, i]) for i, agent in enumerate(header)]
+        for quantile in self.quantiles:
+            values = quantile.value
+            columns += [("{}_q{:g}".format(agent, quantile.p), values[:, i]) for i, agent in enumerate(header)]
+        return pd.DataFrame(dict(columns))
+
+
+class P2Quantile:
+    """
+    P-square algorithm of Jain and Chlamtac estimating p-quantile of a stream without storing the observations.
+
+    Five markers (minimum, p/2, p, (1+p)/2 quantiles and maximum) are kept for every element of the observed
+    arrays, their heights are adjusted by piecewise-parabolic interpolation as the observations come.
+    """
+    def __init__(self, p: float, shape: tuple):
+        if not 0 < p < 1:
+            raise ValueError("Quantile has to be in (0, 1), {} given.".format(p))
+        self.p = p
+        self.count = 0
+        self.heights = np.zeros((5,) + tuple(shape))
+        self.positions = np.ones((5,) + tuple(shape)) * np.arange(1, 6).reshape((5,) + (1,) * len(shape))
+        self.desired = np.array([1, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5])
+        self.increments = np.array([0, p / 2, p, (1 + p) / 2, 1])
+
+    def add(self, observation: np.array):
+        """
+        :param observation: array of observed values
+        """
+        if self.count < 5:
+            self.heights[self.count] = observation
+            self.count += 1
+            if self.count == 5:
+                self.heights.sort(axis=0)
+            return
+
+        q, n = self.heights, self.positions
+        q[0] = np.minimum(q[0], observation)
+        q[4] = np.maximum(q[4], observation)
+        n[1:4] += observation < q[1:4]
+        n[4] += 1
+        self.desired += self.increments
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            for i in range(1, 4):
+                d = self.desired[i] - n[i]
+                move = ((d >= 1) & (n[i + 1] - n[i] > 1)) | ((d <= -1) & (n[i - 1] - n[i] < -1))
+                if not move.any():
+                    continue
+                s = np.sign(d)
+                parabolic = q[i] + s / (n[i + 1] - n[i - 1]) * (
+                        (n[i] - n[i - 1] + s) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+                        + (n[i + 1] - n[i] - s) * (q[i] - q[i - 1]) / (n[i] - n[i - 1]))
+                neighbour = np.where(s > 0, q[i + 1], q[i - 1])
+                neighbour_position = np.where(s > 0, n[i + 1], n[i - 1])
+                linear = q[i] + s * (neighbour - q[i]) / (neighbour_position - n[i])
+                adjusted = np.where((q[i - 1] < parabolic) & (parabolic < q[i + 1]), parabolic, linear)
+                q[i] = np.where(move, adjusted, q[i])
+                n[i] = np.where(move, n[i] + s, n[i])
+
+    @property
+    def value(self) -> np.array:
+        """
+        :return: estimated quantile (exact for fewer than five observations)
+        """
+        if self.count < 5:
+            if not self.count:
+                return np.full(self.heights.shape[1:], np.nan)
+            return np.quantile(self.heights[:self.count], self.p, axis=0)
+        return self.heights[2].copy()
@@ -0,0 +1,174 @@
+import copy
+
+import numpy as np
+from scipy.linalg import null_space
+
+NEWTON_ITERATIONS = 50
+NEWTON_TOLERANCE = 1e-10  # Newton step relative to the largest concentration
+MIN_DAMPING = 1e-3  # smallest fraction of Newton step tried before giving up the decrease of the residual
+TIME_HORIZONS = 10  # attempts of time-stepping, each integrating 10 times longer than the previous one
+
+
+def conservation_laws(change: np.array) -> np.array:
+    """
+    Finds linearly independent conservation laws of reactions, i.e. weights w of agents such that
+    the weighted sum w.y does not change by any reaction (N w = 0 for the change matrix N).
+
+    :param change: change matrix of reactions (reactions x agents)
+    :return: 2D array of laws with orthonormal rows (laws x agents)
+    """
+    change = np.asarray(change, dtype=float)
+    if len(change) == 0:
+        return np.identity(change.shape[1])
+    return null_space(change).T
+
+
+class SteadyStateSolver:
+    """
+    Steady states of the deterministic semantics of vector reactions given by their ODESystem.
+
+    Reactions move the state only within the stoichiometric subspace spanned by their changes, the Jacobian
+    of the right-hand side is singular in the directions of conservation laws. The steady state is hence found
+    as a root of the square system
+        Q f(y) = 0,  L y = L y_0,
+    where rows of Q are an orthonormal basis of the stoichiometric subspace and rows of L are the conservation
+    laws (see conservation_laws). The system is solved by damped Newton method with the analytic Jacobian
+    [Q J; L] of the ODESystem. If Newton method does not converge or finds a state with negative
+    concentrations, the ODEs are integrated by the BDF method for increasing time horizons and Newton method
+    is restarted from the reached state.
+
+    The steady state is stable if all eigenvalues of the Jacobian restricted to the stoichiometric subspace
+    Q J Q^T have negative real parts.
+    """
+    def __init__(self, system):
+        self.system = system
+        self.laws = conservation_laws(system.stoichiometry.change)
+        if len(self.laws):
+            self.subspace = null_space(self.laws).T
+        else:
+            self.subspace = np.identity(system.species)
+
+    def with_values(self, values) -> 'SteadyStateSolver':
+        """
+        Creates the solver for given values of the params of the ODESystem.
+
+        :param values: values of the params
+        :return: SteadyStateSolver of the instantiated system
+        """
+        solver = copy.copy(self)
+        solver.system = self.system.with_values(np.reshape(values, (1, -1)))
+        return solver
+
+    def residual(self, y: np.array, totals: np.array) -> np.array:
+        """
+        :param y: vector of concentrations
+        :param totals: values of the conservation laws
+        :return: residual of the reduced system
+        """
+        return np.concatenate([self.subspace @ self.system.rhs(y), self.laws @ y - totals])
+
+    def jacobian(self, y: np.array) -> np.array:
+        """
+        :param y: vector of concentrations
+        :return: Jacobian matrix of the reduced system
+        """
+        return np.vstack([self.subspace @ self.system.jacobian(y), self.laws])
+
+    def newton(self, y: np.array, totals: np.array, scale: float):
+        """
+        Damped Newton method on the reduced system.
+
+        :param y: initial guess
+        :param totals: values of the conservation laws
+        :param scale: magnitude of the concentrations (the tolerance is relative to it)
+        :return: found steady state (None if the method failed) and number of iterations
+        """
+        tolerance = NEWTON_TOLERANCE * scale
+        for iteration in range(1, NEWTON_ITERATIONS + 1):
+            residual = self.residual(y, totals)
+            try:
+                step = np.linalg.solve(self.jacobian(y), -residual)
+            except np.linalg.LinAlgError:
+                return None, iteration
+            if not np.isfinite(step).all():
+                return None, iteration
+
+            if np.abs(step).max(initial=0) <= tolerance:
+                y = y + step
+                return (y if y.min(initial=0) >= -tolerance else None), iteration
+
+            # halve the step until the residual decreases
+            norm, damping = np.linalg.norm(residual), 1.0
+            while damping > MIN_DAMPING and not np.linalg.norm(self.residual(y + damping * step, totals)) < norm:
+                damping /= 2
+            y = y + damping * step
+        return None, NEWTON_ITERATIONS
+
+    def is_stable(self, y: np.array) -> bool:
+        """
+        :param y: steady state
+        :return: True if the steady state is asymptotically stable within its stoichiometric class
+        """
+        if len(self.subspace) == 0:
+            return True
+        eigenvalues = np.linalg.eigvals(self.subspace @ self.system.jacobian(y) @ self.subspace.T)
+        return bool(eigenvalues.real.max() < 0)
+
+    def find(self, y_0: np.array, guess: np.array = None):
+        """
+        Finds the steady state in the stoichiometric class of given initial state.
+
+        :param y_0: initial concentrations (the time-stepping starts here)
+        :param guess: initial guess of Newton method (y_0 by default)
+        :return: steady state and dict of statistics (method, iterations, residual and stability)
+        """
+        y_0 = np.asarray(y_0, dtype=float)
+        totals = self.laws @ y_0
+        scale = np.abs(y_0).max(initial=0) or 1.0
+
+        method = "newton"
+        y, iterations = self.newton(y_0 if guess is None else np.asarray(guess, dtype=float), totals, scale)
+        current, horizon = y_0, 1.0
+        for _ in range(TIME_HORIZONS):
+            if y is not None:
+                break
+            method = "time_stepping"
+            solution, _ = self.system.solve(current, np.array([0.0, horizon]), "BDF")
+            current = solution[-1]
+            y, more = self.newton(current, totals, scale)
+            iterations += more
+            horizon *= 10
+
+        if y is None:
+            raise RuntimeError("Steady state was not found, the system did not converge in time {:g}."
+                               .format(horizon / 10))
+        return y, {"method": method, "iterations": iterations,
+                   "residual": float(np.abs(self.system.rhs(y)).max(initial=0)), "stable": self.is_stable(y)}
+
+    def continuation(self, y_0: np.array, values):
+        """
+        Follows the steady state while the single param of the ODESystem changes (natural parameter continuation).
+
+        The initial guess for each value is extrapolated from steady states of the two previous values
+        (secant predictor) and corrected by Newton method, the time-stepping starts from the previous
+        steady state. Beyond a fold of the branch the continuation jumps to another branch.
+
+        :param y_0: initial concentrations (determine the stoichiometric class)
+        :param values: sequence of values of the param
+        :return: 2D array of steady states (values x agents) and list of statistics (see find)
+        """
+        if len(self.system.params) != 1:
+            raise ValueError("Continuation requires ODE system with a single param, given {}."
+                             .format(", ".join(self.system.params) or "none"))
+        values = np.asarray(values, dtype=float).reshape(-1)
+
+        states, statistics = [], []
+        for index, value in enumerate(values):
+            guess = states[-1] if states else None
+            if len(states) >= 2 and values[index - 1] != values[index - 2]:
+                slope = (states[-1] - states[-2]) / (values[index - 1] - values[index - 2])
+                guess = states[-1] + slope * (value - values[index - 1])
+            y, info = self.with_values([value]).find(states[-1] if states else y_0, guess)
+            states.append(y)
+            statistics.append(info)
+        return np.array(states).reshape(len(values), self.system.species), statistics
@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+
+INITIAL_CAPACITY = 1024
+
+
+class Trajectory:
+    """
+    Simulated trajectory kept in preallocated arrays of time points and state vectors.
+
+    The arrays grow geometrically when full, hence appending a point takes amortised constant time.
+    The data are converted to a DataFrame only once at the end (see to_dataframe).
+    """
+    def __init__(self, dimension: int, capacity: int = INITIAL_CAPACITY):
+        self.times = np.empty(capacity)
+        self.values = np.empty((capacity, dimension))
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def append(self, time: float, values: np.array):
+        """
+        Adds a point to the trajectory.
+
+        :param time: time of the point
+        :param values: state vector at the time
+        """
+        if self.size == len(self.times):
+            self.grow()
+        self.times[self.size] = time
+        self.values[self.size] = values
+        self.size += 1
+
+    def grow(self):
+        capacity = 2 * max(1, len(self.times))
+        times = np.empty(capacity)
+        values = np.empty((capacity, self.values.shape[1]))
+        times[:self.size] = self.times[:self.size]
+        values[:self.size] = self.values[:self.size]
+        self.times, self.values = times, values
+
+    def sample(self, grid: np.array) -> np.array:
+        """
+        Samples the trajectory as a piecewise-constant function in given time points
+        (the last state holds after the last event).
+
+        :param grid: sorted array of time points
+        :return: 2D array (time points x agents)
+        """
+        indices = np.searchsorted(self.times[:self.size], grid, side='right') - 1
+        return self.values[np.maximum(indices, 0)]
+
+    def trimmed(self) -> 'Trajectory':
+        """
+        :return: the Trajectory without unused capacity (e.g. to be sent between processes)
+        """
+        trajectory = Trajectory(self.values.shape[1], capacity=self.size)
+        trajectory.times[:] = self.times[:self.size]
+        trajectory.values[:] = self.values[:self.size]
+        trajectory.size = self.size
+        return trajectory
+
+    def to_dataframe(self, header: list) -> pd.DataFrame:
+        """
+        :param header: names of the agents
+        :return: DataFrame indexed by time points (the last value is kept for repeated time points)
+        """
+        df = pd.DataFrame(data=self.values[:self.size], index=pd.Index(self.times[:self.size]),
+                          columns=header, dtype=float)
+        return df[~df.index.duplicated(keep='last')]
+
+
+class HybridTrajectory(Trajectory):
+    """
+    Trajectory of hybrid simulation which also keeps history of partitions of reactions
+    (see HybridSimulation) as a list of (time, indices of deterministic reactions).
+    """
+    def __init__(self, dimension: int, capacity: int = INITIAL_CAPACITY):
+        super(HybridTrajectory, self).__init__(dimension, capacity)
+        self.partitions = []
+
+    def trimmed(self) -> 'HybridTrajectory':
+        trajectory = HybridTrajectory(self.values.shape[1], capacity=self.size)
+        trajectory.times[:] = self.times[:self.size]
+        trajectory.values[:] = self.values[:self.size]
+        trajectory.size = self.size
+        trajectory.partitions = self.partitions
+        return trajectory
@@ -0,0 +1,161 @@
+import json
+import os
+
+import numpy as np
+import sympy
+
+from eBCSgen.Errors.InvalidInputError import InvalidInputError
+from eBCSgen.TS.Edge import Edge
+from eBCSgen.TS.EdgeStore import EdgeStore, EDGE_DTYPE
+from eBCSgen.TS.State import Memory
+from eBCSgen.TS.StateStore import StateStore, MappedStateStore, StoreEncoding, CACHE_SIZE, MIN_CAPACITY
+from eBCSgen.TS.TransitionSystem import TransitionSystem
+
+CHECKPOINT_VERSION = 1
+CHECKPOINT_INTERVAL = 600  # seconds
+
+
+def edges_to_records(edges):
+    """
+    Converts encoded Edges to records (see EdgeStore).
+
+    :param edges: set of encoded Edges or EdgeStore
+    :return: records, list of labels and position -> non-numeric probability
+    """
+    if isinstance(edges, EdgeStore):
+        return edges.to_records()
+
+    records = np.zeros(len(edges), dtype=EDGE_DTYPE)
+    labels, label_codes, expressions = [], dict(), dict()
+    for position, edge in enumerate(edges):
+        if edge.label is None:
+            label = -1
+        else:
+            if edge.label not in label_codes:
+                label_codes[edge.label] = len(labels)
+                labels.append(edge.label)
+            label = label_codes[edge.label]
+
+        if isinstance(edge.probability, (int, float)):
+            probability = edge.probability
+        else:
+            expressions[position] = edge.probability
+            probability = np.nan
+        records[position] = (edge.source, edge.target, probability, label)
+    return records, labels, expressions
+
+
+def encode_expression(probability):
+    """
+    :param probability: non-numeric probability of an Edge
+    :return: JSON representation keeping the type (strings as they are, sympy expressions by srepr)
+    """
+    if isinstance(probability, str):
+        return probability
+    return {'sympy': sympy.srepr(sympy.sympify(probability))}
+
+
+def decode_expression(value):
+    """
+    :param value: representation created by encode_expression
+    :return: the probability of the same type as the saved one
+    """
+    if isinstance(value, dict):
+        return sympy.sympify(value['sympy'])
+    return value
+
+
+def save_checkpoint(ts: TransitionSystem, path: str, frontier: list):
+    """
+    Saves TransitionSystem generated in compact mode (see StateStore) to a compressed binary checkpoint.
+
+    The checkpoint covers packed states, edges, frontier, ordering, bound and applied state space reduction.
+    It is written to a temporary file first and then atomically moved to the given path, so the path always
+    contains the latest complete checkpoint.
+
+    :param ts: given TransitionSystem with ts.store
+    :param path: output file
+    :param frontier: codes of unprocessed states (in the order of processing)
+    """
+    store = ts.store
+    records, labels, expressions = edges_to_records(ts.edges)
+    memories = [[memory.level, memory.history] for memory in store.memories]
+
+    data = {'version': np.array(CHECKPOINT_VERSION),
+            'ordering': np.array(list(map(str, ts.ordering)), dtype=str),
+            'bound': np.array(ts.bound),
+            'store_bound': np.array(store.bound),
+            'init': np.array(ts.init),
+            'params': np.array(list(ts.params), dtype=str),
+            'rows': store.rows[:store.size],
+            'memory_ids': store.memory_ids[:store.size],
+            'memories': np.array(json.dumps(memories)),
+            'frontier': np.array(frontier, dtype=np.int64),
+            'edges': records,
+            'labels': np.array(json.dumps(labels)),
+            'expressions': np.array(json.dumps({str(key): encode_expression(value)
+                                                 for key, value in expressions.items()})),
+            'reduction': np.array(json.dumps(ts.reduction))}
+
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as file:
+        np.savez_compressed(file, **data)
+    os.replace(temporary, path)
+
+
+def load_checkpoint(path: str, ordering, working_dir: str = None, cache_size: int = CACHE_SIZE) -> TransitionSystem:
+    """
+    Loads TransitionSystem from a checkpoint created by save_checkpoint.
+
+    The ordering of the checkpoint has to match the ordering of the model which is used to continue the generating.
+    The loaded TS is in compact mode (out-of-core if working_dir is given) with unprocessed states kept
+    in the order they were supposed to be processed.
+
+    :param path: checkpoint file
+    :param ordering: ordering of the model
+    :param working_dir: directory for memory-mapped files
+    :param cache_size: number of decoded states kept in memory in out-of-core mode
+    :return: loaded TransitionSystem
+    """
+    with np.load(path) as data:
+        if int(data['version']) != CHECKPOINT_VERSION:
+            raise InvalidInputError("Unsupported checkpoint version {}.".format(int(data['version'])))
+        if list(data['ordering']) != list(map(str, ordering)):
+            raise InvalidInputError("Checkpoint {} was created for a different model.".format(path))
+
+        ts = TransitionSystem(ordering, data['bound'].item())
+        ts.params = list(map(str, data['params']))
+        ts.init = int(data['init'])
+        if 'reduction' in data:
+            ts.reduction = json.loads(data['reduction'].item())
+
+        rows = data['rows']
+        store_bound = data['store_bound'].item()
+        if working_dir:
+            ts.store = MappedStateStore(working_dir, rows.shape[1], store_bound,
+                                        max(len(rows), MIN_CAPACITY), cache_size)
+        else:
+            ts.store = StateStore(rows.shape[1], store_bound, max(len(rows), MIN_CAPACITY))
+        for level, history in json.loads(data['memories'].item()):
+            memory = Memory(level)
+            memory.history = history
+            ts.store.intern_memory(memory)
+        ts.store.extend(rows, data['memory_ids'])
+
+        records = data['edges']
+        labels = json.loads(data['labels'].item())
+        expressions = {int(key): decode_expression(value)
+                       for key, value in json.loads(data['expressions'].item()).items()}
+        if working_dir:
+            ts.edges = EdgeStore(working_dir, max(len(records), 1))
+            ts.edges.extend_records(records, labels, expressions)
+        else:
+            ts.edges = set()
+            for position, (source, target, probability, label) in enumerate(records.tolist()):
+                probability = expressions.get(position, probability)
+                label = labels[label] if label >= 0 else None
+                ts.edges.add(Edge(source, target, probability, label, encoded=True))
+
+        ts.states_encoding = StoreEncoding(ts.store)
+        ts.unprocessed = [ts.store[code] for code in data['frontier'].tolist()]
+    return ts
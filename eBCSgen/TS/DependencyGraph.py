@@ -0,0 +1,40 @@
+import numpy as np
+
+
+class DependencyGraph:
+    """
+    Species -> reaction dependency graph of vector reactions given by their Stoichiometry.
+
+    A reaction reads the agents it consumes and the agents its rate depends on (see CompiledRate.dependencies)
+    and writes the agents whose amount it changes. After firing a reaction, only reactions reading some
+    of the written agents can change their enabledness or rate, all other reactions keep the values
+    of the parent state.
+    """
+    def __init__(self, stoichiometry):
+        self.stoichiometry = stoichiometry
+
+        self.reads = stoichiometry.reactants > 0
+        for index, reaction in enumerate(stoichiometry.reactions):
+            if reaction.compiled_rate is None:
+                # unknown dependencies
+                self.reads[index] = True
+            else:
+                self.reads[index, list(reaction.compiled_rate.dependencies)] = True
+        self.writes = stoichiometry.change != 0
+
+        # affected[r, q] is True if firing r can change enabledness or rate of q
+        self.affected = (self.writes.astype(np.int64) @ self.reads.T.astype(np.int64)) > 0
+
+    def readers(self, agent: int) -> np.array:
+        """
+        :param agent: index of an agent in the ordering
+        :return: indices of reactions depending on the agent
+        """
+        return np.flatnonzero(self.reads[:, agent])
+
+    def affected_by(self, reaction: int) -> np.array:
+        """
+        :param reaction: index of a fired reaction
+        :return: indices of reactions which have to be re-checked
+        """
+        return np.flatnonzero(self.affected[reaction])
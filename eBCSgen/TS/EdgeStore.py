@@ -0,0 +1,101 @@
+import numpy as np
+
+from eBCSgen.TS.Edge import Edge
+from eBCSgen.TS.StateStore import MappedBuffers, MIN_CAPACITY
+
+EDGE_DTYPE = np.dtype([("source", np.int64), ("target", np.int64), ("probability", np.float64), ("label", np.int32)])
+READ_BLOCK = 65536
+
+
+class EdgeStore:
+    """
+    Memory-mapped list of encoded Edges used as TransitionSystem.edges in out-of-core mode.
+
+    Every Edge is stored as a record (source, target, probability, label code), labels are interned.
+    Probabilities which are not numbers (parametric expressions) are kept aside in memory.
+    Edges are reconstructed on iteration, therefore the collection can be consumed in the same way as set of Edges.
+    """
+    def __init__(self, directory: str, capacity: int = MIN_CAPACITY):
+        self.buffers = MappedBuffers(directory, "edges_")
+        self.size = 0
+        self.records = self.buffers.allocate("edges", capacity, EDGE_DTYPE)
+
+        self.labels = []  # code -> label
+        self.label_codes = dict()  # label -> code
+        self.expressions = dict()  # position -> non-numeric probability
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        for start in range(0, self.size, READ_BLOCK):
+            block = self.records[start:min(start + READ_BLOCK, self.size)]
+            rows = zip(block["source"].tolist(), block["target"].tolist(),
+                       block["probability"].tolist(), block["label"].tolist())
+            for position, (source, target, probability, label) in enumerate(rows, start):
+                probability = self.expressions.get(position, probability)
+                label = self.labels[label] if label >= 0 else None
+                yield Edge(source, target, probability, label, encoded=True)
+
+    def __repr__(self):
+        return str(self)
+
+    def __str__(self):
+        return "EdgeStore of {} edges".format(self.size)
+
+    def add(self, edge: Edge):
+        """
+        Appends given encoded Edge.
+
+        :param edge: given Edge
+        """
+        if self.size == len(self.records):
+            records = self.buffers.allocate("edges", 2 * len(self.records), EDGE_DTYPE)
+            records[:self.size] = self.records[:self.size]
+            self.records = records
+
+        label = -1 if edge.label is None else self._label_code(edge.label)
+
+        if isinstance(edge.probability, (int, float)):
+            probability = edge.probability
+        else:
+            self.expressions[self.size] = edge.probability
+            probability = np.nan
+
+        self.records[self.size] = (edge.source, edge.target, probability, label)
+        self.size += 1
+
+    def update(self, edges):
+        for edge in edges:
+            self.add(edge)
+
+    def to_records(self):
+        """
+        :return: records of stored Edges, list of labels and non-numeric probabilities
+        """
+        return self.records[:self.size], self.labels, self.expressions
+
+    def extend_records(self, records: np.array, labels: list, expressions: dict):
+        """
+        Appends Edges in bulk (e.g. from a checkpoint).
+
+        :param records: array of EDGE_DTYPE records
+        :param labels: labels referenced by the records
+        :param expressions: position -> non-numeric probability (positions relative to the records)
+        """
+        codes = np.array([self._label_code(label) for label in labels] + [-1], dtype=np.int32)
+        size = self.size + len(records)
+        if size > len(self.records):
+            new_records = self.buffers.allocate("edges", max(size, 2 * len(self.records)), EDGE_DTYPE)
+            new_records[:self.size] = self.records[:self.size]
+            self.records = new_records
+        self.records[self.size:size] = records
+        self.records["label"][self.size:size] = codes[records["label"]]
+        self.expressions.update({self.size + position: value for position, value in expressions.items()})
+        self.size = size
+
+    def _label_code(self, label):
+        if label not in self.label_codes:
+            self.label_codes[label] = len(self.labels)
+            self.labels.append(label)
+        return self.label_codes[label]
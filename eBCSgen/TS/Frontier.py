@@ -0,0 +1,85 @@
+import heapq
+import itertools
+from collections import deque
+
+STRATEGIES = ("bfs", "dfs", "priority")
+
+
+class Frontier:
+    """
+    Collection of unprocessed States which are handed out in the order given by the exploration strategy:
+
+    - "bfs" - first discovered State is processed first (breadth-first search)
+    - "dfs" - last discovered State is processed first (depth-first search)
+    - "priority" - State with the lowest value of given key is processed first
+
+    Every State is present at most once, the collection mimics the interface of set used before.
+    """
+    def __init__(self, states=(), strategy: str = "bfs", key=None):
+        if strategy not in STRATEGIES:
+            raise ValueError("Unknown frontier strategy '{}', use one of {}.".format(strategy, ", ".join(STRATEGIES)))
+        if strategy == "priority" and key is None:
+            raise ValueError("Priority frontier strategy requires a key function.")
+
+        self.strategy = strategy
+        self.key = key
+        self._members = set()
+        self._queue = [] if strategy == "priority" else deque()
+        self._counter = itertools.count()  # keeps priority queue stable for equal keys
+        self.update(states)
+
+    def __len__(self):
+        return len(self._members)
+
+    def __contains__(self, state):
+        return state in self._members
+
+    def __iter__(self):
+        if self.strategy == "priority":
+            return iter([item[-1] for item in sorted(self._queue)])
+        return iter(list(self._queue))
+
+    def __repr__(self):
+        return str(self)
+
+    def __str__(self):
+        return "Frontier(" + self.strategy + "): " + str(list(self))
+
+    def add(self, state):
+        """
+        Adds the State to the frontier (if not already present).
+
+        :param state: given State
+        """
+        if state not in self._members:
+            self._members.add(state)
+            if self.strategy == "priority":
+                heapq.heappush(self._queue, (self.key(state), next(self._counter), state))
+            else:
+                self._queue.append(state)
+
+    def update(self, states):
+        """
+        Adds all given States to the frontier.
+
+        :param states: iterable of States
+        """
+        for state in states:
+            self.add(state)
+
+    def pop(self):
+        """
+        Removes and returns the next State according to the strategy.
+
+        :return: next State to be processed
+        """
+        if not self._members:
+            raise KeyError("pop from an empty frontier")
+        if self.strategy == "bfs":
+            state = self._queue.popleft()
+        elif self.strategy == "dfs":
+            state = self._queue.pop()
+        else:
+            state = heapq.heappop(self._queue)[-1]
+        self._members.remove(state)
+        return state
@@ -0,0 +1,430 @@
+import multiprocessing
+import threading
+import time
+
+from eBCSgen.TS.Checkpoint import save_checkpoint
+from eBCSgen.TS.Edge import Edge
+from eBCSgen.TS.TSworker import TSworker, PROCESS_CHUNK_SIZE, init_process_worker, explore_partition
+
+
+class Scheduler:
+    """
+    Work queue shared by TSworkers during Transition system generating.
+
+    Workers block on a condition variable until a State is available, no polling is involved.
+    The exploration terminates precisely when the frontier is empty and no worker is processing a State
+    (since only those can produce new States). The limits on time and size are checked every time a State
+    is handed out, and the controlling thread is woken up exactly at the deadline.
+    """
+    def __init__(self, ts, max_time: float, max_size: float):
+        self.ts = ts
+        self.max_size = max_size
+        self.deadline = time.time() + max_time
+
+        self.condition = threading.Condition()
+        self.busy = 0  # number of States currently processed by workers
+        self.hints = dict()  # unprocessed State -> hint on its parent (see explore_incrementally)
+        self.monitor = None  # observer of discovered States (see ReachabilityMonitor)
+        self.finished = False
+        self.error = None
+
+        self.period = None  # interval of periodic action (see periodic)
+        self.next_period = float("inf")
+
+    def remaining_time(self):
+        """
+        :return: time until deadline (None if unlimited)
+        """
+        return None if self.deadline == float("inf") else max(self.deadline - time.time(), 0)
+
+    def size(self) -> int:
+        """
+        :return: number of processed (or currently processed) States
+        """
+        return len(self.ts.states) + len(self.ts.states_encoding)
+
+    def within_limits(self) -> bool:
+        return time.time() < self.deadline and self.size() < self.max_size
+
+    def pop_state(self):
+        """
+        Takes next State from the frontier and marks it as processed.
+        Has to be called with the lock held.
+
+        :return: State to be processed
+        """
+        state = self.ts.unprocessed.pop()
+        self.ts.states.add(state)
+        return state
+
+    def store_edges(self, state, edges, hints=None):
+        """
+        Stores outgoing Edges of a processed State and enqueues newly discovered States.
+        Has to be called with the lock held.
+
+        :param state: processed State
+        :param edges: set of outgoing Edges
+        :param hints: dict successor -> hint
+        """
+        for edge in edges:
+            if edge.target not in self.ts.states:
+                self.ts.unprocessed.add(edge.target)
+                if hints and edge.target in hints:
+                    self.hints[edge.target] = hints[edge.target]
+                self.ts.unique_complexes.update(set(edge.target.content.value))
+            self.observe(state, edge.target, edge.target)
+            self.ts.edges.add(edge)
+
+    def return_state(self, state):
+        """
+        Returns State which was not processed back to the frontier.
+        Has to be called with the lock held.
+
+        :param state: given State
+        """
+        self.ts.states.discard(state)
+        self.ts.unprocessed.add(state)
+
+    def observe(self, source, key, state):
+        """
+        Passes discovered State to the monitor, the exploration stops when the monitor is satisfied.
+        States which got within the depth bound of the monitor are returned to the frontier.
+        Has to be called with the lock held.
+
+        :param source: key of the parent State
+        :param key: key of the discovered State
+        :param state: the discovered State
+        """
+        if self.monitor is None:
+            return
+        if self.monitor.discover(source, key, state):
+            self.finished = True
+        while self.monitor.reopened:
+            self.reopen(self.monitor.reopened.pop())
+
+    def reopen(self, key):
+        """
+        Returns already processed (not expanded) State to the frontier.
+        Has to be called with the lock held.
+
+        :param key: key of the State
+        """
+        self.return_state(key)
+
+    def limit_depth(self, states: list) -> list:
+        """
+        Drops States at the depth bound of the monitor, they are kept as processed without outgoing Edges
+        (unless a shorter path reopens them, see ReachabilityMonitor.relax). The exploration goes on
+        until the frontier is empty.
+        Has to be called with the lock held.
+
+        :param states: States handed out by take
+        :return: States within the depth bound
+        """
+        if self.monitor is None:
+            return states
+        within = []
+        for state in states:
+            key = self.hint_key(state)
+            if self.monitor.expandable(key):
+                within.append(state)
+            else:
+                self.monitor.limit(key)
+                self.drop_state(state)
+                self.busy -= 1
+        if len(within) < len(states):
+            self.condition.notify_all()
+        return within
+
+    def drop_state(self, state):
+        """
+        Marks State handed out by take as processed without storing any Edges.
+        Has to be called with the lock held.
+
+        :param state: given State
+        """
+        pass
+
+    def periodic(self):
+        """
+        Action performed every self.period seconds during the exploration.
+        Is called with the lock held, so workers are paused meanwhile.
+        """
+        pass
+
+    def finalize(self):
+        """
+        Action performed when the exploration is over.
+        """
+        pass
+
+    def tick(self):
+        """
+        Performs the periodic action if its time has come.
+        Has to be called with the lock held.
+        """
+        if time.time() >= self.next_period:
+            self.periodic()
+            self.next_period = time.time() + self.period
+
+    def stop(self):
+        with self.condition:
+            self.finished = True
+            self.condition.notify_all()
+
+    def take(self, number: int = 1) -> list:
+        """
+        Hands out up to given number of States to be processed, blocks if there is none at the moment.
+
+        :param number: maximal number of States
+        :return: list of States to be processed (empty when the exploration is over)
+        """
+        with self.condition:
+            while not self.finished:
+                if not self.within_limits():
+                    self.finished = True
+                elif self.ts.unprocessed:
+                    number = int(min(number, len(self.ts.unprocessed), self.max_size - self.size()))
+                    self.busy += number
+                    states = self.limit_depth([self.pop_state() for _ in range(number)])
+                    if states:
+                        return states
+                elif self.busy == 0:
+                    # nothing to process and nobody can produce new States
+                    self.finished = True
+                else:
+                    self.condition.wait(self.remaining_time())
+            self.condition.notify_all()
+            return []
+
+    def take_batch(self, number: int = None) -> list:
+        """
+        Hands out up to given number of States without blocking (respecting the size limit).
+
+        :param number: maximal number of States (all unprocessed States by default)
+        :return: list of States to be processed
+        """
+        with self.condition:
+            if self.finished or not self.within_limits():
+                return []
+            available = len(self.ts.unprocessed)
+            number = int(min(available if number is None else number, available, self.max_size - self.size()))
+            self.busy += number
+            return [self.pop_state() for _ in range(number)]
+
+    def finish(self, state, edges, hints=None):
+        """
+        Stores outgoing Edges of a processed State and enqueues newly discovered States.
+
+        :param state: processed State
+        :param edges: set of outgoing Edges
+        :param hints: dict successor -> hint (see explore_incrementally)
+        """
+        with self.condition:
+            self.store_edges(state, edges, hints)
+            self.busy -= 1
+            self.condition.notify_all()
+
+    def hint_key(self, state):
+        """
+        :param state: State handed out by take
+        :return: key of the State in self.hints
+        """
+        return state
+
+    def claim_hints(self, states) -> list:
+        """
+        Removes and returns hints of States handed out by take.
+
+        :param states: given States
+        :return: list of hints (None if not available)
+        """
+        with self.condition:
+            return [self.hints.pop(self.hint_key(state), None) for state in states]
+
+    def release(self, states):
+        """
+        Returns States which were handed out but not processed.
+
+        :param states: given States
+        """
+        with self.condition:
+            for state in states:
+                self.return_state(state)
+                self.busy -= 1
+            self.condition.notify_all()
+
+    def fail(self, error: Exception):
+        """
+        Stops the exploration because of an error in a worker, the error is re-raised by run.
+
+        :param error: raised exception
+        """
+        with self.condition:
+            self.error = error
+            self.busy -= 1
+            self.finished = True
+            self.condition.notify_all()
+
+    def wait(self):
+        """
+        Blocks until the exploration is over, enforcing the time limit.
+        """
+        with self.condition:
+            if self.period:
+                self.next_period = time.time() + self.period
+            while not self.finished:
+                self.tick()
+                if time.time() >= self.deadline:
+                    self.finished = True
+                    self.condition.notify_all()
+                elif self.period:
+                    self.condition.wait(max(min(self.deadline, self.next_period) - time.time(), 0))
+                else:
+                    self.condition.wait(self.remaining_time())
+
+    def run(self, reactions, definitions, regulation, workers: int, stoichiometry=None, graph=None, symmetry=None):
+        """
+        Explores the Transition system using given number of TSworkers.
+
+        :param reactions: reactions (resp. rules) of the model
+        :param definitions: model.definitions
+        :param regulation: model.regulation
+        :param workers: number of worker threads
+        :param stoichiometry: Stoichiometry of vector reactions used to explore States in batches
+        :param graph: DependencyGraph of vector reactions used to reuse values from parent States
+        :param symmetry: Symmetry used to reduce the Transition system
+        """
+        threads = [TSworker(self, reactions, definitions, regulation, stoichiometry, graph, symmetry)
+                   for _ in range(workers)]
+        for thread in threads:
+            thread.start()
+
+        try:
+            self.wait()
+        # probably should be changed to a different exceptions for the case when the execution is stopped on Galaxy
+        # then also the ts should be exported to appropriate file
+        except (KeyboardInterrupt, EOFError) as e:
+            self.stop()
+
+        for thread in threads:
+            thread.join()
+
+        if self.error:
+            raise self.error
+        self.finalize()
+
+    def run_processes(self, reactions, definitions, regulation, workers: int, stoichiometry=None, symmetry=None):
+        """
+        Explores the Transition system using a pool of worker processes.
+
+        In every round all unprocessed States are split into equal-sized chunks (at most PROCESS_CHUNK_SIZE States,
+        at least one chunk for each worker) which are handed out to the worker processes as they become idle.
+        The resulting Edges are merged back by the calling process, which also takes care of deduplication.
+
+        Limits are checked whenever a chunk of results is merged, States which were not processed
+        in time are returned to the frontier.
+
+        :param reactions: reactions (resp. rules) of the model
+        :param definitions: model.definitions
+        :param regulation: model.regulation
+        :param workers: number of worker processes
+        :param stoichiometry: Stoichiometry of vector reactions used to explore States in batches
+        :param symmetry: Symmetry used to reduce the Transition system
+        """
+        pending = set()
+        if self.period:
+            self.next_period = time.time() + self.period
+        with multiprocessing.Pool(workers, initializer=init_process_worker,
+                                  initargs=(reactions, definitions, regulation, self.ts.bound, stoichiometry,
+                                            symmetry)) as pool:
+            try:
+                while True:
+                    batch = self.take_batch()
+                    if not batch:
+                        break
+
+                    size = max(1, min(PROCESS_CHUNK_SIZE, -(-len(batch) // workers)))
+                    chunks = [batch[i:i + size] for i in range(0, len(batch), size)]
+                    pending = set(batch)
+
+                    for results in pool.imap_unordered(explore_partition, chunks):
+                        for state, edges in results:
+                            pending.discard(state)
+                            self.finish(state, edges)
+                        with self.condition:
+                            # in-flight States are returned to the frontier by the periodic action if needed
+                            self.tick()
+                        if not self.within_limits():
+                            break
+                    self.release(pending)
+                    pending = set()
+            except (KeyboardInterrupt, EOFError) as e:
+                self.release(pending)
+        self.stop()
+        self.finalize()
+
+
+class CompactScheduler(Scheduler):
+    """
+    Scheduler for Transition system generating backed by StateStore (ts.store).
+
+    States are identified by their codes assigned by the store at the time of discovery,
+    the frontier contains codes only and the Edges are stored already encoded.
+    """
+    def __init__(self, ts, max_time: float, max_size: float, checkpoint: str = None,
+                 checkpoint_interval: float = None):
+        super().__init__(ts, max_time, max_size)
+        self.in_progress = dict()  # State -> code
+
+        self.checkpoint = checkpoint
+        if checkpoint:
+            self.period = checkpoint_interval
+
+    def frontier(self) -> list:
+        """
+        Has to be called with the lock held.
+
+        :return: codes of States to be processed including those currently processed
+        """
+        return list(self.in_progress.values()) + list(self.ts.unprocessed)
+
+    def periodic(self):
+        save_checkpoint(self.ts, self.checkpoint, self.frontier())
+
+    def finalize(self):
+        if self.checkpoint:
+            with self.condition:
+                save_checkpoint(self.ts, self.checkpoint, self.frontier())
+
+    def size(self) -> int:
+        return len(self.ts.store) - len(self.ts.unprocessed)
+
+    def pop_state(self):
+        code = self.ts.unprocessed.pop()
+        state = self.ts.store[code]
+        self.in_progress[state] = code
+        return state
+
+    def store_edges(self, state, edges, hints=None):
+        source = self.in_progress.pop(state)
+        for edge in edges:
+            target, new = self.ts.store.insert(edge.target)
+            if new:
+                self.ts.unprocessed.add(target)
+                if hints and edge.target in hints:
+                    self.hints[target] = hints[edge.target]
+            self.observe(source, target, edge.target)
+            self.ts.edges.add(Edge(source, target, edge.probability, edge.label, encoded=True))
+
+    def return_state(self, state):
+        self.ts.unprocessed.add(self.in_progress.pop(state))
+
+    def reopen(self, key):
+        self.ts.unprocessed.add(key)
+
+    def drop_state(self, state):
+        self.in_progress.pop(state)
+
+    def hint_key(self, state):
+        return self.in_progress[state]
@@ -0,0 +1,341 @@
+from collections.abc import MutableMapping
+from copy import copy
+
+import os
+import tempfile
+from collections import OrderedDict
+
+import numpy as np
+
+from eBCSgen.TS.State import State, Memory, Vector
+
+MIN_CAPACITY = 1024
+MAX_LOAD = 0.5
+CACHE_SIZE = 100000
+
+HASH_SEED = 42
+
+
+def packing_dtype(bound: int):
+    """
+    Finds the smallest unsigned integer type which can hold all values up to bound.
+    The maximal value of the type is reserved for the special "hell" state.
+
+    :param bound: maximal allowed value
+    :return: numpy dtype
+    """
+    for dtype in (np.uint8, np.uint16, np.uint32):
+        if bound < np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.uint64)
+
+
+def hash_multipliers(dimension: int) -> np.array:
+    """
+    Creates fixed odd multipliers for hashing, which makes the hash deterministic across processes.
+
+    :param dimension: length of packed rows
+    :return: array of multipliers
+    """
+    random_state = np.random.RandomState(HASH_SEED)
+    return random_state.randint(1, 2 ** 62, size=dimension, dtype=np.int64).astype(np.uint64) * np.uint64(2) + np.uint64(1)
+
+
+def hash_rows(rows: np.array, memory_ids: np.array, multipliers: np.array) -> np.array:
+    """
+    Computes (deterministic) hash of given packed states.
+
+    :param rows: 2D array of packed values
+    :param memory_ids: codes of interned Memory for each row
+    :param multipliers: multipliers obtained by hash_multipliers
+    :return: array of hashes
+    """
+    hashes = (rows.astype(np.uint64) * multipliers).sum(axis=1, dtype=np.uint64)
+    hashes ^= memory_ids.astype(np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+    hashes ^= hashes >> np.uint64(29)
+    return (hashes & np.uint64(2 ** 63 - 1)).astype(np.int64)
+
+
+class StateStore:
+    """
+    Compact storage of vector States used during Transition system generating.
+
+    Values of each State are packed to the smallest sufficient unsigned integer type and stored as a row
+    in one contiguous buffer, Memory is interned and referenced by its code. Rows are indexed by an open-addressing
+    hash table (with linear probing), the code of a State (starting from 1) is assigned at insertion time
+    and corresponds to the row index.
+    """
+    def __init__(self, dimension: int, bound: int, capacity: int = MIN_CAPACITY):
+        self.dimension = dimension
+        self.bound = bound
+        self.dtype = packing_dtype(bound)
+        self.hell_value = np.iinfo(self.dtype).max
+        self.multipliers = hash_multipliers(dimension)
+
+        self.size = 0
+        self.rows = self._allocate("rows", (capacity, self.dimension), self.dtype)
+        self.memory_ids = self._allocate("memory_ids", capacity, np.int32)
+        self.hashes = self._allocate("hashes", capacity, np.int64)
+        self.table = self._allocate("table", self._table_size(capacity), np.int64)
+
+        self.memories = []  # code -> Memory
+        self.memory_codes = dict()  # (level, history) -> code
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, state):
+        return self.lookup(state) is not None
+
+    def __getitem__(self, code: int) -> State:
+        """
+        Reconstructs State with given code.
+
+        :param code: given code
+        :return: decoded State
+        """
+        if not 0 < code <= self.size:
+            raise KeyError(code)
+        row = self.rows[code - 1]
+        if row[0] == self.hell_value:
+            return State(Vector(np.full(self.dimension, np.inf)), Memory(0), True)
+        return State(Vector(row.astype(np.int64)), copy(self.memories[self.memory_ids[code - 1]]))
+
+    def __iter__(self):
+        return iter(range(1, self.size + 1))
+
+    def _allocate(self, name, shape, dtype):
+        """
+        Allocates zeroed buffer of given name.
+
+        :param name: name of the buffer
+        :param shape: shape of the buffer
+        :param dtype: type of values
+        :return: allocated array
+        """
+        return np.zeros(shape, dtype=dtype)
+
+    @staticmethod
+    def _table_size(capacity):
+        size = MIN_CAPACITY
+        while size * MAX_LOAD < capacity:
+            size *= 2
+        return size
+
+    def nbytes(self) -> int:
+        """
+        :return: number of bytes used by the buffers
+        """
+        return self.rows.nbytes + self.memory_ids.nbytes + self.hashes.nbytes + self.table.nbytes
+
+    def intern_memory(self, memory: Memory) -> int:
+        key = (memory.level, tuple(memory.history))
+        if key not in self.memory_codes:
+            self.memory_codes[key] = len(self.memories)
+            self.memories.append(copy(memory))
+        return self.memory_codes[key]
+
+    def pack(self, state: State):
+        """
+        Packs given State to a row of values and code of its Memory.
+
+        :param state: given State
+        :return: packed row and Memory code
+        """
+        if state.is_hell:
+            return np.full(self.dimension, self.hell_value, dtype=self.dtype), 0
+        values = state.content.value
+        if len(values) and (values.min() < 0 or values.max() >= self.hell_value):
+            raise ValueError("State {} cannot be packed with bound {}.".format(state, self.bound))
+        return values.astype(self.dtype), self.intern_memory(state.memory)
+
+    def _probe(self, row, memory_id, hash_value):
+        """
+        Finds slot of the hash table where the row is stored or should be stored.
+
+        :return: position in the table and code of found State (0 if not present)
+        """
+        mask = len(self.table) - 1
+        position = hash_value & mask
+        while True:
+            code = int(self.table[position])
+            if code == 0:
+                return position, 0
+            index = code - 1
+            if self.hashes[index] == hash_value and self.memory_ids[index] == memory_id \
+                    and np.array_equal(self.rows[index], row):
+                return position, code
+            position = (position + 1) & mask
+
+    def lookup(self, state: State):
+        """
+        Finds code of given State.
+
+        :param state: given State
+        :return: code of the State or None if not present
+        """
+        row, memory_id = self.pack(state)
+        hash_value = int(hash_rows(row[np.newaxis], np.array([memory_id]), self.multipliers)[0])
+        _, code = self._probe(row, memory_id, hash_value)
+        return code if code else None
+
+    def insert(self, state: State):
+        """
+        Inserts given State (if not present yet).
+
+        :param state: given State
+        :return: code of the State and flag whether it was newly inserted
+        """
+        row, memory_id = self.pack(state)
+        hash_value = int(hash_rows(row[np.newaxis], np.array([memory_id]), self.multipliers)[0])
+        position, code = self._probe(row, memory_id, hash_value)
+        if code:
+            return code, False
+
+        if self.size == len(self.rows):
+            self._grow(2 * len(self.rows))
+        self.rows[self.size] = row
+        self.memory_ids[self.size] = memory_id
+        self.hashes[self.size] = hash_value
+        self.size += 1
+
+        if self.size > len(self.table) * MAX_LOAD:
+            self._rehash(2 * len(self.table))
+        else:
+            self.table[position] = self.size
+        return self.size, True
+
+    def extend(self, rows: np.array, memory_ids: np.array):
+        """
+        Appends packed rows in bulk (e.g. from a checkpoint), the rows are expected to be unique.
+
+        :param rows: 2D array of packed values
+        :param memory_ids: codes of interned Memory for each row
+        """
+        size = self.size + len(rows)
+        if size > len(self.rows):
+            self._grow(max(size, 2 * len(self.rows)))
+        self.rows[self.size:size] = rows
+        self.memory_ids[self.size:size] = memory_ids
+        self.hashes[self.size:size] = hash_rows(rows, memory_ids, self.multipliers)
+        self.size = size
+        self._rehash(self._table_size(size))
+
+    def _grow(self, capacity):
+        rows = self._allocate("rows", (capacity, self.dimension), self.dtype)
+        rows[:self.size] = self.rows[:self.size]
+        memory_ids = self._allocate("memory_ids", capacity, np.int32)
+        memory_ids[:self.size] = self.memory_ids[:self.size]
+        hashes = self._allocate("hashes", capacity, np.int64)
+        hashes[:self.size] = self.hashes[:self.size]
+        self.rows, self.memory_ids, self.hashes = rows, memory_ids, hashes
+
+    def _rehash(self, table_size):
+        self.table = self._allocate("table", table_size, np.int64)
+        mask = table_size - 1
+        for index in range(self.size):
+            position = int(self.hashes[index]) & mask
+            while self.table[position] != 0:
+                position = (position + 1) & mask
+            self.table[position] = index + 1
+
+
+class MappedBuffers:
+    """
+    Allocates buffers as memory-mapped files in given directory.
+
+    Each reallocation of a buffer creates a new file, the file of the replaced buffer is removed
+    (its content remains accessible as long as it is mapped).
+    """
+    def __init__(self, directory: str, prefix: str):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = tempfile.mkdtemp(prefix=prefix, dir=directory)
+        self.files = dict()  # name -> path of current file
+        self.counter = 0
+
+    def allocate(self, name, shape, dtype):
+        """
+        Creates zeroed memory-mapped buffer of given name.
+
+        :param name: name of the buffer
+        :param shape: shape of the buffer
+        :param dtype: type of values
+        :return: memory-mapped array
+        """
+        self.counter += 1
+        path = os.path.join(self.directory, "{}.{}.dat".format(name, self.counter))
+        buffer = np.memmap(path, dtype=dtype, mode="w+", shape=shape)
+        if name in self.files:
+            os.remove(self.files[name])
+        self.files[name] = path
+        return buffer
+
+
+class MappedStateStore(StateStore):
+    """
+    StateStore with all buffers stored in memory-mapped files under given working directory,
+    which allows to handle state spaces larger than available memory.
+
+    Decoded States are kept in a bounded LRU cache of hot States.
+    """
+    def __init__(self, directory: str, dimension: int, bound: int, capacity: int = MIN_CAPACITY,
+                 cache_size: int = CACHE_SIZE):
+        self.buffers = MappedBuffers(directory, "states_")
+        self.cache = OrderedDict()  # code -> State
+        self.cache_size = cache_size
+        super().__init__(dimension, bound, capacity)
+
+    def _allocate(self, name, shape, dtype):
+        return self.buffers.allocate(name, shape, dtype)
+
+    def __getitem__(self, code: int) -> State:
+        if code in self.cache:
+            self.cache.move_to_end(code)
+            state = self.cache[code]
+        else:
+            state = super().__getitem__(code)
+            self.cache[code] = state
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        # cached State must not be modified by the caller
+        return State(Vector(copy(state.content.value)), copy(state.memory), state.is_hell)
+
+
+class StoreEncoding(MutableMapping):
+    """
+    Read-only view of StateStore in the format of TransitionSystem.states_encoding (code -> State).
+
+    States are decoded on access. Explicitly assigned States (e.g. by TransitionSystem.change_hell)
+    are kept aside and take precedence over the store.
+    """
+    def __init__(self, store: StateStore):
+        self.store = store
+        self.overrides = dict()
+
+    def __getitem__(self, code):
+        if code in self.overrides:
+            if self.overrides[code] is None:
+                raise KeyError(code)
+            return self.overrides[code]
+        return self.store[code]
+
+    def __setitem__(self, code, state):
+        self.overrides[code] = state
+
+    def __delitem__(self, code):
+        self[code]  # raises KeyError if not present
+        self.overrides[code] = None
+
+    def __iter__(self):
+        for code in self.store:
+            if self.overrides.get(code, True) is not None:
+                yield code
+
+    def __len__(self):
+        return len(self.store) - sum(1 for state in self.overrides.values() if state is None)
+
+    def __repr__(self):
+        return str(self)
+
+    def __str__(self):
+        return str(dict(self.items()))
@@ -0,0 +1,113 @@
+import numpy as np
+
+BATCH_SIZE = 64
+MAX_BLOCK = 2 ** 22  # maximal number of elements compared at once in enabledness check
+
+
+class Stoichiometry:
+    """
+    Reactant/product stoichiometry matrices of vector reactions.
+
+    Rows correspond to reactions (in the given order), columns to agents of the ordering.
+    Allows to compute enabledness, successor vectors and bound violations for a whole batch of states
+    using array operations.
+    """
+    def __init__(self, reactions):
+        self.reactions = list(reactions)
+        dimension = len(self.reactions[0].source.content) if self.reactions else 0
+
+        self.reactants = np.array([reaction.source.content.value for reaction in self.reactions]).reshape(-1, dimension)
+        self.products = np.array([reaction.target.content.value for reaction in self.reactions]).reshape(-1, dimension)
+        self.change = self.products - self.reactants
+
+        # only agents which are consumed by some reaction can disable it
+        self.support = np.flatnonzero((self.reactants > 0).any(axis=0))
+
+    def __len__(self):
+        return len(self.reactions)
+
+    def enabled(self, rows: np.array) -> np.array:
+        """
+        Checks which reactions are enabled in given states.
+
+        :param rows: 2D array of state vectors
+        :return: 2D boolean array (states x reactions)
+        """
+        reactants = self.reactants[:, self.support]
+        rows = rows[:, self.support]
+        block = max(1, MAX_BLOCK // max(1, reactants.size))
+
+        enabled = np.empty((len(rows), len(self.reactions)), dtype=bool)
+        for start in range(0, len(rows), block):
+            chunk = rows[start:start + block, np.newaxis, :]
+            enabled[start:start + block] = (chunk >= reactants[np.newaxis]).all(axis=2)
+        return enabled
+
+    def enabled_pairs(self, rows: np.array, states: np.array, reactions: np.array) -> np.array:
+        """
+        Checks enabledness of given pairs of states and reactions only.
+
+        :param rows: 2D array of state vectors
+        :param states: indices of states
+        :param reactions: indices of reactions
+        :return: boolean array
+        """
+        block = max(1, MAX_BLOCK // max(1, len(self.support)))
+        enabled = np.empty(len(states), dtype=bool)
+        for start in range(0, len(states), block):
+            selected = slice(start, start + block)
+            values = rows[states[selected]][:, self.support]
+            enabled[selected] = (values >= self.reactants[reactions[selected]][:, self.support]).all(axis=1)
+        return enabled
+
+    @property
+    def numeric(self) -> np.array:
+        """
+        :return: boolean array marking reactions with compiled numeric rate
+        """
+        return np.array([reaction.compiled_rate is not None and not reaction.compiled_rate.is_symbolic
+                         for reaction in self.reactions], dtype=bool)
+
+    def successors(self, rows: np.array, enabled: np.array):
+        """
+        Computes successors of given states by enabled reactions.
+
+        :param rows: 2D array of state vectors
+        :param enabled: 2D boolean array obtained by enabled
+        :return: indices of source states, indices of reactions and 2D array of successor vectors
+        """
+        states, reactions = np.nonzero(enabled)
+        return states, reactions, rows[states] + self.change[reactions]
+
+    def evaluate_rates(self, rows: np.array, states: np.array, reactions: np.array):
+        """
+        Evaluates compiled numeric rates (see VectorReaction.compile_rate) of given pairs of states and reactions,
+        each reaction is evaluated for all its states at once.
+
+        :param rows: 2D array of state vectors
+        :param states: indices of states
+        :param reactions: indices of reactions
+        :return: array of values (nan if undefined) and boolean array marking pairs with a numeric rate
+        """
+        values = np.full(len(states), np.nan)
+        numeric = np.zeros(len(states), dtype=bool)
+        for index, reaction in enumerate(self.reactions):
+            rate = reaction.compiled_rate
+            if rate is None or rate.is_symbolic:
+                continue
+            selected = reactions == index
+            if selected.any():
+                values[selected] = rate.evaluate_batch(rows[states[selected]])
+                numeric[selected] = True
+        return values, numeric
+
+    @staticmethod
+    def exceeds(successors: np.array, bound) -> np.array:
+        """
+        Checks which successors violate given bound (and hence are replaced by the "hell" state).
+
+        :param successors: 2D array of successor vectors
+        :param bound: maximal allowed value
+        :return: boolean array
+        """
+        return ~(successors <= bound).all(axis=1)
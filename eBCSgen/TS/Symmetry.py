@@ -0,0 +1,161 @@
+import numpy as np
+import sympy
+
+from eBCSgen.Core.Rate import STATE_VECTOR
+from eBCSgen.TS.State import State, Vector
+
+
+class Symmetry:
+    """
+    Symmetry reduction of a vector model given by classes of interchangeable agents.
+
+    Agents are interchangeable if swapping their values maps the set of reactions (including their rates
+    and labels) onto itself. The symmetry group is then a product of full symmetric groups over the classes
+    and each State is represented by its canonical form - values within every class sorted in descending order.
+    The reduced TS is the quotient of the original one (states of an orbit are lumped together), which preserves
+    all properties whose APs do not distinguish agents within a class (see refine).
+    """
+    def __init__(self, classes):
+        self.classes = [sorted(map(int, agents)) for agents in classes if len(agents) > 1]
+
+    def __bool__(self):
+        return bool(self.classes)
+
+    def __eq__(self, other: 'Symmetry'):
+        return isinstance(other, Symmetry) and sorted(self.classes) == sorted(other.classes)
+
+    def __str__(self):
+        return "Symmetry(" + str(self.classes) + ")"
+
+    def __repr__(self):
+        return str(self)
+
+    def canonical(self, values: np.array) -> np.array:
+        """
+        :param values: given vector of values
+        :return: canonical representative of the orbit of the vector
+        """
+        values = values.copy()
+        for agents in self.classes:
+            values[agents] = np.sort(values[agents])[::-1]
+        return values
+
+    def reduce(self, state: State) -> State:
+        """
+        :param state: given State
+        :return: canonical representative of the State
+        """
+        if state.is_hell or not self.classes:
+            return state
+        return State(Vector(self.canonical(state.content.value)), state.memory)
+
+    def refine(self, index_sets) -> 'Symmetry':
+        """
+        Splits the classes so that given sets of agents (e.g. used by APs) are preserved by the symmetry.
+
+        :param index_sets: iterable of sets of agent indices
+        :return: refined Symmetry
+        """
+        classes = [set(agents) for agents in self.classes]
+        for indices in index_sets:
+            indices = set(indices)
+            refined = []
+            for agents in classes:
+                refined += [part for part in (agents & indices, agents - indices) if part]
+            classes = refined
+        return Symmetry(classes)
+
+    def to_dict(self, ordering) -> dict:
+        """
+        Describes the reduction (used in the TS output).
+
+        :param ordering: ordering of the TS
+        :return: dict representing the reduction
+        """
+        return {'type': 'symmetry', 'classes': [[str(ordering[i]) for i in agents] for agents in self.classes]}
+
+    @staticmethod
+    def from_dict(data: dict, ordering) -> 'Symmetry':
+        """
+        Creates Symmetry from its description created by to_dict.
+
+        :param data: given dict
+        :param ordering: ordering of the TS
+        :return: Symmetry
+        """
+        names = list(map(str, ordering))
+        return Symmetry([[names.index(agent) for agent in agents] for agents in data['classes']])
+
+    @staticmethod
+    def find(reactions, dimension: int) -> 'Symmetry':
+        """
+        Finds classes of interchangeable agents of given vector reactions with compiled rates
+        (see VectorReaction.compile_rate).
+
+        Only transpositions of agents with the same stoichiometric profile are checked, the classes are formed
+        as connected components of valid transpositions.
+
+        :param reactions: vector reactions
+        :param dimension: number of agents
+        :return: found Symmetry
+        """
+        reactions = list(reactions)
+        index = dict()
+        for reaction in reactions:
+            index.setdefault(reaction_key(reaction, np.arange(dimension)), []).append(reaction)
+
+        profiles = [sorted((reaction.source.content.value[i], reaction.target.content.value[i])
+                           for reaction in reactions) for i in range(dimension)]
+
+        components = list(range(dimension))  # union-find
+
+        def find(i):
+            while components[i] != i:
+                components[i] = components[components[i]]
+                i = components[i]
+            return i
+
+        for i in range(dimension):
+            for j in range(i + 1, dimension):
+                if profiles[i] != profiles[j] or find(i) == find(j):
+                    continue
+                if is_automorphism(reactions, index, i, j, dimension):
+                    components[find(j)] = find(i)
+
+        classes = dict()
+        for i in range(dimension):
+            classes.setdefault(find(i), []).append(i)
+        return Symmetry(classes.values())
+
+
+def reaction_key(reaction, permutation: np.array) -> tuple:
+    return (tuple(reaction.source.content.value[permutation]), tuple(reaction.target.content.value[permutation]),
+            reaction.label)
+
+
+def is_automorphism(reactions: list, index: dict, i: int, j: int, dimension: int) -> bool:
+    """
+    Checks whether transposition of agents i and j maps the reactions onto themselves.
+
+    :param reactions: vector reactions with compiled rates
+    :param index: reaction key -> list of reactions
+    :param i: first agent
+    :param j: second agent
+    :param dimension: number of agents
+    :return: True if the transposition is an automorphism
+    """
+    permutation = np.arange(dimension)
+    permutation[i], permutation[j] = j, i
+    swap = {STATE_VECTOR[i]: STATE_VECTOR[j], STATE_VECTOR[j]: STATE_VECTOR[i]}
+
+    for reaction in reactions:
+        images = index.get(reaction_key(reaction, permutation), [])
+        if reaction.compiled_rate is None:
+            if not any(image.compiled_rate is None for image in images):
+                return False
+            continue
+        expression = reaction.compiled_rate.expression.xreplace(swap)
+        if not any(image.compiled_rate is not None and
+                   sympy.expand(expression - image.compiled_rate.expression) == 0 for image in images):
+            return False
+    return True
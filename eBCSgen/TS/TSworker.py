@@ -1,89 +1,296 @@
 import threading
+from copy import copy
+
+import numpy as np
 
 from eBCSgen.TS.Edge import Edge
+from eBCSgen.TS.State import State, Memory, Vector
+from eBCSgen.TS.Stoichiometry import BATCH_SIZE
+
+PROCESS_CHUNK_SIZE = 256
 
 
 class TSworker(threading.Thread):
-    def __init__(self, ts, reactions, definitions, regulation):
+    def __init__(self, scheduler, reactions, definitions, regulation, stoichiometry=None, graph=None,
+                 symmetry=None):
         super(TSworker, self).__init__()
-        self.ts = ts  # resulting transition system
+        self.scheduler = scheduler  # shared work queue (see Scheduler)
         self.reactions = reactions
         self.definitions = definitions  # model.definitions
         self.regulation = regulation  # model.regulation
-
-        self.stop_request = threading.Event()
-        self.work = threading.Event()  # to control whether the Worker is supposed to work
+        self.stoichiometry = stoichiometry  # available for vector reactions only
+        self.graph = graph  # DependencyGraph of vector reactions
+        self.symmetry = symmetry  # Symmetry used to reduce the TS
 
     def run(self):
         """
-        Method takes a state from pool of states to be states and:
+        Method takes states from the scheduler (blocks until some are available) and:
 
-        - iteratively applies all rules on it
-        - checks whether newly created states (if any) were already states (present in self.ts.states_encoding);
-          if not, they are added to self.states_to_process
+        - iteratively applies all rules on them
         - creates Edge from the source state to created ones (since ts.edges is a set, we don't care about its presence)
         - all outgoing Edges from the state are normalised to probability
+        - hands the Edges back to the scheduler, which enqueues newly discovered states
+
+        With Stoichiometry given, a batch of states is taken and explored at once (see explore_batch).
+        With DependencyGraph given, values of unaffected reactions are taken from the parent state
+        (see explore_incrementally).
+
+        The worker terminates when the scheduler has no more work (or the limits were reached).
         """
-        while not self.stop_request.isSet():
-            self.work.wait()
+        number = BATCH_SIZE if self.stoichiometry else 1
+        while True:
+            states = self.scheduler.take(number)
+            if not states:
+                break
+            hints = [None] * len(states)
             try:
-                state = self.ts.unprocessed.pop()
-                self.ts.states.add(state)
-                unique_states = dict()
-
-                # special "hell" state
-                if state.is_hell:
-                    self.ts.edges.add(Edge(state, state, 1))
+                bound = self.scheduler.ts.bound
+                if self.graph is not None:
+                    results, hints = explore_incrementally(states, self.scheduler.claim_hints(states),
+                                                           self.stoichiometry, self.graph, self.definitions,
+                                                           self.regulation, bound, self.symmetry)
+                elif self.stoichiometry:
+                    results = explore_batch(states, self.stoichiometry, self.definitions, self.regulation, bound,
+                                            self.symmetry)
                 else:
-                    candidate_reactions = dict()
-                    for reaction in self.reactions:
-                        rate = reaction.evaluate_rate(state, self.definitions)
-                        matches = reaction.match(state, all=True)
-
-                        try:
-                            rate = rate if rate > 0 else None
-                        except TypeError:
-                            pass
-
-                        # drop rules which cannot be actually used (0 rate or no matches)
-                        if matches is not None and rate is not None:
-                            candidate_reactions[reaction] = (rate, matches)
-
-                    if self.regulation:
-                        candidate_reactions = self.regulation.filter(state, candidate_reactions)
-
-                    for reaction in candidate_reactions.keys():
-                        for match in candidate_reactions[reaction][1]:
-                            produced_agents = reaction.replace(match)
-                            match = reaction.reconstruct_complexes_from_match(match)
-                            new_state = state.update_state(match, produced_agents, reaction.label, self.ts.bound)
-
-                            if new_state not in self.ts.states:
-                                self.ts.unprocessed.add(new_state)
-                                self.ts.unique_complexes.update(set(new_state.content.value))
-
-                            # multiple arrows between two states are not allowed
-                            if new_state in unique_states:
-                                unique_states[new_state].add_rate(candidate_reactions[reaction][0])
-                            else:
-                                edge = Edge(state, new_state, candidate_reactions[reaction][0], reaction.label)
-                                unique_states[new_state] = edge
-
-                    edges = set(unique_states.values())
-
-                    # normalise
-                    factor = sum(list(map(lambda edge: edge.probability, edges)))
-                    if edges:
-                        for edge in edges:
-                            edge.normalise(factor)
-                            self.ts.edges.add(edge)
-                    else:
-                        # self loop to create correct DTMC
-                        self.ts.edges.add(Edge(state, state, 1, 'ε'))
-
-            except KeyError:
-                self.work.clear()
-
-    def join(self, timeout=None):
-        self.work.set()
-        self.stop_request.set()
+                    results = [explore_state(state, self.reactions, self.definitions, self.regulation, bound,
+                                             self.symmetry)
+                               for state in states]
+            except Exception as e:
+                self.scheduler.fail(e)
+                break
+            for state, edges, successor_hints in zip(states, results, hints):
+                self.scheduler.finish(state, edges, successor_hints)
+
+
+def explore_state(state, reactions, definitions, regulation, bound, symmetry=None) -> set:
+    """
+    Applies all reactions (resp. rules) on given state and creates outgoing Edges.
+
+    Multiple arrows between two states are joined and all outgoing Edges are normalised to probability.
+    The special "hell" state and states without any applicable reaction get a self loop.
+
+    :param state: given State
+    :param reactions: reactions (resp. rules) of the model
+    :param definitions: model.definitions
+    :param regulation: model.regulation
+    :param bound: maximal allowed bound on individual values
+    :param symmetry: Symmetry used to replace resulting states by their canonical representatives
+    :return: set of outgoing Edges
+    """
+    if state.is_hell:
+        return {Edge(state, state, 1)}
+
+    candidate_reactions = dict()
+    for reaction in reactions:
+        # cheap check before evaluating the rate and enumerating the matches
+        if not reaction.count_matches(state):
+            continue
+        rate = reaction.evaluate_rate(state, definitions)
+        matches = reaction.match(state, all=True)
+
+        try:
+            rate = rate if rate > 0 else None
+        except TypeError:
+            pass
+
+        # drop rules which cannot be actually used (0 rate or no matches)
+        if matches is not None and rate is not None:
+            candidate_reactions[reaction] = (rate, matches)
+
+    if regulation:
+        candidate_reactions = regulation.filter(state, candidate_reactions)
+
+    def apply(reaction, match):
+        produced_agents = reaction.replace(match)
+        match = reaction.reconstruct_complexes_from_match(match)
+        return state.update_state(match, produced_agents, reaction.label, bound)
+
+    return create_edges(state, candidate_reactions, apply, symmetry)
+
+
+def explore_batch(states: list, stoichiometry, definitions, regulation, bound, symmetry=None) -> list:
+    """
+    Applies vector reactions on a batch of states at once and creates their outgoing Edges.
+
+    Enabledness, successors, bound violations and compiled numeric rates are computed for the whole batch
+    using the Stoichiometry, only parametric rates of enabled reactions are evaluated individually.
+    The result is the same as by explore_state.
+
+    :param states: list of States
+    :param stoichiometry: Stoichiometry of vector reactions
+    :param definitions: model.definitions
+    :param regulation: model.regulation
+    :param bound: maximal allowed bound on individual values
+    :param symmetry: Symmetry used to replace resulting states by their canonical representatives
+    :return: list of sets of outgoing Edges (for each given state)
+    """
+    results, _ = explore_incrementally(states, [None] * len(states), stoichiometry, None,
+                                       definitions, regulation, bound, symmetry)
+    return results
+
+
+def explore_incrementally(states: list, hints: list, stoichiometry, graph, definitions, regulation, bound,
+                          symmetry=None):
+    """
+    Variant of explore_batch which reuses enabledness and rates of reactions from the parent state.
+
+    A hint of a state is a triple (enabled, rates, reaction) - enabledness and rates of all reactions
+    in its parent state and the index of the reaction which produced the state. Only reactions affected by
+    the reaction (see DependencyGraph) are re-checked, all other values are taken from the parent.
+
+    :param states: list of States
+    :param hints: list of hints (None if not available)
+    :param stoichiometry: Stoichiometry of vector reactions
+    :param graph: DependencyGraph of the reactions (None to compute no hints for successors)
+    :param definitions: model.definitions
+    :param regulation: model.regulation
+    :param bound: maximal allowed bound on individual values
+    :param symmetry: Symmetry used to replace resulting states by their canonical representatives
+        (hints are not valid for canonical states, hence graph has to be None)
+    :return: list of sets of outgoing Edges and list of dicts successor -> hint (for each given state)
+    """
+    results = [{Edge(state, state, 1)} if state.is_hell else None for state in states]
+    successor_hints = [dict() for _ in states]
+    regular = [index for index, state in enumerate(states) if not state.is_hell]
+    if not regular:
+        return results, successor_hints
+
+    rows = np.array([states[index].content.value for index in regular])
+    enabled = np.empty((len(regular), len(stoichiometry)), dtype=bool)
+    rates = np.full((len(regular), len(stoichiometry)), np.nan)
+    check = np.ones((len(regular), len(stoichiometry)), dtype=bool)
+
+    hinted = [position for position, index in enumerate(regular) if hints[index] is not None]
+    for position in hinted:
+        parent_enabled, parent_rates, reaction = hints[regular[position]]
+        enabled[position], rates[position] = parent_enabled, parent_rates
+        check[position] = graph.affected[reaction]
+
+    fresh = np.array([position for position in range(len(regular)) if hints[regular[position]] is None], dtype=int)
+    if len(fresh):
+        enabled[fresh] = stoichiometry.enabled(rows[fresh])
+    if hinted:
+        sources, reactions = np.nonzero(check[hinted])
+        sources = np.array(hinted)[sources]
+        enabled[sources, reactions] = stoichiometry.enabled_pairs(rows, sources, reactions)
+
+    # (re)evaluate rates of enabled reactions where needed
+    sources, reactions = np.nonzero(check & enabled)
+    rates[sources, reactions], _ = stoichiometry.evaluate_rates(rows, sources, reactions)
+
+    sources, reactions, successors = stoichiometry.successors(rows, enabled)
+    exceeded = stoichiometry.exceeds(successors, bound)
+    numeric = stoichiometry.numeric
+    # successors are ordered by source state, find boundaries for each state
+    boundaries = np.searchsorted(sources, np.arange(len(regular) + 1))
+
+    for position, index in enumerate(regular):
+        state = states[index]
+        candidate_reactions = dict()
+        successor_of = dict()
+        for k in range(boundaries[position], boundaries[position + 1]):
+            reaction = stoichiometry.reactions[reactions[k]]
+            if numeric[reactions[k]]:
+                rate = rates[position, reactions[k]]
+                rate = None if np.isnan(rate) else float(rate)
+            else:
+                rate = reaction.evaluate_rate(state, definitions)
+
+            try:
+                rate = rate if rate > 0 else None
+            except TypeError:
+                pass
+
+            if rate is not None:
+                candidate_reactions[reaction] = (rate, [reaction.source.content])
+                successor_of[reaction] = k
+
+        if regulation:
+            candidate_reactions = regulation.filter(state, candidate_reactions)
+
+        produced = dict()
+
+        def apply(reaction, match):
+            k = successor_of[reaction]
+            if exceeded[k]:
+                return State(Vector(np.full(len(rows[position]), np.inf)), Memory(0), is_hell=True)
+            memory = copy(state.memory)
+            memory.update_memory(reaction.label)
+            produced[k] = State(Vector(successors[k].copy()), memory)
+            return produced[k]
+
+        results[index] = create_edges(state, candidate_reactions, apply, symmetry)
+
+        if graph is not None and produced:
+            # shared by all successors of the state
+            enabled_here, rates_here = enabled[position].copy(), rates[position].copy()
+            for k, new_state in produced.items():
+                successor_hints[index][new_state] = (enabled_here, rates_here, reactions[k])
+    return results, successor_hints
+
+
+def create_edges(state, candidate_reactions: dict, apply, symmetry=None) -> set:
+    """
+    Creates normalised outgoing Edges of a state from candidate reactions.
+
+    With Symmetry given, resulting states are replaced by their canonical representatives
+    (and arrows to the same representative are joined).
+
+    :param state: given State
+    :param candidate_reactions: dict reaction -> (rate, matches)
+    :param apply: function (reaction, match) -> resulting State
+    :param symmetry: given Symmetry
+    :return: set of outgoing Edges
+    """
+    unique_states = dict()
+    for reaction in candidate_reactions.keys():
+        for match in candidate_reactions[reaction][1]:
+            new_state = apply(reaction, match)
+            if symmetry:
+                new_state = symmetry.reduce(new_state)
+
+            # multiple arrows between two states are not allowed
+            if new_state in unique_states:
+                unique_states[new_state].add_rate(candidate_reactions[reaction][0])
+            else:
+                edge = Edge(state, new_state, candidate_reactions[reaction][0], reaction.label)
+                unique_states[new_state] = edge
+
+    edges = set(unique_states.values())
+    if not edges:
+        # self loop to create correct DTMC
+        return {Edge(state, state, 1, 'ε')}
+
+    # normalise
+    factor = sum(list(map(lambda edge: edge.probability, edges)))
+    for edge in edges:
+        edge.normalise(factor)
+    return edges
+
+
+# context of the worker processes, set once by the pool initializer
+_process_context = None
+
+
+def init_process_worker(reactions, definitions, regulation, bound, stoichiometry=None, symmetry=None):
+    """
+    Initializer of worker processes (see Scheduler.run_processes).
+    """
+    global _process_context
+    _process_context = (reactions, definitions, regulation, bound, stoichiometry, symmetry)
+
+
+def explore_partition(states: list) -> list:
+    """
+    Explores given States in a worker process.
+
+    :param states: list of States
+    :return: list of pairs (State, outgoing Edges)
+    """
+    reactions, definitions, regulation, bound, stoichiometry, symmetry = _process_context
+    if stoichiometry:
+        results = explore_batch(states, stoichiometry, definitions, regulation, bound, symmetry)
+    else:
+        results = [explore_state(state, reactions, definitions, regulation, bound, symmetry) for state in states]
+    return [(state, list(edges)) for state, edges in zip(states, results)]
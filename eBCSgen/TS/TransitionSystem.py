@@ -1,3 +1,4 @@
+import itertools
 import json
 from copy import copy
 
@@ -6,6 +7,7 @@ from sortedcontainers import SortedList
 from pyModelChecking import Kripke
 
 from eBCSgen.TS.State import State, Memory, Vector
+from eBCSgen.TS.StateStore import StoreEncoding
 
 
 class TransitionSystem:
@@ -20,12 +22,18 @@ class TransitionSystem:
 
         self.states_encoding = dict()  # int -> State
 
+        # compact storage of States with codes assigned at discovery (see StateStore)
+        self.store = None
+
         # for multiset approach
         self.unique_complexes = set()
 
         self.init = None
         self.params = []
 
+        # description of applied state space reduction (see Symmetry.to_dict)
+        self.reduction = None
+
     def __str__(self):
         return str(self.states_encoding) + "\n" + "\n".join(list(map(str, self.edges))) + "\n" + str(self.ordering)
 
@@ -66,7 +74,13 @@ class TransitionSystem:
         """
         Assigns a unique code to each State for storing purposes
         """
-        for state in self.states | self.unprocessed:
+        if self.store is not None:
+            # codes were already assigned by the store
+            self.states_encoding = StoreEncoding(self.store)
+            self.unprocessed = [self.store[code] for code in self.unprocessed]
+            return
+
+        for state in itertools.chain(self.states, self.unprocessed):
             if state not in self.states_encoding:
                 self.states_encoding[state] = len(self.states_encoding) + 1
 
@@ -88,6 +102,9 @@ class TransitionSystem:
         """
         Flips encoding to continue in generating.
         """
+        if self.store is not None:
+            self.unprocessed = [self.store.lookup(state) for state in self.unprocessed]
+            return
         self.init = self.states_encoding[self.init]
         self.states_encoding = self.revert_encoding()
 
@@ -124,6 +141,9 @@ class TransitionSystem:
         if params:
             data['parameters'] = list(params)
 
+        if self.reduction:
+            data['reduction'] = self.reduction
+
         if self.unprocessed:
             data['unprocessed'] = [str(state.content) for state in self.unprocessed]
 
@@ -180,6 +200,9 @@ class TransitionSystem:
         """
         Save the TransitionSystem as explicit Storm file (no parameters).
 
+        The explicit format has no comments, an applied state space reduction is declared
+        as label "reduced_by_<type>" assigned to no state (classes are given in JSON and PRISM outputs).
+
         :param transitions_file: file for transitions
         :param labels_file: file for labels
         :param labels: labels representing atomic propositions assigned to states
@@ -193,6 +216,8 @@ class TransitionSystem:
 
         label_file = open(labels_file, "w+")
         unique_labels = ['init'] + list(map(str, AP_labels.values()))
+        if self.reduction:
+            unique_labels.append("reduced_by_" + self.reduction['type'])
         label_file.write("#DECLARATION\n" + " ".join(unique_labels) + "\n#END\n")
 
         label_file.write("\n".join([str(state) + " " + " ".join(list(map(str, state_labels[state])))
@@ -210,6 +235,8 @@ class TransitionSystem:
 
         prism_file = open(output_file, "w+")
         prism_file.write("dtmc\n")
+        if self.reduction:
+            prism_file.write("\n// reduced by {}: {}\n".format(self.reduction['type'], self.reduction['classes']))
 
         # declare parameters
         prism_file.write("\n" + "\n".join(["\tconst double {};".format(param) for param in params]) + "\n")
@@ -272,8 +299,11 @@ class TransitionSystem:
 
         :return: minimalised TS
         """
-        check = Vector(np.zeros(len(list(self.states_encoding.values())[0].content)))
-        for state in self.states_encoding.values():
+        # States might be decoded on access (StoreEncoding), so they are collected first
+        states_encoding = dict(self.states_encoding.items())
+
+        check = Vector(np.zeros(len(list(states_encoding.values())[0].content)))
+        for state in states_encoding.values():
             check += state.content
 
         ordering = copy(self.ordering)
@@ -283,7 +313,7 @@ class TransitionSystem:
             if check.value[i] == 0:
                 to_remove.append(i)
 
-        for code, state in self.states_encoding.items():
+        for code, state in states_encoding.items():
             new_sequence = np.delete(state.content.value, to_remove)
             state.content.value = new_sequence
 
@@ -293,7 +323,7 @@ class TransitionSystem:
         new_ts = TransitionSystem(ordering, self.bound)
         new_ts.init = self.init
         new_ts.edges = self.edges
-        new_ts.states_encoding = self.states_encoding
+        new_ts.states_encoding = states_encoding
         return new_ts
 
 
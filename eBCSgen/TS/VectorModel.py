@@ -1,14 +1,30 @@
 import multiprocessing
 
-import time
-from scipy.integrate import odeint
 import numpy as np
 import pandas as pd
 import random
 from sortedcontainers import SortedList
 
+from eBCSgen.Analysis.FSP import FSP, TransientDistribution
+from eBCSgen.Analysis.OnTheFly import ReachabilityMonitor
+from eBCSgen.Core.Formula import Formula
+from eBCSgen.Simulation.Ensemble import simulate_ensemble
+from eBCSgen.Simulation.Moments import MomentSystem
+from eBCSgen.Simulation.ODE import ODESystem
+from eBCSgen.Simulation.ParameterScan import parameter_grid, scan_deterministic, scan_stochastic, \
+    to_long_format, SCAN_BATCH_SIZE
+from eBCSgen.Simulation.SSA import SSA_METHODS
+from eBCSgen.Simulation.Statistics import EnsembleStatistics
+from eBCSgen.Simulation.SteadyState import SteadyStateSolver
+from eBCSgen.TS.Checkpoint import load_checkpoint, CHECKPOINT_INTERVAL
+from eBCSgen.TS.DependencyGraph import DependencyGraph
 from eBCSgen.TS.State import State, Memory
-from eBCSgen.TS.TSworker import TSworker
+from eBCSgen.TS.Stoichiometry import Stoichiometry
+from eBCSgen.TS.Symmetry import Symmetry
+from eBCSgen.TS.Frontier import Frontier
+from eBCSgen.TS.Scheduler import Scheduler, CompactScheduler
+from eBCSgen.TS.EdgeStore import EdgeStore
+from eBCSgen.TS.StateStore import StateStore, MappedStateStore, CACHE_SIZE
 from eBCSgen.TS.TransitionSystem import TransitionSystem
 
 AVOGADRO = 6.022 * 10 ** 23
@@ -18,19 +34,30 @@ def fake_expovariate(rate):
     return 0.1
 
 
-def handle_number_of_threads(number, workers):
+def compose_key(key, store):
     """
-    Estimated number of required workers for current volume of unprocessed states.
+    Adapts key function on States to codes of States in given StateStore.
 
-    :param number: volume of unprocessed states
-    :param workers: available workers
+    :param key: function State -> comparable value
+    :param store: given StateStore
+    :return: function code -> comparable value
     """
-    number = np.math.ceil((1 / 50.0) * number - 1 / 2.)
-    for (i, worker) in enumerate(workers):
-        if i <= number:
-            worker.work.set()
-        else:
-            worker.work.clear()
+    return lambda code: key(store[code])
+
+
+def record_partitions(trajectories, partitions: list, reactions: list):
+    """
+    Passes trajectories of hybrid simulation and collects their histories of partitions (see HybridTrajectory).
+
+    :param trajectories: iterable of HybridTrajectories
+    :param partitions: list extended by (run, time, deterministic reactions)
+    :param reactions: simulated reactions (in the order of the Stoichiometry)
+    :return: generator of the trajectories
+    """
+    for run, trajectory in enumerate(trajectories):
+        partitions += [(run, time, [str(reactions[index]) for index in indices])
+                       for time, indices in trajectory.partitions]
+        yield trajectory
 
 
 class VectorModel:
@@ -64,45 +91,89 @@ class VectorModel:
         reation_max = max(map(lambda r: max(max(r.source.content.value), max(r.target.content.value)), self.vector_reactions))
         return max(reation_max, max(self.init.content.value))
 
-    def deterministic_simulation(self, max_time: float, volume: float, step: float = 0.01) -> pd.DataFrame:
+    def compile_rates(self) -> list:
+        """
+        Compiles rates of all reactions (see VectorReaction.compile_rate), the compiled form is shared by
+        Transition system generating, simulations and ODEs.
+
+        :return: list of CompiledRates in the order of self.vector_reactions
+        """
+        return [reaction.compile_rate() for reaction in self.vector_reactions]
+
+    def deterministic_simulation(self, max_time: float, volume: float, step: float = 0.01,
+                                 solver: str = "odeint") -> pd.DataFrame:
         """
-        Translates model to ODE and runs odeint solver for given max_time.
+        Translates model to ODE and runs chosen solver for given max_time.
+
+        The right-hand side and its Jacobian are compiled once from the rates (see ODESystem),
+        the solvers use the analytic Jacobian instead of finite differences. For stiff models
+        the implicit solvers "BDF" or "Radau" (or "auto" which detects stiffness) are recommended.
+
+        Statistics of the solver (number of steps, RHS and Jacobian evaluations) are stored
+        in the attribute attrs["solver"] of the result.
 
         :param max_time: end time of simulation
         :param volume: volume of the system
         :param step: distance between time points
+        :param solver: "odeint", "auto", "LSODA", "BDF", "Radau" or "RK45" (see ODESystem.solve)
         :return: simulated data
         """
+        self.compile_rates()
+        system = ODESystem(Stoichiometry(self.vector_reactions))
 
-        def fun(y, t):
-            """
-            Function used in odeint solver. See its docs for more info.
-            It uses global variable ODEs in local scope of the method.
-
-            :param y: data points
-            :param t: time points
-            """
-            return list(map(eval, ODEs))
-
-        ODEs = [""] * len(self.init.content)
-        for reaction in self.vector_reactions:
-            reaction.to_symbolic()
-            for i in range(len(self.init.content)):
-                # negative effect
-                if reaction.source.content.value[i] > 0:
-                    ODEs[i] += " - {}*({})".format(reaction.source.content.value[i], reaction.rate)
-                    # positive effect
-                if reaction.target.content.value[i] > 0:
-                    ODEs[i] += " + {}*({})".format(reaction.target.content.value[i], reaction.rate)
-        
         t = np.arange(0, max_time + step, step)
-        y_0 = list(map(lambda x: x / (AVOGADRO * volume), self.init.content.value))
-        y = odeint(fun, y_0, t)
+        y_0 = self.init.content.value / (AVOGADRO * volume)
+        y, statistics = system.solve(y_0, t, solver)
         df = pd.DataFrame(data=y, columns=list(map(str, self.ordering)))
         df.insert(0, "times", t)
+        df.attrs["solver"] = statistics
+        return df
+
+    def steady_state(self, volume: float) -> pd.DataFrame:
+        """
+        Finds the steady state of the ODE semantics reached from the initial state.
+
+        Newton method with the analytic Jacobian is applied to the ODE system with singular directions
+        given by conservation laws replaced by the laws themselves, the ODEs are integrated only if Newton
+        method fails (see SteadyStateSolver). Statistics of the solver (method, iterations, residual and
+        stability of the steady state) are stored in the attribute attrs["solver"] of the result.
+
+        :param volume: volume of the system
+        :return: DataFrame with a single row of steady concentrations of agents
+        """
+        self.compile_rates()
+        solver = SteadyStateSolver(ODESystem(Stoichiometry(self.vector_reactions)))
+        y, statistics = solver.find(self.init.content.value / (AVOGADRO * volume))
+        df = pd.DataFrame(data=[y], columns=list(map(str, self.ordering)))
+        df.attrs["solver"] = statistics
+        return df
+
+    def parameter_continuation(self, param: str, values, volume: float) -> pd.DataFrame:
+        """
+        Follows the steady state of the ODE semantics for a sequence of values of a param.
+
+        The rates are compiled once with the param as an additional argument, hence the model has to be
+        vectorized with the param left undefined (see Model.parameter_continuation). Each steady state is
+        predicted from the previous ones and corrected by Newton method (see SteadyStateSolver.continuation).
+        Statistics of the solver for each value are stored in the attribute attrs["solver"] of the result.
+
+        :param param: name of the param
+        :param values: sequence of values of the param
+        :param volume: volume of the system
+        :return: DataFrame with columns param, steady concentrations of agents and stable
+        """
+        self.compile_rates()
+        solver = SteadyStateSolver(ODESystem(Stoichiometry(self.vector_reactions), [param]))
+        states, statistics = solver.continuation(self.init.content.value / (AVOGADRO * volume), values)
+        df = pd.DataFrame(data=states, columns=list(map(str, self.ordering)))
+        df.insert(0, param, np.asarray(values, dtype=float).reshape(-1))
+        df["stable"] = [info["stable"] for info in statistics]
+        df.attrs["solver"] = statistics
         return df
 
-    def stochastic_simulation(self, max_time: float, runs: int, testing: bool = False) -> pd.DataFrame:
+    def stochastic_simulation(self, max_time: float, runs: int, testing: bool = False,
+                              method: str = "direct", seed=None, workers: int = 1,
+                              grid=None, quantiles=()) -> pd.DataFrame:
         """
         Gillespie algorithm implementation.
 
@@ -110,51 +181,68 @@ class VectorModel:
         of all possible rates in particular VectorState.
         Then such reaction is applied and next time is computed using Poisson distribution (random.expovariate).
 
+        The simulation itself runs on arrays (see DirectMethod), the trajectories are converted
+        to DataFrames only once they are finished.
+
+        For large networks, the "next_reaction" method (see NextReactionMethod) updates only propensities
+        affected by the fired reaction and picks the next reaction from a priority queue.
+        For models with high amounts of agents, the approximate "tau_leaping" method (see TauLeaping) fires
+        many reactions at once and falls back to exact steps when some reactants are close to depletion.
+        For models combining abundant and rare agents, the "hybrid" method (see HybridSimulation) integrates
+        fast reactions of abundant agents as ODEs and simulates the others exactly, the history of partitions
+        of reactions is stored in attrs["partitions"] of the result (columns run, times and deterministic).
+        Regulated models are simulated by the "direct" method filtering the reactions by the regulation
+        in every step (see RegulationMasks).
+
+        The runs can be executed in parallel by a pool of worker processes. Each run has its own random stream
+        derived from the seed (see simulate_ensemble), the result for a given seed does not depend
+        on the number of workers.
+
+        If grid is given, each trajectory is sampled in the grid points as a piecewise-constant function and
+        the mean, variance and optionally quantiles in the grid points are accumulated online
+        (see EnsembleStatistics), hence the memory does not depend on the number of runs and events.
+        Otherwise, the trajectories are averaged by interpolation in all event times.
+
         :param max_time: time when simulation ends
         :param runs: how many time the process should be repeated (then average behaviour is taken)
+        :param method: "direct", "next_reaction", "tau_leaping" or "hybrid"
+        :param seed: seed of the random streams (None for fresh entropy)
+        :param workers: number of worker processes
+        :param grid: sorted time points where the statistics are computed (e.g. np.linspace(0, max_time, 101))
+        :param quantiles: quantiles to be estimated in the grid points (e.g. (0.05, 0.95))
         :return: simulated data
         """
+        if quantiles and grid is None:
+            raise ValueError("Quantiles can be estimated only on a time grid.")
+
         header = list(map(str, self.ordering))
         result_df = pd.DataFrame(columns=header)
 
+        self.compile_rates()
+        # the testing output was generated with reactions sorted by their propensities
+        engine = self.create_engine(method, **({"ordered": True} if testing and method == "direct" else {}))
+        init = self.init.content.value
         if not testing:
-            time_step = random.expovariate
+            trajectories = simulate_ensemble(engine, init, max_time, runs, seed, workers)
         else:
             random.seed(10)
-            time_step = fake_expovariate
-
-        for run in range(runs):
-            df = pd.DataFrame(columns=header, dtype=float)
-            solution = self.init
-            time = 0.0
-            while time < max_time:
-                # add to data
-                df.loc[time] = list(solution.content.value)
-
-                applied_reactions = pd.DataFrame(data=[(solution.update_state(reaction.source.content,
-                                                                              reaction.target.content,
-                                                                              None,
-                                                                              np.math.inf),
-                                                        reaction.match(solution),
-                                                        reaction.evaluate_rate(solution, None)
-                                                        )
-                                                       for reaction in self.vector_reactions],
-                                                 columns=["state", "match", "rate"])
-                applied_reactions = applied_reactions.dropna()
-                if not applied_reactions.empty:
-                    rates_sum = applied_reactions.sum()["rate"]
-                    sorted_applied = applied_reactions.sort_values(by=["rate"])
-                    sorted_applied["cumsum"] = sorted_applied.cumsum(axis=0)["rate"]
-
-                    # pick random reaction based on rates
-                    rand_number = rates_sum * random.random()
-                    sorted_applied.drop(sorted_applied[sorted_applied["cumsum"] < rand_number].index, inplace=True)
-                    solution = sorted_applied.iloc[0]["state"]
-                else:
-                    rates_sum = random.uniform(0.5, 0.9)
+            trajectories = (engine.simulate(init, max_time, random, fake_expovariate) for _ in range(runs))
+
+        partitions = []
+        if method == "hybrid":
+            trajectories = record_partitions(trajectories, partitions, engine.stoichiometry.reactions)
 
-                # update time
-                time += time_step(rates_sum)
+        if grid is not None:
+            statistics = EnsembleStatistics(grid, len(header), quantiles)
+            for trajectory in trajectories:
+                statistics.add(trajectory.sample(statistics.grid))
+            result_df = statistics.to_dataframe(header)
+            if method == "hybrid":
+                result_df.attrs["partitions"] = pd.DataFrame(partitions, columns=["run", "times", "deterministic"])
+            return result_df
+
+        for run, trajectory in enumerate(trajectories):
+            df = trajectory.to_dataframe(header)
 
             if run != 0:
                 # union of the indexes
@@ -174,55 +262,328 @@ class VectorModel:
 
         result_df.index.name = 'times'
         result_df.reset_index(inplace=True)
+        if method == "hybrid":
+            result_df.attrs["partitions"] = pd.DataFrame(partitions, columns=["run", "times", "deterministic"])
         return result_df
 
+    def moment_simulation(self, max_time: float, closure: str = "lna", step: float = 0.01) -> pd.DataFrame:
+        """
+        Approximates means and standard deviations of amounts of agents of the stochastic semantics
+        by moment equations (see MomentSystem) instead of averaging many runs of stochastic_simulation.
+
+        The result has the layout of simulation results: column times, means of agents and their
+        lower and upper bounds given by one standard deviation (suffixes -std and +std).
+        The covariance matrices are stored in attrs["covariance"] of the result.
+
+        :param max_time: end time of simulation
+        :param closure: "lna" (linear noise approximation) or "second_order" (moment closure)
+        :param step: distance between time points
+        :return: simulated data
+        """
+        self.compile_rates()
+        system = MomentSystem(Stoichiometry(self.vector_reactions), closure)
+
+        times = np.arange(0, max_time + step, step)
+        means, covariance = system.solve(self.init.content.value, times)
+        deviations = np.sqrt(np.maximum(np.diagonal(covariance, axis1=1, axis2=2), 0))
+
+        header = list(map(str, self.ordering))
+        columns = [("times", times)]
+        columns += [(agent, means[:, i]) for i, agent in enumerate(header)]
+        columns += [(agent + "-std", means[:, i] - deviations[:, i]) for i, agent in enumerate(header)]
+        columns += [(agent + "+std", means[:, i] + deviations[:, i]) for i, agent in enumerate(header)]
+        df = pd.DataFrame(dict(columns))
+        df.attrs["covariance"] = covariance
+        return df
+
+    def create_engine(self, method: str, params=(), **options):
+        """
+        Creates SSA engine for compiled rates of the model.
+
+        :param method: "direct", "next_reaction", "tau_leaping" or "hybrid"
+        :param params: params used as additional arguments of the rates
+        :param options: additional arguments of the engine (e.g. ordered of DirectMethod)
+        :return: SSA engine (filtering reactions by the regulation of the model)
+        """
+        if method not in SSA_METHODS:
+            raise ValueError("Unknown method '{}', use one of {}.".format(method, ", ".join(SSA_METHODS)))
+        stoichiometry = Stoichiometry(self.vector_reactions)
+        if not self.regulation:
+            return SSA_METHODS[method](stoichiometry, params=params, **options)
+        if method != "direct":
+            raise ValueError("Regulated models can be simulated only by the 'direct' method.")
+        return SSA_METHODS[method](stoichiometry, params=params, regulation=self.regulation, **options)
+
+    def parameter_scan(self, values: dict, max_time: float, simulation: str = "deterministic",
+                       volume: float = None, step: float = 0.01, solver: str = "auto", method: str = "direct",
+                       runs: int = 10, seed=None, workers: int = 1, batch_size: int = SCAN_BATCH_SIZE) -> pd.DataFrame:
+        """
+        Simulates the model for all combinations of given values of params.
+
+        The rates are compiled once with the scanned params as additional arguments, hence the model has to be
+        vectorized with these params left undefined (see Model.parameter_scan). Deterministic simulations
+        integrate batches of parameter sets as a single ODE system (see scan_deterministic), stochastic
+        simulations compute means of ensembles of given number of runs (see scan_stochastic).
+        Both can be spread over a pool of worker processes.
+
+        :param values: dict param -> value or iterable of values
+        :param max_time: end time of simulation
+        :param simulation: "deterministic" or "stochastic"
+        :param volume: volume of the system (deterministic simulation only)
+        :param step: distance between time points where the results are reported
+        :param solver: ODE solver (see ODESystem.solve)
+        :param method: SSA method (see stochastic_simulation)
+        :param runs: number of runs for each parameter set (stochastic simulation only)
+        :param seed: seed of the random streams (None for fresh entropy)
+        :param workers: number of worker processes
+        :param batch_size: maximal number of parameter sets integrated at once
+        :return: DataFrame with columns params, times, agent and value (mean value for stochastic simulation)
+        """
+        params, sets = parameter_grid(values)
+        times = np.arange(0, max_time + step, step)
+        agents = list(map(str, self.ordering))
+        self.compile_rates()
+
+        if simulation == "deterministic":
+            if volume is None:
+                raise ValueError("Volume of the system has to be given for deterministic simulation.")
+            system = ODESystem(Stoichiometry(self.vector_reactions), params)
+            y_0 = self.init.content.value / (AVOGADRO * volume)
+            data, _ = scan_deterministic(system, y_0, times, sets, solver, batch_size, workers)
+        elif simulation == "stochastic":
+            engine = self.create_engine(method, params)
+            data = scan_stochastic(engine, self.init.content.value, times, sets, runs, seed, workers)
+        else:
+            raise ValueError("Unknown simulation '{}', use deterministic or stochastic.".format(simulation))
+        return to_long_format(params, sets, times, agents, data)
+
     def generate_transition_system(self, ts: TransitionSystem = None,
-                                   max_time: float = np.inf, max_size: float = np.inf) -> TransitionSystem:
+                                   max_time: float = np.inf, max_size: float = np.inf,
+                                   backend: str = "thread", workers: int = None,
+                                   strategy: str = "bfs", key=None, compact: bool = False,
+                                   working_dir: str = None, cache_size: int = CACHE_SIZE,
+                                   checkpoint: str = None,
+                                   checkpoint_interval: float = CHECKPOINT_INTERVAL,
+                                   monitor=None, reduction=None) -> TransitionSystem:
         """
         Parallel implementation of Transition system generating.
 
-        The workload is distributed to Workers which take unprocessed States from the pool and process them.
+        The workload is distributed to Workers which take unprocessed States from the frontier and process them.
 
         If the given bound should be exceeded, a special infinite state is introduced.
 
-        The algorithm dynamically changes number of active workers using thread events. This is done according to the
-        current volume of unprocessed states.
-
+        With the "thread" backend, the workers share an event-driven work queue (see Scheduler), which terminates
+        as soon as there is no more work and enforces the limits immediately.
+
+        With the "process" backend, the unprocessed states are partitioned by their hash among a pool of worker
+        processes (see TSworker.generate_with_processes), which avoids serialisation on the GIL.
+
+        In both cases, states are explored in batches: enabledness of reactions, successors and bound violations
+        are computed for the whole batch at once using the stoichiometry matrices (see Stoichiometry).
+        The "thread" backend moreover re-checks only reactions affected by the reaction which produced
+        the state (see DependencyGraph), the rest is inherited from the parent state.
+
+        The order in which states are explored is given by the frontier strategy (see Frontier),
+        which makes size-limited runs predictable.
+
+        In compact mode, states are kept packed in a StateStore which assigns their codes already
+        at discovery (no separate encoding pass is needed). A continued TS keeps the mode it was created with.
+
+        If working_dir is given, the compact mode is used out-of-core: packed states and the list of edges are kept
+        in memory-mapped files under the directory and only a bounded cache of hot states is decoded in memory.
+        The resulting TS can be exported in the same way (e.g. save_to_json, save_to_STORM_explicit, save_to_prism).
+
+        If checkpoint is given, the compact mode is used and the progress (states, edges and frontier) is periodically
+        saved to the file, as well as at the end of generating (also when interrupted). The generating can be
+        continued from the file using resume_transition_system.
+
+        If reduction is given, states equivalent up to permutation of interchangeable agents are lumped together
+        (see Symmetry). The reduction is either "symmetry" (classes are found automatically, see find_symmetry)
+        or a Symmetry, it is recorded in the resulting TS and kept when the TS is continued.
+        Only properties which do not distinguish agents within a class are preserved (see find_symmetry).
+
+        :param ts: partially generated TransitionSystem to be continued
+        :param max_time: max time for TS generating before interrupting
+        :param max_size: max allowed size of TS before interrupting
+        :param backend: "thread" or "process"
+        :param workers: number of workers (number of CPUs by default)
+        :param strategy: frontier strategy - "bfs", "dfs" or "priority"
+        :param key: function State -> comparable value used by "priority" strategy (lowest first)
+        :param compact: store states in packed form
+        :param working_dir: directory for memory-mapped files (implies compact mode)
+        :param cache_size: number of decoded states kept in memory in out-of-core mode
+        :param checkpoint: file where checkpoints are saved (implies compact mode)
+        :param checkpoint_interval: time between two checkpoints (in seconds)
+        :param monitor: ReachabilityMonitor observing discovered states (see check_on_the_fly)
+        :param reduction: "symmetry" or Symmetry used to reduce the state space
         :return: generated Transition system
         """
+        if backend not in ("thread", "process"):
+            raise ValueError("Unknown backend '{}', use 'thread' or 'process'.".format(backend))
+
+        self.compile_rates()
+        if reduction is None and ts and ts.reduction:
+            reduction = Symmetry.from_dict(ts.reduction, self.ordering)
+        symmetry = None
+        if reduction is not None:
+            if self.regulation:
+                raise ValueError("Symmetry reduction is not supported for regulated models.")
+            if reduction == "symmetry":
+                symmetry = self.find_symmetry()
+            elif isinstance(reduction, Symmetry):
+                symmetry = reduction
+            else:
+                raise ValueError("Unknown reduction '{}', use 'symmetry' or a Symmetry.".format(reduction))
+
         if not ts:
             ts = TransitionSystem(self.ordering, self.bound)
             memory = 0 if not self.regulation else self.regulation.memory
             ts.init = State(self.init.content, Memory(memory))
+            if symmetry:
+                ts.init = symmetry.reduce(ts.init)
             ts.unprocessed = {ts.init}
+            bound = max(self.bound, max(self.init.content.value))
+            if working_dir:
+                ts.store = MappedStateStore(working_dir, len(self.ordering), bound, cache_size=cache_size)
+                ts.edges = EdgeStore(working_dir)
+            elif compact or checkpoint:
+                ts.store = StateStore(len(self.ordering), bound)
+            if ts.store is not None:
+                ts.init, _ = ts.store.insert(ts.init)
+                ts.unprocessed = {ts.init}
         else:
             ts.decode()
 
-        workers = [TSworker(ts, self.vector_reactions, None, self.regulation)
-                   for _ in range(multiprocessing.cpu_count())]
-        for worker in workers:
-            worker.start()
+        if ts.store is not None:
+            if key is not None:
+                key = compose_key(key, ts.store)
+            ts.unprocessed = Frontier(ts.unprocessed, strategy, key)
+            scheduler = CompactScheduler(ts, max_time, max_size, checkpoint, checkpoint_interval)
+        else:
+            if checkpoint:
+                raise ValueError("Checkpoints are supported only for TS generated in compact mode.")
+            ts.unprocessed = Frontier(ts.unprocessed, strategy, key)
+            scheduler = Scheduler(ts, max_time, max_size)
+
+        if symmetry:
+            ts.reduction = symmetry.to_dict(self.ordering)
+
+        if monitor is not None:
+            if backend != "thread":
+                raise ValueError("Discovered states can be monitored only with the 'thread' backend.")
+            scheduler.monitor = monitor
+            init = ts.store[ts.init] if ts.store is not None else ts.init
+            if monitor.start(ts.init, init):
+                scheduler.finished = True
+
+        workers = workers if workers else multiprocessing.cpu_count()
+        stoichiometry = Stoichiometry(self.vector_reactions)
+        if backend == "process":
+            scheduler.run_processes(self.vector_reactions, None, self.regulation, workers, stoichiometry, symmetry)
+        else:
+            # values inherited from parents are not valid for canonical states
+            graph = DependencyGraph(stoichiometry) if not symmetry else None
+            scheduler.run(self.vector_reactions, None, self.regulation, workers, stoichiometry, graph, symmetry)
 
-        workers[0].work.set()
-        start_time = time.time()
+        ts.encode()
 
-        try:
-            while any([worker.work.is_set() for worker in workers]) \
-                    and time.time() - start_time < max_time \
-                    and len(ts.states) + len(ts.states_encoding) < max_size:
-                handle_number_of_threads(len(ts.unprocessed), workers)
-                time.sleep(1)
-        # probably should be changed to a different exceptions for the case when the execution is stopped on Galaxy
-        # then also the ts should be exported to appropriate file
-        except (KeyboardInterrupt, EOFError) as e:
-            pass
+        return ts
 
-        for worker in workers:
-            worker.join()
+    def transient_analysis(self, times, method: str = "krylov", ts: TransitionSystem = None,
+                           max_size: float = np.inf) -> TransientDistribution:
+        """
+        Computes transient probability distributions by Finite State Projection (see FSP).
 
-        while any([worker.is_alive() for worker in workers]):
-            time.sleep(1)
+        The projection consists of states enumerated by Transition system generating (states beyond the bound
+        are left out), the generator matrix is assembled from rates of the reactions. The probability of leaving
+        the projection is reported as the error bound.
 
-        ts.encode()
+        :param times: sorted time points
+        :param method: "krylov" or "uniformization"
+        :param ts: already generated TransitionSystem of the model (generated if not given)
+        :param max_size: max allowed size of generated TS
+        :return: TransientDistribution (see TransientDistribution.to_dataframe for expected amounts)
+        """
+        if self.regulation:
+            raise ValueError("Finite State Projection is not supported for regulated models.")
+        if ts is None:
+            ts = self.generate_transition_system(max_size=max_size)
+        if ts.reduction:
+            raise ValueError("Finite State Projection requires TS without state space reduction.")
+
+        states = [state.content.value for state in ts.states_encoding.values() if not state.is_hell]
+        self.compile_rates()
+        fsp = FSP(Stoichiometry(self.vector_reactions), np.array(states))
+        return fsp.transient(self.init.content.value, times, method)
+
+    def find_symmetry(self, formulas=()) -> Symmetry:
+        """
+        Finds classes of interchangeable agents of the model (see Symmetry.find).
 
-        return ts
+        If formulas are given, the classes are refined so that the agents used by their APs are not permuted
+        and the formulas can be checked on the reduced TS.
+
+        :param formulas: Formulas to be preserved by the reduction
+        :return: found Symmetry
+        """
+        self.compile_rates()
+        symmetry = Symmetry.find(self.vector_reactions, len(self.ordering))
+        index_sets = []
+        for formula in formulas:
+            for ap in formula.get_APs():
+                if ap.complex in self.ordering:
+                    index_sets.append({self.ordering.index(ap.complex)})
+                else:
+                    index_sets.append(set(ap.complex.identify_compatible(self.ordering)))
+        return symmetry.refine(index_sets)
+
+    def check_on_the_fly(self, formula: Formula, max_depth: int = None, max_time: float = np.inf,
+                         max_size: float = np.inf, workers: int = None, compact: bool = False):
+        """
+        Checks reachability property given by Formula while generating the Transition system.
+
+        Atomic propositions of the formula are evaluated on each newly discovered state and the generating stops
+        as soon as a witness (resp. counterexample) is found. Supported formulas are reachability of a state formula
+        (e.g. CTL E(F(phi)) or PCTL P>0 [F phi]) and its negation (e.g. A(G(phi)), see reachability_goal).
+        The states are explored in BFS order, hence the witness path is a shortest one
+        (with more workers, states of neighbouring levels can be processed concurrently).
+
+        If max_depth is given, only states reachable in at most max_depth steps are considered (bounded reachability).
+        States at the depth bound are kept without successors and the exploration continues until the frontier
+        is empty (a state reached later by a shorter path is expanded again).
+
+        :param formula: given Formula
+        :param max_depth: maximal number of steps
+        :param max_time: max time for TS generating before interrupting
+        :param max_size: max allowed size of TS before interrupting
+        :param workers: number of workers (number of CPUs by default)
+        :param compact: store states in packed form
+        :return: result (None if not decided within the limits), witness path (list of States) and partial TS
+        """
+        monitor = ReachabilityMonitor(formula, self.ordering, max_depth)
+        ts = self.generate_transition_system(max_time=max_time, max_size=max_size, workers=workers,
+                                             compact=compact, monitor=monitor)
+
+        witness = []
+        if monitor.found is not None:
+            witness = monitor.path(monitor.found)
+            if ts.store is not None:
+                witness = [ts.states_encoding[code] for code in witness]
+        return monitor.result(ts), witness, ts
+
+    def resume_transition_system(self, checkpoint: str, working_dir: str = None, cache_size: int = CACHE_SIZE,
+                                 **kwargs) -> TransitionSystem:
+        """
+        Continues Transition system generating from a checkpoint created by generate_transition_system.
+
+        By default, new checkpoints are saved to the same file.
+
+        :param checkpoint: checkpoint file
+        :param working_dir: directory for memory-mapped files
+        :param cache_size: number of decoded states kept in memory in out-of-core mode
+        :param kwargs: other arguments of generate_transition_system
+        :return: generated Transition system
+        """
+        ts = load_checkpoint(checkpoint, self.ordering, working_dir, cache_size)
+        kwargs.setdefault("checkpoint", checkpoint)
+        return self.generate_transition_system(ts, **kwargs)
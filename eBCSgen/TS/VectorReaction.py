@@ -8,6 +8,7 @@ class VectorReaction:
         self.target = target
         self.rate = rate
         self.label = label
+        self.compiled_rate = None  # see compile_rate
 
     def __str__(self):
         label = self.label + " ~ " if self.label else ""
@@ -27,14 +28,31 @@ class VectorReaction:
 
     def evaluate_rate(self, state, definitions):
         _ = definitions  # unused argument
+        if self.compiled_rate is not None:
+            return self.compiled_rate(state.content.value)
         return self.rate.evaluate(state)
 
+    def compile_rate(self):
+        """
+        Compiles the rate to a function of the state vector (see Rate.compile), the compiled form is
+        used by all subsequent evaluations.
+
+        :return: CompiledRate (None if the reaction has no rate)
+        """
+        if self.compiled_rate is None and self.rate is not None:
+            self.compiled_rate = self.rate.compile()
+        return self.compiled_rate
+
     def match(self, state, all=False):
         _ = all  # unused argument
         if state >= self.source:
             return [self.source.content]
         return None
 
+    def count_matches(self, state) -> int:
+        # to ensure compatibility with Rule
+        return 1 if state >= self.source else 0
+
     def replace(self, aligned_match):
         _ = aligned_match  # unused argument
         return self.target.content